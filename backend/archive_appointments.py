@@ -0,0 +1,40 @@
+"""
+Move os agendamentos anteriores ao horizonte para as coleções de arquivo por ano
+(appointments_archive_<ano>). Pode ser executado de novo com segurança, por
+exemplo diariamente via cron.
+
+Uso: python -m backend.archive_appointments [--horizon-days 365] [--chunk-size 1000] [--dry-run]
+"""
+
+import argparse
+import asyncio
+
+from backend.db import DB_NAME, create_client
+from backend.services.archive_service import (
+    ARCHIVE_CHUNK_PAUSE_MS, ARCHIVE_CHUNK_SIZE, ARCHIVE_HORIZON_DAYS, archive_appointments
+)
+
+
+async def main(args):
+    client = create_client()
+    db = client[args.db or DB_NAME]
+    try:
+        result = await archive_appointments(db, args.horizon_days, args.chunk_size, args.pause_ms, args.dry_run)
+    finally:
+        client.close()
+    action = "a arquivar" if args.dry_run else "arquivados"
+    print(f"Corte: {result['cutoff']}")
+    for year, count in sorted(result["by_year"].items()):
+        print(f"  {year}: {count} agendamentos {action}")
+    if not args.dry_run:
+        print(f"{result['moved']} agendamentos removidos da coleção quente")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Arquiva agendamentos antigos em coleções por ano")
+    parser.add_argument("--horizon-days", type=int, default=ARCHIVE_HORIZON_DAYS, help="dias mantidos na coleção quente")
+    parser.add_argument("--chunk-size", type=int, default=ARCHIVE_CHUNK_SIZE)
+    parser.add_argument("--pause-ms", type=int, default=ARCHIVE_CHUNK_PAUSE_MS, help="pausa entre lotes")
+    parser.add_argument("--dry-run", action="store_true", help="só conta o que seria arquivado")
+    parser.add_argument("--db", help=f"banco (padrão: {DB_NAME})")
+    asyncio.run(main(parser.parse_args()))
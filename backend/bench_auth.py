@@ -0,0 +1,95 @@
+"""
+Benchmark da resolução de sessão por requisição.
+
+Compara três modos de autenticação sobre o mesmo usuário:
+  - banco:     cache de sessões vazio a cada chamada (agregação com $lookup)
+  - cache:     cache de sessões aquecido
+  - assinado:  token HMAC verificado em CPU (+ contador de revogações)
+
+Usa um banco separado (padrão: <DB_NAME>_bench), que é apagado ao final.
+Execute com: python -m backend.bench_auth [--requests 2000]
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+import uuid
+from datetime import datetime, timezone, timedelta
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from backend.db import MONGODB_URI, DB_NAME
+from backend.utils import signed_tokens
+from backend.utils.auth import resolve_session
+from backend.utils.cache import session_cache
+
+
+async def measure(label: str, requests: int, call) -> dict:
+    samples = []
+    for _ in range(requests):
+        started = time.perf_counter()
+        resolved = await call()
+        samples.append(time.perf_counter() - started)
+        assert resolved is not None and resolved[1] is not None, f"{label}: sessão não resolvida"
+    samples.sort()
+    return {
+        "modo": label,
+        "média (us)": statistics.fmean(samples) * 1e6,
+        "p50 (us)": samples[len(samples) // 2] * 1e6,
+        "p99 (us)": samples[int(len(samples) * 0.99)] * 1e6,
+    }
+
+
+async def run_bench(db, requests: int) -> list:
+    if not signed_tokens.AUTH_TOKEN_SECRET:
+        signed_tokens.AUTH_TOKEN_SECRET = uuid.uuid4().hex
+    user = {
+        "user_id": f"user_bench_{uuid.uuid4().hex[:8]}",
+        "tenant_id": "tenant_bench",
+        "email": "bench@example.com",
+        "name": "Bench",
+        "picture": "",
+        "role": "admin",
+        "created_at": datetime.now(timezone.utc).isoformat()
+    }
+    expires_at = datetime.now(timezone.utc) + timedelta(days=7)
+    opaque_token = uuid.uuid4().hex
+    await db.users.insert_one(dict(user))
+    await db.user_sessions.insert_one({
+        "user_id": user["user_id"],
+        "session_token": opaque_token,
+        "expires_at": expires_at.isoformat(),
+        "created_at": datetime.now(timezone.utc).isoformat()
+    })
+    signed_token = signed_tokens.issue_token(user, expires_at)
+
+    async def uncached():
+        session_cache.clear()
+        return await resolve_session(db, opaque_token)
+
+    return [
+        await measure("banco", requests, uncached),
+        await measure("cache", requests, lambda: resolve_session(db, opaque_token)),
+        await measure("assinado", requests, lambda: resolve_session(db, signed_token)),
+    ]
+
+
+async def main(args):
+    client = AsyncIOMotorClient(MONGODB_URI)
+    db_name = args.db or f"{DB_NAME}_bench"
+    db = client[db_name]
+    try:
+        results = await run_bench(db, args.requests)
+    finally:
+        await client.drop_database(db_name)
+        client.close()
+    print(f"{'modo':>10} {'média (us)':>12} {'p50 (us)':>10} {'p99 (us)':>10}")
+    for row in results:
+        print(f"{row['modo']:>10} {row['média (us)']:>12.1f} {row['p50 (us)']:>10.1f} {row['p99 (us)']:>10.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark da autenticação por requisição")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--db", help="banco usado no benchmark (é apagado ao final)")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,88 @@
+"""
+Microbenchmark do motor de disponibilidade.
+
+Compara o cálculo original (laços aninhados por slot, bloqueio e agendamento)
+com o motor de bitmaps em calendários cada vez mais densos.
+Execute com: python -m backend.bench_availability
+"""
+
+import random
+import timeit
+
+from backend.utils.availability import (
+    DAY_END, DAY_START, SLOT_STEP, available_starts, DayHours, DayOccupancy, minutes_to_time
+)
+
+
+def naive_slots(blocked, existing, duration, step=SLOT_STEP):
+    """Reprodução do algoritmo original de get_available_slots_route."""
+    available_slots = []
+    for slot_minutes in range(DAY_START, DAY_END, step):
+        slot_end_minutes = slot_minutes + duration
+        is_available = True
+        for block in blocked:
+            if block.get("start_time") and block.get("end_time"):
+                block_start = int(block["start_time"].split(":")[0]) * 60 + int(block["start_time"].split(":")[1])
+                block_end = int(block["end_time"].split(":")[0]) * 60 + int(block["end_time"].split(":")[1])
+                if slot_minutes < block_end and slot_end_minutes > block_start:
+                    is_available = False
+                    break
+        if is_available:
+            for appt in existing:
+                appt_hour, appt_min = map(int, appt["time"].split(":"))
+                appt_minutes = appt_hour * 60 + appt_min
+                appt_end = appt_minutes + appt.get("service_duration", 30)
+                if slot_minutes < appt_end and slot_end_minutes > appt_minutes:
+                    is_available = False
+                    break
+        if is_available:
+            available_slots.append(minutes_to_time(slot_minutes))
+    return available_slots
+
+
+def bitmap_slots(blocked, existing, duration, hours):
+    return available_starts(DayOccupancy.build(blocked, existing), duration, hours)
+
+
+def random_day(rng, n_blocks, n_appointments):
+    blocked = []
+    for _ in range(n_blocks):
+        start = rng.randrange(DAY_START, DAY_END - 15, 5)
+        blocked.append({
+            "start_time": minutes_to_time(start),
+            "end_time": minutes_to_time(start + rng.choice([15, 30, 60])),
+            "is_whole_day": False,
+        })
+    existing = []
+    for _ in range(n_appointments):
+        start = rng.randrange(DAY_START, DAY_END, 5)
+        existing.append({"time": minutes_to_time(start), "service_duration": rng.choice([15, 30, 45, 60, 90])})
+    return blocked, existing
+
+
+def main():
+    rng = random.Random(42)
+    print(
+        f"{'bloqueios':>10} {'agend.':>8} {'passo':>6} {'original (us)':>14} "
+        f"{'bitmap (us)':>12} {'consulta (us)':>14} {'ganho':>7}"
+    )
+    for n_blocks, n_appointments in [(0, 5), (2, 20), (5, 50), (10, 100), (20, 250), (50, 500)]:
+        for step in (SLOT_STEP, 5):
+            blocked, existing = random_day(rng, n_blocks, n_appointments)
+            hours = DayHours.window(DAY_START, DAY_END, step)
+            for duration in (30, 90):
+                assert naive_slots(blocked, existing, duration, step) == bitmap_slots(blocked, existing, duration, hours)
+            number = 200
+            naive = timeit.timeit(lambda: naive_slots(blocked, existing, 60, step), number=number) / number
+            bitmap = timeit.timeit(lambda: bitmap_slots(blocked, existing, 60, hours), number=number) / number
+            # Consulta sobre um bitmap já construído (o custo que se repete por duração)
+            occupancy = DayOccupancy.build(blocked, existing)
+            query = timeit.timeit(lambda: available_starts(occupancy, 60, hours), number=number) / number
+            print(
+                f"{n_blocks:>10} {n_appointments:>8} {step:>6} "
+                f"{naive * 1e6:>14.1f} {bitmap * 1e6:>12.1f} {query * 1e6:>14.1f} {naive / bitmap:>6.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
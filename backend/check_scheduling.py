@@ -0,0 +1,96 @@
+"""
+Verificação aleatória do núcleo de agendamento contra o algoritmo ingênuo.
+
+Gera dias aleatórios (bloqueios parciais e de dia inteiro, agendamentos de
+várias durações, intervalos encostados e repetidos) e confere que
+DayIntervals.find_overlap responde igual à varredura linear usada antes,
+tanto na construção em lote quanto com inserções incrementais.
+Execute com: python -m backend.check_scheduling [--cases N] [--seed S]
+"""
+
+import argparse
+import random
+import sys
+
+from backend.utils.scheduling import (
+    MINUTES_PER_DAY, DayIntervals, appointment_interval, block_interval, minutes_to_time
+)
+
+
+def naive_overlap(blocked, existing, start, end):
+    """Reprodução da checagem original: percorre todos os documentos do dia."""
+    for block in blocked:
+        if block.get("is_whole_day"):
+            return True
+        block_start = int(block["start_time"].split(":")[0]) * 60 + int(block["start_time"].split(":")[1])
+        block_end = int(block["end_time"].split(":")[0]) * 60 + int(block["end_time"].split(":")[1])
+        if start < block_end and end > block_start:
+            return True
+    for appt in existing:
+        appt_hour, appt_min = map(int, appt["time"].split(":"))
+        appt_start = appt_hour * 60 + appt_min
+        appt_end = appt_start + appt.get("service_duration", 30)
+        if start < appt_end and end > appt_start:
+            return True
+    return False
+
+
+def random_day(rng):
+    blocked = []
+    for _ in range(rng.randrange(0, 6)):
+        if rng.random() < 0.03:
+            blocked.append({"start_time": None, "end_time": None, "is_whole_day": True})
+            continue
+        start = rng.randrange(0, MINUTES_PER_DAY - 5, 5)
+        end = min(start + rng.choice([5, 15, 30, 60, 120]), MINUTES_PER_DAY - 1)
+        blocked.append({"start_time": minutes_to_time(start), "end_time": minutes_to_time(end), "is_whole_day": False})
+    existing = []
+    for _ in range(rng.randrange(0, 80)):
+        start = rng.randrange(0, MINUTES_PER_DAY - 120, 5)
+        existing.append({"time": minutes_to_time(start), "service_duration": rng.choice([5, 15, 30, 45, 60, 90, 120])})
+    return blocked, existing
+
+
+def random_queries(rng, count):
+    for _ in range(count):
+        start = rng.randrange(0, MINUTES_PER_DAY - 1)
+        yield start, start + rng.choice([1, 5, 15, 30, 60, 90, 240])
+
+
+def check_case(rng) -> bool:
+    blocked, existing = random_day(rng)
+    batch = DayIntervals.from_documents(blocked, existing)
+    incremental = DayIntervals()
+    docs = [block_interval(b) for b in blocked] + [appointment_interval(a) for a in existing]
+    rng.shuffle(docs)
+    for interval in docs:
+        incremental.add(interval)
+    for start, end in random_queries(rng, 50):
+        expected = naive_overlap(blocked, existing, start, end)
+        for intervals in (batch, incremental):
+            found = intervals.find_overlap(start, end)
+            if (found is not None) != expected:
+                return False
+            # O intervalo apontado precisa de fato cruzar a consulta
+            if found is not None and not (found.start < end and found.end > start):
+                return False
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Confere DayIntervals contra a checagem linear de sobreposição.")
+    parser.add_argument("--cases", type=int, default=2000, help="quantidade de dias aleatórios")
+    parser.add_argument("--seed", type=int, default=None, help="semente para reproduzir uma falha")
+    args = parser.parse_args()
+
+    seed = args.seed if args.seed is not None else random.randrange(1 << 32)
+    rng = random.Random(seed)
+    for case in range(args.cases):
+        if not check_case(rng):
+            print(f"Divergência no caso {case} (seed={seed})")
+            sys.exit(1)
+    print(f"{args.cases} casos conferidos (seed={seed})")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,76 @@
 from motor.motor_asyncio import AsyncIOMotorClient
 from fastapi import FastAPI
+import asyncio
+import logging
 import os
 
+from backend.utils.mongo_metrics import command_metrics, pool_metrics
+
+logger = logging.getLogger(__name__)
+
 MONGODB_URI = os.getenv("MONGODB_URI", "mongodb://localhost:27017")
 DB_NAME = os.getenv("DB_NAME", "agendamento")
 
+# Pool de conexões, por processo (cada worker do uvicorn tem o seu)
+MONGO_MAX_POOL_SIZE = int(os.getenv("MONGO_MAX_POOL_SIZE", "100"))
+MONGO_MIN_POOL_SIZE = int(os.getenv("MONGO_MIN_POOL_SIZE", "0"))
+MONGO_MAX_IDLE_TIME_MS = int(os.getenv("MONGO_MAX_IDLE_TIME_MS", "0")) or None
+MONGO_WAIT_QUEUE_TIMEOUT_MS = int(os.getenv("MONGO_WAIT_QUEUE_TIMEOUT_MS", "0")) or None
+# Timeouts de rede
+MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.getenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", "30000"))
+MONGO_CONNECT_TIMEOUT_MS = int(os.getenv("MONGO_CONNECT_TIMEOUT_MS", "20000"))
+MONGO_SOCKET_TIMEOUT_MS = int(os.getenv("MONGO_SOCKET_TIMEOUT_MS", "0")) or None
+# Ex.: "zstd,snappy,zlib" (zstd e snappy exigem os pacotes zstandard/python-snappy)
+MONGO_COMPRESSORS = os.getenv("MONGO_COMPRESSORS", "")
+MONGO_APP_NAME = os.getenv("MONGO_APP_NAME", "agendamento-backend")
+# Conexões abertas no startup (padrão: minPoolSize)
+MONGO_WARMUP_CONNECTIONS = int(os.getenv("MONGO_WARMUP_CONNECTIONS", str(MONGO_MIN_POOL_SIZE)))
+
+
+def client_options() -> dict:
+    """Opções do AsyncIOMotorClient; valores None ficam com o padrão do driver."""
+    options = {
+        "maxPoolSize": MONGO_MAX_POOL_SIZE,
+        "minPoolSize": MONGO_MIN_POOL_SIZE,
+        "maxIdleTimeMS": MONGO_MAX_IDLE_TIME_MS,
+        "waitQueueTimeoutMS": MONGO_WAIT_QUEUE_TIMEOUT_MS,
+        "serverSelectionTimeoutMS": MONGO_SERVER_SELECTION_TIMEOUT_MS,
+        "connectTimeoutMS": MONGO_CONNECT_TIMEOUT_MS,
+        "socketTimeoutMS": MONGO_SOCKET_TIMEOUT_MS,
+        "compressors": MONGO_COMPRESSORS or None,
+        "appname": MONGO_APP_NAME,
+    }
+    return {key: value for key, value in options.items() if value is not None}
+
+
+def create_client(uri: str = MONGODB_URI, **overrides) -> AsyncIOMotorClient:
+    """Cliente com as opções configuradas e os listeners de telemetria."""
+    return AsyncIOMotorClient(
+        uri, event_listeners=[pool_metrics, command_metrics], **{**client_options(), **overrides}
+    )
+
+
+async def warm_pool(client: AsyncIOMotorClient, connections: int = MONGO_WARMUP_CONNECTIONS):
+    """Abre ``connections`` conexões em paralelo (pings simultâneos) antes do primeiro request."""
+    await client.admin.command("ping")
+    if connections > 1:
+        await asyncio.gather(*(client.admin.command("ping") for _ in range(connections)))
+    logger.info(f"Pool do MongoDB aquecido com {connections} conexões")
+
+
 async def connect_to_mongo(app: FastAPI):
-    app.state.mongo_client = AsyncIOMotorClient(MONGODB_URI)
+    app.state.mongo_client = create_client()
     app.state.db = app.state.mongo_client[DB_NAME]
+    await warm_pool(app.state.mongo_client)
 
 async def close_mongo_connection(app: FastAPI):
     app.state.mongo_client.close()
+
+
+def pool_stats() -> dict:
+    """Configuração efetiva do pool com os contadores do pool e a latência dos comandos."""
+    return {
+        "config": client_options(),
+        "pool": pool_metrics.snapshot(),
+        "commands": command_metrics.snapshot(),
+    }
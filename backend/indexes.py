@@ -0,0 +1,306 @@
+"""
+Registro declarativo dos índices do MongoDB.
+
+Cada padrão de consulta de routes/ e services/ tem aqui o índice que o
+atende, além dos índices únicos dos ids públicos e dos índices TTL. O
+registro é aplicado no startup (create_index é idempotente) ou pela linha de
+comando; o modo --check roda explain() nas consultas canônicas e falha se
+alguma delas fizer COLLSCAN ou se faltar algum índice do registro.
+
+Execute com:
+    python -m backend.indexes           # cria os índices que faltam
+    python -m backend.indexes --check   # só verifica (código de saída 1 se falhar)
+"""
+
+import argparse
+import asyncio
+import logging
+import sys
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from pymongo import ASCENDING
+from pymongo.errors import OperationFailure
+
+from backend.db import create_client, DB_NAME
+
+logger = logging.getLogger(__name__)
+
+
+class RequiredIndexError(RuntimeError):
+    """Um índice do qual a correção depende (ex.: unicidade das reservas) não pôde ser criado."""
+
+    def __init__(self, required_errors: List[str], errors: List[str]):
+        super().__init__(f"Índices obrigatórios não criados: {'; '.join(required_errors)}")
+        # Todas as falhas da execução, obrigatórias ou não
+        self.errors = errors
+
+
+class IndexSpec(NamedTuple):
+    collection: str
+    keys: List[Tuple[str, int]]
+    options: dict = {}
+    # Sem ele a aplicação não é segura: a falha ao criar interrompe o startup
+    required: bool = False
+
+    @property
+    def name(self) -> str:
+        return "_".join(f"{field}_{direction}" for field, direction in self.keys)
+
+
+def _index(collection: str, *fields: str, required: bool = False, **options) -> IndexSpec:
+    return IndexSpec(collection, [(field, ASCENDING) for field in fields], options, required)
+
+
+INDEXES: List[IndexSpec] = [
+    # Tenants: resolução por host (slug do subdomínio ou domínio próprio)
+    _index("tenants", "tenant_id", unique=True),
+    _index("tenants", "slug", unique=True),
+    _index("tenants", "domain", unique=True, partialFilterExpression={"domain": {"$type": "string"}}),
+    # Usuários e sessões
+    _index("users", "user_id", unique=True),
+    _index("users", "email"),
+    _index("users", "tenant_id"),
+    _index("user_sessions", "session_token", unique=True),
+    _index("user_sessions", "user_id"),
+    # Só remove sessões com expires_at gravado como data (as antigas em texto são convertidas pela migração 3)
+    _index("user_sessions", "expires_at", expireAfterSeconds=0),
+    _index("revoked_tokens", "expires_at", expireAfterSeconds=0),
+    # Catálogo
+    _index("services", "service_id", unique=True),
+    _index("services", "tenant_id", "is_active"),
+    _index("employees", "employee_id", unique=True),
+    _index("employees", "tenant_id", "is_active"),
+    _index("working_hours", "tenant_id", "employee_id", unique=True),
+    # Agenda
+    _index("appointments", "appointment_id", unique=True),
+    _index("appointments", "tenant_id", "employee_id", "date", "status"),
+    # Sobreposição: start_min < fim AND end_min > início no dia do funcionário
+    _index("appointments", "tenant_id", "employee_id", "date", "start_min", "end_min"),
+    # Listagem paginada: chave (date, time, appointment_id), com ou sem filtro de status/funcionário
+    _index("appointments", "tenant_id", "date", "time", "appointment_id"),
+    _index("appointments", "tenant_id", "status", "date", "time", "appointment_id"),
+    _index("appointments", "tenant_id", "employee_id", "date", "time", "appointment_id"),
+    _index("appointments", "tenant_id", "series_id", "date"),
+    _index("appointments", "tenant_id", "service_id", "date"),
+    # Seleção do arquivamento (todas as datas anteriores ao horizonte, sem tenant)
+    _index("appointments", "date"),
+    _index("appointment_series", "series_id", unique=True),
+    _index("blocked_times", "blocked_id", unique=True),
+    _index("blocked_times", "tenant_id", "employee_id", "date", "start_min", "end_min"),
+    _index("availability", "tenant_id", "employee_id", "date", unique=True),
+    # A unicidade é a garantia contra agendamentos sobrepostos
+    _index("slot_reservations", "tenant_id", "employee_id", "date", "unit", unique=True, required=True),
+    _index("slot_reservations", "appointment_id"),
+    _index("slot_reservations", "hold_id"),
+    # Lista de espera
+    _index("waitlist", "entry_id", unique=True),
+    _index("waitlist", "tenant_id", "employee_id", "service_id", "status", "date_from", "date_to"),
+    _index("waitlist", "tenant_id", "status", "created_at"),
+    # Propagação de campos desnormalizados
+    _index("propagation_jobs", "job_id", unique=True),
+    _index("propagation_jobs", "status", "created_at"),
+    _index("propagation_jobs", "tenant_id", "entity", "entity_id", "status"),
+    # No máximo um job em execução por entidade (claim_next_job depende disso)
+    _index(
+        "propagation_jobs", "tenant_id", "entity", "entity_id",
+        unique=True, required=True, partialFilterExpression={"status": "running"}
+    ),
+    _index("propagation_jobs", "tenant_id", "created_at"),
+    # Migrações de dados aplicadas
+    _index("schema_migrations", "version", unique=True),
+]
+
+
+class CanonicalQuery(NamedTuple):
+    description: str
+    collection: str
+    filter: dict
+    sort: Optional[List[Tuple[str, int]]] = None
+
+
+_DAY = "2030-01-07"
+_ACTIVE = {"$in": ["pending", "confirmed"]}
+
+CANONICAL_QUERIES: List[CanonicalQuery] = [
+    CanonicalQuery("tenant por host", "tenants", {"$or": [{"domain": "salao.com.br"}, {"slug": "salao"}]}),
+    CanonicalQuery("tenant por id", "tenants", {"tenant_id": "t"}),
+    CanonicalQuery("sessão por token", "user_sessions", {"session_token": "tok"}),
+    CanonicalQuery("sessões do usuário", "user_sessions", {"user_id": "u"}),
+    CanonicalQuery("usuário por id", "users", {"user_id": "u"}),
+    CanonicalQuery("usuário por e-mail", "users", {"email": "a@b.com"}),
+    CanonicalQuery("usuários do tenant", "users", {"tenant_id": "t"}),
+    CanonicalQuery("serviço por id", "services", {"service_id": "s", "tenant_id": "t"}),
+    CanonicalQuery("serviços ativos", "services", {"tenant_id": "t", "is_active": True}),
+    CanonicalQuery("funcionário por id", "employees", {"employee_id": "e", "tenant_id": "t"}),
+    CanonicalQuery("funcionários ativos", "employees", {"tenant_id": "t", "is_active": True}),
+    CanonicalQuery("expedientes", "working_hours", {"tenant_id": "t", "employee_id": {"$in": [None, "e"]}}),
+    CanonicalQuery("agendamento por id", "appointments", {"appointment_id": "a"}),
+    CanonicalQuery(
+        "agendamentos ativos do dia", "appointments",
+        {"tenant_id": "t", "employee_id": "e", "date": {"$in": [_DAY]}, "status": _ACTIVE}
+    ),
+    CanonicalQuery(
+        "agendamentos do período", "appointments",
+        {"tenant_id": "t", "employee_id": {"$in": ["e"]}, "date": {"$gte": _DAY, "$lte": _DAY}, "status": _ACTIVE},
+        [("date", ASCENDING)]
+    ),
+    CanonicalQuery(
+        "listagem de agendamentos (página seguinte)", "appointments",
+        {"$and": [{"tenant_id": "t"}, {"$or": [
+            {"date": {"$gt": _DAY}}, {"date": _DAY, "time": {"$gt": "10:00"}},
+            {"date": _DAY, "time": "10:00", "appointment_id": {"$gt": "a"}}
+        ]}]},
+        [("date", ASCENDING), ("time", ASCENDING), ("appointment_id", ASCENDING)]
+    ),
+    CanonicalQuery("relatório de faturamento", "appointments", {"tenant_id": "t", "status": "completed"}),
+    CanonicalQuery(
+        "ocorrências da série", "appointments",
+        {"tenant_id": "t", "series_id": "ser", "date": {"$gte": _DAY}, "status": _ACTIVE}
+    ),
+    CanonicalQuery("agendamentos a arquivar", "appointments", {"date": {"$lt": _DAY}}, [("date", ASCENDING), ("_id", ASCENDING)]),
+    CanonicalQuery("série por id", "appointment_series", {"series_id": "ser"}),
+    CanonicalQuery(
+        "agendamentos que cruzam o horário", "appointments",
+        {"tenant_id": "t", "employee_id": "e", "date": {"$in": [_DAY]}, "start_min": {"$lt": 660}, "end_min": {"$gt": 600}, "status": _ACTIVE}
+    ),
+    CanonicalQuery("bloqueio por id", "blocked_times", {"blocked_id": "b", "tenant_id": "t"}),
+    CanonicalQuery(
+        "bloqueios que cruzam o horário", "blocked_times",
+        {"tenant_id": "t", "employee_id": "e", "date": {"$in": [_DAY]}, "start_min": {"$lt": 660}, "end_min": {"$gt": 600}}
+    ),
+    CanonicalQuery(
+        "bloqueios do período", "blocked_times",
+        {"tenant_id": "t", "employee_id": {"$in": ["e"]}, "date": {"$gte": _DAY, "$lte": _DAY}},
+        [("date", ASCENDING)]
+    ),
+    CanonicalQuery("bloqueios do tenant", "blocked_times", {"tenant_id": "t"}),
+    CanonicalQuery(
+        "disponibilidade materializada", "availability",
+        {"tenant_id": "t", "employee_id": {"$in": ["e"]}, "date": {"$gte": _DAY, "$lte": _DAY}}
+    ),
+    CanonicalQuery("reservas do agendamento", "slot_reservations", {"appointment_id": {"$in": ["a"]}}),
+    CanonicalQuery("reservas da tentativa", "slot_reservations", {"hold_id": "h"}),
+    CanonicalQuery(
+        "candidatos da lista de espera", "waitlist",
+        {
+            "tenant_id": "t", "employee_id": {"$in": ["e", None]}, "service_id": {"$in": ["s"]},
+            "date_from": {"$lte": _DAY}, "date_to": {"$gte": _DAY},
+            "$or": [{"status": "waiting"}, {"status": "offered", "offer.expires_at": {"$lt": "2030"}}]
+        },
+        [("created_at", ASCENDING)]
+    ),
+    CanonicalQuery("lista de espera do tenant", "waitlist", {"tenant_id": "t", "status": "waiting"}, [("created_at", ASCENDING)]),
+    CanonicalQuery("entrada da lista de espera", "waitlist", {"entry_id": "w", "tenant_id": "t"}),
+    CanonicalQuery(
+        "agendamentos a propagar (serviço)", "appointments",
+        {"tenant_id": "t", "service_id": "s", "date": {"$gte": _DAY}, "status": _ACTIVE, "$or": [{"service_name": {"$ne": "x"}}]},
+        [("_id", ASCENDING)]
+    ),
+    CanonicalQuery(
+        "agendamentos a propagar (funcionário)", "appointments",
+        {"tenant_id": "t", "employee_id": "e", "date": {"$gte": _DAY}, "status": _ACTIVE, "$or": [{"employee_name": {"$ne": "x"}}]},
+        [("_id", ASCENDING)]
+    ),
+    CanonicalQuery("próximo job de propagação", "propagation_jobs", {"$or": [{"status": "queued"}, {"status": "running", "heartbeat_at": {"$lt": "2030"}}]}, [("created_at", ASCENDING)]),
+    CanonicalQuery("jobs de propagação do tenant", "propagation_jobs", {"tenant_id": "t"}, [("created_at", -1)]),
+    CanonicalQuery("revogações vigentes", "revoked_tokens", {"expires_at": {"$gt": "2030"}}),
+]
+
+
+async def ensure_indexes(db, indexes: List[IndexSpec] = INDEXES) -> List[str]:
+    """
+    Cria os índices do registro (os que já existem não são alterados).
+
+    Um índice que não pode ser criado (dados duplicados num índice único ou
+    índice manual com as mesmas chaves e outras opções) é registrado no log e
+    não impede os demais; devolve a lista de erros. Se algum dos que falharam
+    for obrigatório (``required``), levanta RequiredIndexError depois de
+    tentar todos.
+    """
+    errors = []
+    required_errors = []
+    for spec in indexes:
+        try:
+            await db[spec.collection].create_index(spec.keys, **spec.options)
+        except OperationFailure as exc:
+            message = f"{spec.collection}.{spec.name}: {exc}"
+            logger.error(f"Falha ao criar índice {message}")
+            errors.append(message)
+            if spec.required:
+                required_errors.append(message)
+    if required_errors:
+        raise RequiredIndexError(required_errors, errors)
+    return errors
+
+
+def _plan_stages(plan: dict) -> List[str]:
+    stages = [plan.get("stage", "")]
+    for key in ("inputStage", "queryPlan"):
+        if isinstance(plan.get(key), dict):
+            stages += _plan_stages(plan[key])
+    for child in plan.get("inputStages", []):
+        stages += _plan_stages(child)
+    return stages
+
+
+async def missing_indexes(db, indexes: List[IndexSpec] = INDEXES) -> List[str]:
+    existing: Dict[str, set] = {}
+    missing = []
+    for spec in indexes:
+        if spec.collection not in existing:
+            info = await db[spec.collection].index_information()
+            existing[spec.collection] = {tuple(map(tuple, index["key"])) for index in info.values()}
+        if tuple(spec.keys) not in existing[spec.collection]:
+            missing.append(f"{spec.collection}.{spec.name}")
+    return missing
+
+
+async def check_queries(db, queries: List[CanonicalQuery] = CANONICAL_QUERIES) -> List[dict]:
+    """Roda explain() em cada consulta canônica e devolve o plano vencedor resumido."""
+    results = []
+    for query in queries:
+        cursor = db[query.collection].find(query.filter)
+        if query.sort:
+            cursor = cursor.sort(query.sort)
+        explain = await cursor.explain()
+        stages = _plan_stages(explain["queryPlanner"]["winningPlan"])
+        results.append({
+            "description": query.description,
+            "collection": query.collection,
+            "stages": stages,
+            "ok": "COLLSCAN" not in stages,
+        })
+    return results
+
+
+async def main(args) -> int:
+    client = create_client()
+    db = client[args.db or DB_NAME]
+    try:
+        if not args.check:
+            try:
+                errors = await ensure_indexes(db)
+            except RequiredIndexError as exc:
+                errors = exc.errors
+            for error in errors:
+                print(f"ERRO  {error}")
+            print(f"{len(INDEXES) - len(errors)}/{len(INDEXES)} índices garantidos")
+            return 1 if errors else 0
+        failed = False
+        for name in await missing_indexes(db):
+            print(f"FALTA {name}")
+            failed = True
+        for result in await check_queries(db):
+            status = "ok  " if result["ok"] else "SCAN"
+            print(f"{status}  {result['collection']:<18} {result['description']:<32} {' > '.join(result['stages'])}")
+            failed = failed or not result["ok"]
+        return 1 if failed else 0
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Cria ou verifica os índices do MongoDB")
+    parser.add_argument("--check", action="store_true", help="só verifica: explain() nas consultas canônicas")
+    parser.add_argument("--db", help=f"banco (padrão: {DB_NAME})")
+    sys.exit(asyncio.run(main(parser.parse_args())))
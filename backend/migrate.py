@@ -0,0 +1,42 @@
+"""
+Aplica as migrações de dados pendentes (ver backend/migrations).
+
+Uso: python -m backend.migrate [--list] [--to VERSÃO] [--batch-size 1000] [--db agendamento]
+"""
+
+import argparse
+import asyncio
+
+from backend.db import DB_NAME, create_client
+from backend.indexes import ensure_indexes
+from backend.migrations import MIGRATIONS, MIGRATION_BATCH_SIZE, MIGRATION_BATCH_PAUSE_MS, applied_versions, run_migrations
+
+
+async def main(args):
+    client = create_client()
+    db = client[args.db or DB_NAME]
+    try:
+        if args.list:
+            applied = await applied_versions(db)
+            for migration in MIGRATIONS:
+                mark = "x" if migration.version in applied else " "
+                print(f"[{mark}] {migration.version:04d} {migration.name}")
+            return
+        await ensure_indexes(db)
+        results = await run_migrations(db, args.to, args.batch_size, args.pause_ms)
+        for result in results:
+            print(f"{result['version']:04d} {result['name']}: {result['updated']} documentos alterados")
+        if not results:
+            print("Nenhuma migração pendente")
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Aplica as migrações de dados pendentes")
+    parser.add_argument("--list", action="store_true", help="só lista as migrações e se já foram aplicadas")
+    parser.add_argument("--to", type=int, help="aplica até esta versão (inclusive)")
+    parser.add_argument("--batch-size", type=int, default=MIGRATION_BATCH_SIZE)
+    parser.add_argument("--pause-ms", type=int, default=MIGRATION_BATCH_PAUSE_MS, help="pausa entre lotes")
+    parser.add_argument("--db", help=f"banco (padrão: {DB_NAME})")
+    asyncio.run(main(parser.parse_args()))
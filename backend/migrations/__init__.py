@@ -0,0 +1,68 @@
+"""
+Migrações de dados versionadas.
+
+Cada migração fica num módulo ``mNNNN_<nome>.py`` com um ``MIGRATION`` e entra
+em MIGRATIONS, em ordem de versão. As aplicadas ficam registradas em
+`schema_migrations`; uma migração interrompida continua marcada como
+"running" e é executada de novo na próxima vez (os backfills só selecionam
+documentos ainda não migrados).
+
+Uso: python -m backend.migrate [--list] [--to VERSÃO]
+"""
+
+from backend.migrations.base import Migration, MIGRATION_BATCH_SIZE, MIGRATION_BATCH_PAUSE_MS
+from backend.migrations import (
+    m0001_created_at, m0002_default_fields, m0003_session_expires_at, m0004_typed_schedule
+)
+from datetime import datetime, timezone
+from typing import List, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+MIGRATIONS: List[Migration] = [
+    m0001_created_at.MIGRATION,
+    m0002_default_fields.MIGRATION,
+    m0003_session_expires_at.MIGRATION,
+    m0004_typed_schedule.MIGRATION,
+]
+
+
+async def applied_versions(db) -> set:
+    docs = await db.schema_migrations.find({"status": "applied"}, {"_id": 0, "version": 1}).to_list(None)
+    return {doc["version"] for doc in docs}
+
+
+async def pending_migrations(db, target: Optional[int] = None) -> List[Migration]:
+    applied = await applied_versions(db)
+    return [
+        migration for migration in MIGRATIONS
+        if migration.version not in applied and (target is None or migration.version <= target)
+    ]
+
+
+async def run_migration(db, migration: Migration, batch_size: int = MIGRATION_BATCH_SIZE, pause_ms: int = MIGRATION_BATCH_PAUSE_MS) -> int:
+    now = datetime.now(timezone.utc).isoformat()
+    await db.schema_migrations.update_one(
+        {"version": migration.version},
+        {"$set": {"name": migration.name, "status": "running", "started_at": now}},
+        upsert=True
+    )
+    updated = await migration.apply(db, batch_size=batch_size, pause_ms=pause_ms)
+    await db.schema_migrations.update_one(
+        {"version": migration.version},
+        {"$set": {"status": "applied", "updated": updated, "applied_at": datetime.now(timezone.utc).isoformat()}}
+    )
+    return updated
+
+
+async def run_migrations(
+    db, target: Optional[int] = None, batch_size: int = MIGRATION_BATCH_SIZE, pause_ms: int = MIGRATION_BATCH_PAUSE_MS
+) -> List[dict]:
+    """Aplica as migrações pendentes até ``target`` (inclusive); para na primeira que falhar."""
+    results = []
+    for migration in await pending_migrations(db, target):
+        logger.info(f"Migração {migration.version}: {migration.name}")
+        updated = await run_migration(db, migration, batch_size, pause_ms)
+        results.append({"version": migration.version, "name": migration.name, "updated": updated})
+    return results
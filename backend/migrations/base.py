@@ -0,0 +1,59 @@
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, NamedTuple
+from bson import ObjectId
+from pymongo import ASCENDING, UpdateOne
+import asyncio
+import os
+
+MIGRATION_BATCH_SIZE = int(os.getenv("MIGRATION_BATCH_SIZE", "1000"))
+# Pausa entre lotes, em milissegundos
+MIGRATION_BATCH_PAUSE_MS = int(os.getenv("MIGRATION_BATCH_PAUSE_MS", "50"))
+
+
+class Migration(NamedTuple):
+    version: int
+    name: str
+    # apply(db, batch_size, pause_ms) -> documentos alterados
+    apply: Callable[..., Awaitable[int]]
+
+
+def created_at_from_id(doc: dict) -> str:
+    """created_at estável: o instante de criação gravado no ObjectId do documento."""
+    if isinstance(doc.get("_id"), ObjectId):
+        return doc["_id"].generation_time.isoformat()
+    return datetime.now(timezone.utc).isoformat()
+
+
+async def backfill(
+    collection, query: dict, values: Callable[[dict], dict],
+    batch_size: int = MIGRATION_BATCH_SIZE, pause_ms: int = MIGRATION_BATCH_PAUSE_MS
+) -> int:
+    """
+    Aplica ``$set: values(doc)`` aos documentos de ``query``, em lotes por _id.
+
+    ``query`` deve selecionar só os documentos ainda não migrados; assim uma
+    execução interrompida é retomada do ponto em que parou.
+    """
+    updated = 0
+    last_id = None
+    while True:
+        batch_query = query if last_id is None else {"$and": [query, {"_id": {"$gt": last_id}}]}
+        docs = await collection.find(batch_query).sort("_id", ASCENDING).limit(batch_size).to_list(batch_size)
+        if not docs:
+            break
+        last_id = docs[-1]["_id"]
+        result = await collection.bulk_write(
+            [UpdateOne({"_id": doc["_id"]}, {"$set": values(doc)}) for doc in docs], ordered=False
+        )
+        updated += result.modified_count
+        if len(docs) < batch_size:
+            break
+        await asyncio.sleep(pause_ms / 1000)
+    return updated
+
+
+def missing(*fields: str) -> dict:
+    """Filtro dos documentos sem algum dos ``fields``."""
+    if len(fields) == 1:
+        return {fields[0]: {"$exists": False}}
+    return {"$or": [{field: {"$exists": False}} for field in fields]}
@@ -0,0 +1,17 @@
+"""Preenche created_at que faltava em documentos antigos, a partir do ObjectId."""
+
+from backend.migrations.base import Migration, backfill, created_at_from_id, missing
+
+COLLECTIONS = ["employees", "services", "blocked_times", "appointments"]
+
+
+async def apply(db, **options) -> int:
+    updated = 0
+    for collection in COLLECTIONS:
+        updated += await backfill(
+            db[collection], missing("created_at"), lambda doc: {"created_at": created_at_from_id(doc)}, **options
+        )
+    return updated
+
+
+MIGRATION = Migration(1, "created_at em funcionários, serviços, bloqueios e agendamentos", apply)
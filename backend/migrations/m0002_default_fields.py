@@ -0,0 +1,29 @@
+"""Grava os campos com valor padrão que as listagens completavam a cada leitura."""
+
+from backend.migrations.base import Migration, backfill, missing
+
+APPOINTMENT_DEFAULTS = {
+    "status": "pending",
+    "client_name": "",
+    "client_email": "",
+    "service_id": "",
+    "employee_id": "",
+}
+
+
+async def apply(db, **options) -> int:
+    updated = await backfill(db.employees, missing("service_ids"), lambda doc: {"service_ids": []}, **options)
+    updated += await backfill(
+        db.blocked_times, missing("is_whole_day"),
+        lambda doc: {"is_whole_day": doc.get("start_time") is None and doc.get("end_time") is None},
+        **options
+    )
+    updated += await backfill(
+        db.appointments, missing(*APPOINTMENT_DEFAULTS),
+        lambda doc: {field: value for field, value in APPOINTMENT_DEFAULTS.items() if field not in doc},
+        **options
+    )
+    return updated
+
+
+MIGRATION = Migration(2, "service_ids, is_whole_day e campos padrão de agendamentos", apply)
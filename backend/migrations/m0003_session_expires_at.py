@@ -0,0 +1,18 @@
+"""
+Converte o expires_at das sessões antigas, gravado como texto, para data.
+
+O índice TTL de user_sessions só remove documentos com expires_at do tipo data.
+"""
+
+from backend.migrations.base import Migration, backfill
+from backend.utils.auth import parse_expires_at
+
+
+async def apply(db, **options) -> int:
+    return await backfill(
+        db.user_sessions, {"expires_at": {"$type": "string"}},
+        lambda doc: {"expires_at": parse_expires_at(doc["expires_at"])}, **options
+    )
+
+
+MIGRATION = Migration(3, "expires_at das sessões como data", apply)
@@ -0,0 +1,28 @@
+"""
+Grava day (data nativa) e start_min/end_min em agendamentos e bloqueios antigos.
+
+Os novos documentos já saem com esses campos; depois desta migração toda
+consulta de sobreposição pode usar só o predicado de intervalo.
+"""
+
+from backend.migrations.base import Migration, backfill
+from backend.utils.scheduling import appointment_schedule_fields, block_schedule_fields
+
+
+async def apply(db, **options) -> int:
+    updated = await backfill(
+        db.appointments, {"start_min": None, "date": {"$type": "string"}, "time": {"$type": "string"}},
+        lambda doc: appointment_schedule_fields(doc["date"], doc["time"], doc.get("service_duration")),
+        **options
+    )
+    updated += await backfill(
+        db.blocked_times, {"start_min": None, "date": {"$type": "string"}},
+        lambda doc: block_schedule_fields(
+            doc["date"], None if doc.get("is_whole_day") else doc.get("start_time"), doc.get("end_time")
+        ),
+        **options
+    )
+    return updated
+
+
+MIGRATION = Migration(4, "day e start_min/end_min em agendamentos e bloqueios", apply)
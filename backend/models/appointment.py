@@ -1,6 +1,15 @@
-from pydantic import BaseModel, ConfigDict
-from typing import Optional
-from datetime import datetime
+from pydantic import BaseModel, ConfigDict, Field, field_validator, model_validator
+from typing import List, Optional
+from datetime import date as date_type, datetime
+from backend.utils.scheduling import schedule_strings
+
+# Limite de ocorrências geradas por uma série recorrente
+MAX_SERIES_OCCURRENCES = 52
+
+# Limite de itens por alteração de status em lote
+MAX_BULK_STATUS_ITEMS = 200
+
+RECURRENCE_FREQUENCIES = {"weekly": 1, "biweekly": 2}  # semanas entre ocorrências
 
 class AppointmentBase(BaseModel):
     service_id: str
@@ -9,11 +18,23 @@ class AppointmentBase(BaseModel):
     time: str  # HH:MM
     notes: Optional[str] = None
 
+def check_time(value: str) -> str:
+    """Valida um horário de início 'HH:MM' entre 00:00 e 23:59."""
+    hour, _, minute = value.partition(":")
+    if not (len(hour) == len(minute) == 2 and hour.isdigit() and minute.isdigit() and int(hour) < 24 and int(minute) < 60):
+        raise ValueError("Horário inválido, use HH:MM entre 00:00 e 23:59")
+    return value
+
 class AppointmentCreate(AppointmentBase):
     client_name: str
     client_email: str
     client_phone: Optional[str] = None
 
+    @field_validator("time")
+    @classmethod
+    def validate_time(cls, value: str) -> str:
+        return check_time(value)
+
 class Appointment(AppointmentBase):
     model_config = ConfigDict(extra="ignore")
     appointment_id: str
@@ -27,3 +48,90 @@ class Appointment(AppointmentBase):
     service_name: Optional[str] = None
     service_price: Optional[float] = None
     employee_name: Optional[str] = None
+    series_id: Optional[str] = None
+    start_min: Optional[int] = None  # minutos desde 00:00
+    end_min: Optional[int] = None  # exclusivo
+
+    @model_validator(mode="before")
+    @classmethod
+    def fill_schedule_strings(cls, values):
+        # Documentos com só day/start_min também são aceitos
+        return schedule_strings(values)
+
+class RecurrenceRule(BaseModel):
+    frequency: str = "weekly"  # 'weekly', 'biweekly'
+    count: Optional[int] = None  # total de ocorrências, incluindo a primeira
+    until: Optional[str] = None  # YYYY-MM-DD, inclusive
+
+    @field_validator("frequency")
+    @classmethod
+    def validate_frequency(cls, value: str) -> str:
+        if value not in RECURRENCE_FREQUENCIES:
+            raise ValueError(f"Frequência inválida, use {' ou '.join(RECURRENCE_FREQUENCIES)}")
+        return value
+
+    @field_validator("count")
+    @classmethod
+    def validate_count(cls, value):
+        if value is not None and not 1 <= value <= MAX_SERIES_OCCURRENCES:
+            raise ValueError(f"count deve estar entre 1 e {MAX_SERIES_OCCURRENCES}")
+        return value
+
+    @field_validator("until")
+    @classmethod
+    def validate_until(cls, value):
+        if value is not None:
+            try:
+                date_type.fromisoformat(value)
+            except ValueError:
+                raise ValueError("Data inválida, use YYYY-MM-DD")
+        return value
+
+    @model_validator(mode="after")
+    def validate_window(self):
+        if self.count is None and self.until is None:
+            raise ValueError("Informe count ou until")
+        return self
+
+class AppointmentSeriesCreate(AppointmentCreate):
+    recurrence: RecurrenceRule
+
+class AppointmentSeriesUpdate(BaseModel):
+    time: Optional[str] = None  # HH:MM
+    notes: Optional[str] = None
+
+    @field_validator("time")
+    @classmethod
+    def validate_time(cls, value):
+        return check_time(value) if value is not None else value
+
+class SeriesConflict(BaseModel):
+    date: str
+    time: str
+    detail: str
+
+class AppointmentSeriesResult(BaseModel):
+    series_id: Optional[str] = None
+    created: List[Appointment]
+    conflicts: List[SeriesConflict]
+
+class AppointmentStatusChange(BaseModel):
+    appointment_id: str
+    status: str  # 'pending', 'confirmed', 'completed', 'cancelled'
+
+class BulkStatusUpdate(BaseModel):
+    items: List[AppointmentStatusChange] = Field(min_length=1, max_length=MAX_BULK_STATUS_ITEMS)
+
+class BulkCancel(BaseModel):
+    appointment_ids: List[str] = Field(min_length=1, max_length=MAX_BULK_STATUS_ITEMS)
+
+class BulkStatusItemResult(BaseModel):
+    appointment_id: str
+    ok: bool
+    status: Optional[str] = None  # status gravado quando ok
+    detail: Optional[str] = None  # motivo da recusa
+
+class BulkStatusResult(BaseModel):
+    updated: int
+    failed: int
+    results: List[BulkStatusItemResult]
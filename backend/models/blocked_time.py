@@ -1,6 +1,7 @@
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, model_validator
 from typing import Optional
 from datetime import datetime
+from backend.utils.scheduling import schedule_strings
 
 class BlockedTimeBase(BaseModel):
     employee_id: str
@@ -18,3 +19,11 @@ class BlockedTime(BlockedTimeBase):
     tenant_id: str
     is_whole_day: bool
     created_at: datetime
+    start_min: Optional[int] = None  # minutos desde 00:00
+    end_min: Optional[int] = None  # exclusivo
+
+    @model_validator(mode="before")
+    @classmethod
+    def fill_schedule_strings(cls, values):
+        # Documentos com só day também são aceitos; start_time/end_time nulos indicam o dia inteiro
+        return schedule_strings(values, time_field=None)
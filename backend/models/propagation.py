@@ -0,0 +1,19 @@
+from pydantic import BaseModel, ConfigDict
+from typing import Dict, Optional, Any
+
+PROPAGATION_STATUSES = ["queued", "running", "done", "failed"]
+
+class PropagationJob(BaseModel):
+    model_config = ConfigDict(extra="ignore")
+    job_id: str
+    tenant_id: str
+    entity: str  # 'service' ou 'employee'
+    entity_id: str
+    fields: Dict[str, Any]
+    status: str  # 'queued', 'running', 'done', 'failed'
+    total: int = 0  # agendamentos desatualizados quando o job começou
+    updated: int = 0
+    created_at: str
+    started_at: Optional[str] = None
+    finished_at: Optional[str] = None
+    error: Optional[str] = None
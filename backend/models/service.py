@@ -1,6 +1,7 @@
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, field_validator
 from typing import Optional
 from datetime import datetime
+from backend.utils.scheduling import RESERVATION_UNIT
 
 class ServiceBase(BaseModel):
     name: str
@@ -10,7 +11,13 @@ class ServiceBase(BaseModel):
     is_active: bool = True
 
 class ServiceCreate(ServiceBase):
-    pass
+    @field_validator("duration")
+    @classmethod
+    def validate_duration(cls, value: int) -> int:
+        # A agenda reserva em blocos de RESERVATION_UNIT minutos
+        if value <= 0 or value % RESERVATION_UNIT:
+            raise ValueError(f"A duração deve ser múltiplo de {RESERVATION_UNIT} minutos")
+        return value
 
 class Service(ServiceBase):
     model_config = ConfigDict(extra="ignore")
@@ -0,0 +1,63 @@
+from pydantic import BaseModel, ConfigDict, field_validator, model_validator
+from typing import Optional
+from datetime import date as date_type, datetime
+
+WAITLIST_STATUSES = ["waiting", "offered", "booked", "cancelled"]
+
+class WaitlistOffer(BaseModel):
+    employee_id: str
+    date: str  # YYYY-MM-DD
+    time: str  # HH:MM
+    expires_at: datetime
+
+class WaitlistEntryBase(BaseModel):
+    service_id: str
+    employee_id: Optional[str] = None  # None = qualquer profissional que realize o serviço
+    date_from: str  # YYYY-MM-DD
+    date_to: str  # YYYY-MM-DD
+    earliest_time: Optional[str] = None  # HH:MM - início mais cedo aceito
+    latest_time: Optional[str] = None  # HH:MM - início mais tarde aceito
+    client_name: str
+    client_email: str
+    client_phone: Optional[str] = None
+
+    @field_validator("date_from", "date_to")
+    @classmethod
+    def validate_date(cls, value: str) -> str:
+        try:
+            date_type.fromisoformat(value)
+        except ValueError:
+            raise ValueError("Data inválida, use YYYY-MM-DD")
+        return value
+
+    @field_validator("earliest_time", "latest_time")
+    @classmethod
+    def validate_time(cls, value):
+        if value is None:
+            return value
+        try:
+            hour, minute = value.split(":")
+            if not (0 <= int(hour) < 24 and 0 <= int(minute) < 60):
+                raise ValueError
+        except ValueError:
+            raise ValueError("Horário inválido, use HH:MM")
+        return value
+
+    @model_validator(mode="after")
+    def validate_window(self):
+        if self.date_to < self.date_from:
+            raise ValueError("date_to deve ser igual ou posterior a date_from")
+        return self
+
+class WaitlistEntryCreate(WaitlistEntryBase):
+    pass
+
+class WaitlistEntry(WaitlistEntryBase):
+    model_config = ConfigDict(extra="ignore")
+    entry_id: str
+    tenant_id: str
+    client_user_id: Optional[str] = None
+    status: str  # 'waiting', 'offered', 'booked', 'cancelled'
+    offer: Optional[WaitlistOffer] = None
+    appointment_id: Optional[str] = None
+    created_at: datetime
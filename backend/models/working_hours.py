@@ -0,0 +1,61 @@
+from pydantic import BaseModel, ConfigDict, field_validator, model_validator
+from typing import Dict, List, Optional
+from datetime import datetime
+from backend.utils.scheduling import RESERVATION_UNIT, time_to_minutes
+
+WEEKDAYS = ["mon", "tue", "wed", "thu", "fri", "sat", "sun"]
+
+class WorkingInterval(BaseModel):
+    start: str  # HH:MM
+    end: str  # HH:MM
+
+    @field_validator("start", "end")
+    @classmethod
+    def validate_time(cls, value: str) -> str:
+        try:
+            hour, minute = (int(part) for part in value.split(":"))
+            if not (0 <= hour < 24 and 0 <= minute < 60) and (hour, minute) != (24, 0):
+                raise ValueError
+        except ValueError:
+            raise ValueError("Horário inválido, use HH:MM")
+        # Os inícios de slot partem dessas bordas e precisam cair na grade de reservas
+        if minute % RESERVATION_UNIT:
+            raise ValueError(f"Os minutos devem ser múltiplos de {RESERVATION_UNIT}")
+        return value
+
+    @model_validator(mode="after")
+    def validate_order(self):
+        if time_to_minutes(self.end) <= time_to_minutes(self.start):
+            raise ValueError("O fim do intervalo deve ser depois do início")
+        return self
+
+class WorkingHoursBase(BaseModel):
+    weekly: Dict[str, List[WorkingInterval]] = {}  # 'mon'..'sun' -> janelas; [] = fechado
+    exceptions: Dict[str, List[WorkingInterval]] = {}  # 'YYYY-MM-DD' -> janelas; [] = fechado
+    slot_step: Optional[int] = None  # minutos entre inícios de slot
+
+    @field_validator("weekly")
+    @classmethod
+    def validate_weekdays(cls, value):
+        invalid = [day for day in value if day not in WEEKDAYS]
+        if invalid:
+            raise ValueError(f"Dias inválidos: {', '.join(invalid)}")
+        return value
+
+    @field_validator("slot_step")
+    @classmethod
+    def validate_slot_step(cls, value):
+        if value is not None and not 5 <= value <= 240:
+            raise ValueError("slot_step deve estar entre 5 e 240 minutos")
+        if value is not None and value % RESERVATION_UNIT:
+            raise ValueError(f"slot_step deve ser múltiplo de {RESERVATION_UNIT} minutos")
+        return value
+
+class WorkingHoursUpdate(WorkingHoursBase):
+    pass
+
+class WorkingHours(WorkingHoursBase):
+    model_config = ConfigDict(extra="ignore")
+    tenant_id: str
+    employee_id: Optional[str] = None  # None = expediente padrão do tenant
+    updated_at: datetime
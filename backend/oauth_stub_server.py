@@ -0,0 +1,57 @@
+"""
+Servidor local que imita o endpoint de troca de sessão do provedor OAuth.
+
+Serve para testar login, timeouts e o circuit breaker sem depender do
+provedor real. Qualquer session_id que comece com "invalid" recebe 401; os
+demais recebem dados de sessão determinísticos derivados do id.
+
+Execute com:
+    python -m backend.oauth_stub_server --port 8099 [--latency-ms 50] [--failure-rate 0.2]
+e aponte o backend para ele:
+    AUTH_PROVIDER_URL=http://localhost:8099/auth/v1/env/oauth/session-data
+"""
+
+import argparse
+import asyncio
+import hashlib
+import random
+
+from fastapi import FastAPI, Header, HTTPException
+import uvicorn
+
+SESSION_DATA_PATH = "/auth/v1/env/oauth/session-data"
+
+
+def create_stub_app(latency_ms: float = 0, failure_rate: float = 0.0, seed=None) -> FastAPI:
+    app = FastAPI()
+    rng = random.Random(seed)
+
+    @app.get(SESSION_DATA_PATH)
+    async def session_data(x_session_id: str = Header(...)):
+        if latency_ms:
+            await asyncio.sleep(latency_ms / 1000)
+        if failure_rate and rng.random() < failure_rate:
+            raise HTTPException(status_code=503, detail="stub: falha simulada")
+        if x_session_id.startswith("invalid"):
+            raise HTTPException(status_code=401, detail="stub: sessão inválida")
+        digest = hashlib.sha256(x_session_id.encode()).hexdigest()
+        return {
+            "id": digest[:16],
+            "email": f"user_{digest[:8]}@example.com",
+            "name": f"Usuário {digest[:4]}",
+            "picture": "",
+            "session_token": f"stub_{digest[:32]}"
+        }
+
+    return app
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Stub do provedor OAuth para testes locais")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--latency-ms", type=float, default=0, help="atraso artificial por requisição")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="fração de respostas 503")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+    uvicorn.run(create_stub_app(args.latency_ms, args.failure_rate, args.seed), host=args.host, port=args.port)
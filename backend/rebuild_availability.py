@@ -0,0 +1,33 @@
+"""
+Regera os documentos da coleção `availability` (disponibilidade materializada)
+de um tenant para um intervalo de datas.
+
+Uso: python -m backend.rebuild_availability --tenant tenant_demo --from 2026-01-01 --to 2026-03-31 [--employee emp_x]
+"""
+
+import argparse
+import asyncio
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from backend.db import MONGODB_URI, DB_NAME
+from backend.indexes import ensure_indexes
+from backend.services.availability_service import rebuild_availability
+
+
+async def main(args):
+    client = AsyncIOMotorClient(MONGODB_URI)
+    db = client[DB_NAME]
+    await ensure_indexes(db)
+    employee_ids = args.employee or None
+    total = await rebuild_availability(db, args.tenant, args.date_from, args.date_to, employee_ids)
+    print(f"{total} documentos de disponibilidade regerados para {args.tenant}")
+    client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Regera a disponibilidade materializada")
+    parser.add_argument("--tenant", required=True, help="tenant_id")
+    parser.add_argument("--from", dest="date_from", required=True, help="data inicial (YYYY-MM-DD)")
+    parser.add_argument("--to", dest="date_to", required=True, help="data final (YYYY-MM-DD)")
+    parser.add_argument("--employee", action="append", help="employee_id (pode repetir; padrão: todos)")
+    asyncio.run(main(parser.parse_args()))
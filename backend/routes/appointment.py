@@ -1,19 +1,49 @@
 
-from fastapi import APIRouter, Request, HTTPException, Depends
-from backend.services.appointment_service import create_appointment, send_reminder_emails
-from backend.utils.auth import require_admin, get_tenant_from_host, get_current_user
-from backend.models.appointment import AppointmentBase
+from fastapi import APIRouter, Request, Response, HTTPException, Depends
+from backend.services.appointment_service import (
+    create_appointment, send_reminder_emails, update_appointment_status, reschedule_appointment, delete_appointment,
+    create_appointment_series, update_appointment_series, cancel_appointment_series, SeriesConflictError,
+    list_appointments_page, export_appointments_cursor, send_daily_reminders, bulk_update_appointment_status,
+    VALID_STATUSES, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, EXPORT_COLUMNS
+)
+from backend.services.reservation_service import SlotUnavailableError, MisalignedSlotError
+from backend.services.availability_service import (
+    get_available_slots, get_available_calendar, get_any_employee_slots, find_next_available,
+    MAX_CALENDAR_DAYS, MAX_NEXT_AVAILABLE, MAX_HORIZON_DAYS
+)
+from backend.utils.auth import require_admin, get_current_user
+from backend.utils.tenant import get_request_tenant
+from backend.utils.pagination import InvalidCursorError, NEXT_CURSOR_HEADER
+from backend.utils.export import export_response
+from backend.utils.loader import get_loaders
+from backend.utils.email import RESEND_API_KEY
+from backend.models.appointment import (
+    Appointment, AppointmentBase, AppointmentCreate, AppointmentSeriesCreate, AppointmentSeriesUpdate,
+    AppointmentSeriesResult, BulkStatusUpdate, BulkCancel, BulkStatusResult, check_time
+)
 from typing import Optional
+from datetime import date as date_type, datetime, timezone, timedelta
+import asyncio
 
 
 router = APIRouter(prefix="/appointments")
 
 
-# GET /appointments - lista agendamentos
-@router.get("/")
-async def list_appointments_route(request: Request, status: Optional[str] = None, date_from: Optional[str] = None, date_to: Optional[str] = None, employee_id: Optional[str] = None):
-    db = request.app.state.db
-    user = await require_admin(request, db)
+def _check_date(value: str):
+    try:
+        date_type.fromisoformat(value)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Data inválida, use YYYY-MM-DD")
+
+
+def _list_query(user, status, date_from, date_to, employee_id) -> dict:
+    """Filtro comum à listagem e à exportação."""
+    try:
+        for value in (date_from, date_to):
+            if value:
+                date_type.fromisoformat(value)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Datas inválidas, use YYYY-MM-DD")
     query = {"tenant_id": user.tenant_id}
     if user and getattr(user, "role", None) != "admin":
         query["client_user_id"] = user.user_id
@@ -28,83 +58,260 @@ async def list_appointments_route(request: Request, status: Optional[str] = None
             query["date"] = {"$lte": date_to}
     if employee_id:
         query["employee_id"] = employee_id
-    appointments = await db.appointments.find(query, {"_id": 0}).sort("date", 1).to_list(500)
+    return query
+
+
+# GET /appointments - lista agendamentos, paginada: o cursor da próxima página vem no cabeçalho X-Next-Cursor
+@router.get("/")
+async def list_appointments_route(
+    request: Request, response: Response, status: Optional[str] = None, date_from: Optional[str] = None,
+    date_to: Optional[str] = None, employee_id: Optional[str] = None, limit: int = DEFAULT_PAGE_SIZE,
+    cursor: Optional[str] = None
+):
+    if not 1 <= limit <= MAX_PAGE_SIZE:
+        raise HTTPException(status_code=400, detail=f"limit deve estar entre 1 e {MAX_PAGE_SIZE}")
+    db = request.app.state.db
+    user = await require_admin(request, db)
+    query = _list_query(user, status, date_from, date_to, employee_id)
+    try:
+        appointments, next_cursor = await list_appointments_page(db, query, limit, cursor)
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
     return appointments
 
 
+# GET /appointments/export - exporta em streaming (format=ndjson|csv, gzip opcional), com os filtros da listagem
+@router.get("/export")
+async def export_appointments_route(
+    request: Request, format: str = "csv", gzip: bool = False, status: Optional[str] = None,
+    date_from: Optional[str] = None, date_to: Optional[str] = None, employee_id: Optional[str] = None
+):
+    db = request.app.state.db
+    user = await require_admin(request, db)
+    query = _list_query(user, status, date_from, date_to, employee_id)
+    cursor = await export_appointments_cursor(db, query)
+    try:
+        return export_response(cursor, format, "agendamentos", EXPORT_COLUMNS, gzip)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
 @router.post("/{appointment_id}/send-reminder")
 async def send_reminder_route(request: Request, appointment_id: str, send_to_client: bool = True, send_to_employee: bool = True):
     db = request.app.state.db
     user = await require_admin(request, db)
-    tenant_name = ""  # Obtenha o nome do tenant conforme sua lógica
-    result = await send_reminder_emails(db, appointment_id, tenant_name, send_to_client, send_to_employee)
-    if not result:
+    result = await send_reminder_emails(db, user.tenant_id, appointment_id, send_to_client, send_to_employee)
+    if result is None:
         raise HTTPException(status_code=404, detail="Agendamento não encontrado")
     return {"status": "ok", "result": result}
 
+# POST /appointments/send-daily-reminders - lembretes de todos os agendamentos do dia (padrão: amanhã)
+@router.post("/send-daily-reminders")
+async def send_daily_reminders_route(request: Request, date: Optional[str] = None):
+    db = request.app.state.db
+    user = await require_admin(request, db)
+    if not RESEND_API_KEY:
+        raise HTTPException(status_code=400, detail="Serviço de email não configurado")
+    if not date:
+        date = (datetime.now(timezone.utc) + timedelta(days=1)).strftime("%Y-%m-%d")
+    return await send_daily_reminders(db, user.tenant_id, date)
+
 # GET /appointments/available-slots
 @router.get("/available-slots")
 async def get_available_slots_route(request: Request, employee_id: str, date: str, service_id: str):
     db = request.app.state.db
-    tenant_slug = get_tenant_from_host(request)
-    tenant = await db.tenants.find_one({"slug": tenant_slug}, {"_id": 0})
-    if not tenant:
-        raise HTTPException(status_code=404, detail="Tenant não encontrado")
-    service = await db.services.find_one({"service_id": service_id}, {"_id": 0})
+    _check_date(date)
+    tenant = await get_request_tenant(request)
+    service = await get_loaders(db).services.load(service_id, tenant["tenant_id"])
     if not service:
         raise HTTPException(status_code=404, detail="Serviço não encontrado")
     duration = service.get("duration", 30)
-    blocked = await db.blocked_times.find({"tenant_id": tenant["tenant_id"], "employee_id": employee_id, "date": date}, {"_id": 0}).to_list(100)
-    for block in blocked:
-        if block.get("is_whole_day"):
-            return {"slots": [], "message": "Este dia está bloqueado"}
-    existing = await db.appointments.find({"tenant_id": tenant["tenant_id"], "employee_id": employee_id, "date": date, "status": {"$in": ["pending", "confirmed"]}}, {"_id": 0}).to_list(100)
-    all_slots = []
-    for hour in range(8, 20):
-        for minute in [0, 30]:
-            slot_time = f"{hour:02d}:{minute:02d}"
-            all_slots.append(slot_time)
-    available_slots = []
-    for slot in all_slots:
-        slot_hour, slot_min = map(int, slot.split(":"))
-        slot_minutes = slot_hour * 60 + slot_min
-        slot_end_minutes = slot_minutes + duration
-        is_available = True
-        for block in blocked:
-            if block.get("start_time") and block.get("end_time"):
-                block_start = int(block["start_time"].split(":")[0]) * 60 + int(block["start_time"].split(":")[1])
-                block_end = int(block["end_time"].split(":")[0]) * 60 + int(block["end_time"].split(":")[1])
-                if slot_minutes < block_end and slot_end_minutes > block_start:
-                    is_available = False
-                    break
-        if is_available:
-            for appt in existing:
-                appt_hour, appt_min = map(int, appt["time"].split(":"))
-                appt_minutes = appt_hour * 60 + appt_min
-                appt_duration = appt.get("service_duration", 30)
-                appt_end = appt_minutes + appt_duration
-                if slot_minutes < appt_end and slot_end_minutes > appt_minutes:
-                    is_available = False
-                    break
-        if is_available:
-            available_slots.append(slot)
-    return {"slots": available_slots}
+    return await get_available_slots(db, tenant["tenant_id"], employee_id, date, duration)
+
+# GET /appointments/available-slots/any - qualquer profissional que realize o serviço
+@router.get("/available-slots/any")
+async def get_any_employee_slots_route(request: Request, service_id: str, date: str):
+    db = request.app.state.db
+    _check_date(date)
+    tenant = await get_request_tenant(request)
+    service = await get_loaders(db).services.load(service_id, tenant["tenant_id"])
+    if not service:
+        raise HTTPException(status_code=404, detail="Serviço não encontrado")
+    duration = service.get("duration", 30)
+    return await get_any_employee_slots(db, tenant["tenant_id"], service_id, date, duration)
+
+# GET /appointments/available-calendar - slots de vários dias em uma chamada
+@router.get("/available-calendar")
+async def get_available_calendar_route(request: Request, employee_id: str, service_id: str, date_from: str, date_to: str):
+    db = request.app.state.db
+    try:
+        days = (date_type.fromisoformat(date_to) - date_type.fromisoformat(date_from)).days
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Datas inválidas, use YYYY-MM-DD")
+    if days < 0 or days >= MAX_CALENDAR_DAYS:
+        raise HTTPException(status_code=400, detail=f"Intervalo deve ter entre 1 e {MAX_CALENDAR_DAYS} dias")
+    tenant = await get_request_tenant(request)
+    service = await get_loaders(db).services.load(service_id, tenant["tenant_id"])
+    if not service:
+        raise HTTPException(status_code=404, detail="Serviço não encontrado")
+    duration = service.get("duration", 30)
+    return await get_available_calendar(db, tenant["tenant_id"], employee_id, date_from, date_to, duration)
+
+# GET /appointments/next-available - primeiros horários livres a partir de agora
+@router.get("/next-available")
+async def get_next_available_route(request: Request, service_id: str, employee_id: Optional[str] = None, count: int = 5, horizon_days: int = 30):
+    db = request.app.state.db
+    if not 1 <= count <= MAX_NEXT_AVAILABLE:
+        raise HTTPException(status_code=400, detail=f"count deve estar entre 1 e {MAX_NEXT_AVAILABLE}")
+    if not 1 <= horizon_days <= MAX_HORIZON_DAYS:
+        raise HTTPException(status_code=400, detail=f"horizon_days deve estar entre 1 e {MAX_HORIZON_DAYS}")
+    tenant = await get_request_tenant(request)
+    service = await get_loaders(db).services.load(service_id, tenant["tenant_id"])
+    if not service:
+        raise HTTPException(status_code=404, detail="Serviço não encontrado")
+    duration = service.get("duration", 30)
+    return await find_next_available(db, tenant["tenant_id"], service_id, duration, employee_id, count, horizon_days)
+
+async def _booking_payload(request: Request, db, data: AppointmentCreate) -> dict:
+    """Resolve tenant, serviço e funcionário do pedido e monta o documento base do agendamento."""
+    tenant = await get_request_tenant(request)
+    loaders = get_loaders(db)
+    service, employee = await asyncio.gather(
+        loaders.services.load(data.service_id, tenant["tenant_id"]),
+        loaders.employees.load(data.employee_id, tenant["tenant_id"])
+    )
+    if not service:
+        raise HTTPException(status_code=404, detail="Serviço não encontrado")
+    if not employee:
+        raise HTTPException(status_code=404, detail="Funcionário não encontrado")
+    user = await get_current_user(request, db)
+    return {
+        "tenant_id": tenant["tenant_id"],
+        "service_id": data.service_id,
+        "service_name": service["name"],
+        "service_price": service["price"],
+        "service_duration": service["duration"],
+        "employee_id": data.employee_id,
+        "employee_name": employee["name"],
+        "date": data.date,
+        "time": data.time,
+        "client_user_id": user.user_id if user else None,
+        "client_name": data.client_name,
+        "client_email": data.client_email,
+        "client_phone": data.client_phone,
+        "notes": data.notes
+    }
+
+# POST /appointments - cria agendamento (reserva atômica do horário)
+@router.post("/", response_model=Appointment)
+async def create_appointment_route(request: Request, data: AppointmentCreate):
+    db = request.app.state.db
+    payload = await _booking_payload(request, db, data)
+    try:
+        appointment = await create_appointment(db, payload)
+    except SlotUnavailableError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except MisalignedSlotError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Data ou horário inválido")
+    return Appointment(**{k: v for k, v in appointment.items() if k != "_id"})
+
+# POST /appointments/series - cria uma série recorrente (semanal/quinzenal)
+@router.post("/series", response_model=AppointmentSeriesResult)
+async def create_appointment_series_route(request: Request, data: AppointmentSeriesCreate):
+    db = request.app.state.db
+    payload = await _booking_payload(request, db, data)
+    try:
+        result = await create_appointment_series(db, payload, data.recurrence)
+    except MisalignedSlotError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Data ou horário inválido")
+    if not result["created"]:
+        raise HTTPException(
+            status_code=409,
+            detail={"message": "Nenhuma ocorrência disponível", "conflicts": result["conflicts"]}
+        )
+    return result
+
+# PUT /appointments/series/{series_id} - altera esta e as seguintes ocorrências
+@router.put("/series/{series_id}")
+async def update_appointment_series_route(request: Request, series_id: str, from_date: str, data: AppointmentSeriesUpdate):
+    db = request.app.state.db
+    user = await require_admin(request, db)
+    try:
+        updated = await update_appointment_series(db, user.tenant_id, series_id, from_date, data.time, data.notes)
+    except SeriesConflictError as e:
+        raise HTTPException(status_code=409, detail={"message": str(e), "conflicts": e.conflicts})
+    except SlotUnavailableError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except MisalignedSlotError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Horário inválido")
+    if updated is None:
+        raise HTTPException(status_code=404, detail="Série não encontrada")
+    return {"status": "ok", "updated": updated}
+
+# POST /appointments/series/{series_id}/cancel - cancela esta e as seguintes ocorrências
+@router.post("/series/{series_id}/cancel")
+async def cancel_appointment_series_route(request: Request, series_id: str, from_date: str):
+    db = request.app.state.db
+    user = await require_admin(request, db)
+    cancelled = await cancel_appointment_series(db, user.tenant_id, series_id, from_date)
+    if cancelled is None:
+        raise HTTPException(status_code=404, detail="Série não encontrada")
+    return {"status": "ok", "cancelled": cancelled}
 
 # PUT /appointments/{appointment_id}/status
 @router.put("/{appointment_id}/status")
 async def update_appointment_status_route(request: Request, appointment_id: str, status: str):
     db = request.app.state.db
-    result = await db.appointments.update_one({"appointment_id": appointment_id}, {"$set": {"status": status}})
-    if result.modified_count == 0:
+    if status not in VALID_STATUSES:
+        raise HTTPException(status_code=400, detail="Status inválido")
+    try:
+        appointment = await update_appointment_status(db, appointment_id, status)
+    except SlotUnavailableError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except MisalignedSlotError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not appointment:
         raise HTTPException(status_code=404, detail="Agendamento não encontrado")
     return {"status": "ok"}
 
+# POST /appointments/bulk-status - vários (appointment_id, status) de uma vez, com resultado por item
+@router.post("/bulk-status", response_model=BulkStatusResult)
+async def bulk_status_route(request: Request, data: BulkStatusUpdate):
+    db = request.app.state.db
+    user = await require_admin(request, db)
+    changes = [(item.appointment_id, item.status) for item in data.items]
+    return await bulk_update_appointment_status(db, user.tenant_id, changes)
+
+# POST /appointments/bulk-cancel - cancela vários agendamentos, com resultado por item
+@router.post("/bulk-cancel", response_model=BulkStatusResult)
+async def bulk_cancel_route(request: Request, data: BulkCancel):
+    db = request.app.state.db
+    user = await require_admin(request, db)
+    changes = [(appointment_id, "cancelled") for appointment_id in data.appointment_ids]
+    return await bulk_update_appointment_status(db, user.tenant_id, changes)
+
 # PUT /appointments/{appointment_id}/reschedule
 @router.put("/{appointment_id}/reschedule")
 async def reschedule_appointment_route(request: Request, appointment_id: str, new_date: str, new_time: str):
     db = request.app.state.db
-    result = await db.appointments.update_one({"appointment_id": appointment_id}, {"$set": {"date": new_date, "time": new_time}})
-    if result.modified_count == 0:
+    try:
+        check_time(new_time)
+        appointment = await reschedule_appointment(db, appointment_id, new_date, new_time)
+    except SlotUnavailableError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except MisalignedSlotError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Data ou horário inválido")
+    if not appointment:
         raise HTTPException(status_code=404, detail="Agendamento não encontrado")
     return {"status": "ok"}
 
@@ -112,7 +319,7 @@ async def reschedule_appointment_route(request: Request, appointment_id: str, ne
 @router.delete("/{appointment_id}")
 async def delete_appointment_route(request: Request, appointment_id: str):
     db = request.app.state.db
-    result = await db.appointments.delete_one({"appointment_id": appointment_id})
-    if result.deleted_count == 0:
+    appointment = await delete_appointment(db, appointment_id)
+    if not appointment:
         raise HTTPException(status_code=404, detail="Agendamento não encontrado")
     return {"status": "ok"}
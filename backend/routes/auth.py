@@ -1,7 +1,13 @@
 from fastapi import APIRouter, Request, Response, HTTPException
-from backend.utils.auth import get_current_user, require_admin, get_tenant_from_host
+from backend.utils.auth import get_current_user, require_admin, get_tenant_from_host, get_session_token
+from backend.utils.cache import session_cache
+from backend.utils.signed_tokens import (
+    signed_mode, is_signed_token, issue_token, decode_token, revoke_token, next_token_generation
+)
 from backend.models.user import User
-import httpx, uuid
+from backend.utils.http_client import InvalidSessionError, ProviderUnavailableError
+from backend.services.tenant_service import get_or_create_tenant
+import uuid
 from datetime import datetime, timezone, timedelta
 import os
 
@@ -29,35 +35,21 @@ async def create_session_route(request: Request, response: Response):
     session_id = body.get("session_id")
     if not session_id:
         raise HTTPException(status_code=400, detail="session_id é obrigatório")
-    async with httpx.AsyncClient() as client:
-        try:
-            auth_response = await client.get(
-                "https://demobackend.emergentagent.com/auth/v1/env/oauth/session-data",
-                headers={"X-Session-ID": session_id}
-            )
-            if auth_response.status_code != 200:
-                raise HTTPException(status_code=401, detail="Sessão inválida")
-            auth_data = auth_response.json()
-        except Exception:
-            raise HTTPException(status_code=401, detail="Erro de autenticação")
+    try:
+        auth_data = await request.app.state.auth_client.fetch_session_data(session_id)
+    except InvalidSessionError:
+        raise HTTPException(status_code=401, detail="Sessão inválida")
+    except ProviderUnavailableError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    if not all(key in auth_data for key in ("email", "name", "session_token")):
+        raise HTTPException(status_code=401, detail="Erro de autenticação")
     email = auth_data["email"]
     name = auth_data["name"]
     picture = auth_data.get("picture", "")
     session_token = auth_data["session_token"]
     tenant_slug = get_tenant_from_host(request)
-    tenant = await db.tenants.find_one({"slug": tenant_slug}, {"_id": 0})
-    if not tenant:
-        tenant_id = f"tenant_{uuid.uuid4().hex[:12]}"
-        tenant = {
-            "tenant_id": tenant_id,
-            "name": tenant_slug.replace("-", " ").title(),
-            "slug": tenant_slug,
-            "created_at": datetime.now(timezone.utc).isoformat(),
-            "is_active": True
-        }
-        await db.tenants.insert_one(tenant)
-    else:
-        tenant_id = tenant["tenant_id"]
+    tenant = await get_or_create_tenant(db, getattr(request.state, "tenant", None), tenant_slug)
+    tenant_id = tenant["tenant_id"]
     existing_user = await db.users.find_one({"email": email}, {"_id": 0})
     if existing_user:
         user_id = existing_user["user_id"]
@@ -66,6 +58,7 @@ async def create_session_route(request: Request, response: Response):
             {"$set": {"name": name, "picture": picture}}
         )
         role = existing_user.get("role", "client")
+        user_doc = {**existing_user, "name": name, "picture": picture}
     else:
         user_count = await db.users.count_documents({"tenant_id": tenant_id})
         role = "admin" if user_count == 0 else "client"
@@ -80,15 +73,24 @@ async def create_session_route(request: Request, response: Response):
             "created_at": datetime.now(timezone.utc).isoformat()
         }
         await db.users.insert_one(new_user)
+        user_doc = new_user
     expires_at = datetime.now(timezone.utc) + timedelta(days=7)
-    session_doc = {
-        "user_id": user_id,
-        "session_token": session_token,
-        "expires_at": expires_at.isoformat(),
-        "created_at": datetime.now(timezone.utc).isoformat()
-    }
     await db.user_sessions.delete_many({"user_id": user_id})
-    await db.user_sessions.insert_one(session_doc)
+    if signed_mode():
+        # Token assinado no lugar do token opaco: nada é gravado em user_sessions
+        generation = await next_token_generation(db, user_id, expires_at)
+        session_token = issue_token(user_doc, expires_at, generation)
+    else:
+        session_doc = {
+            "user_id": user_id,
+            "session_token": session_token,
+            # Data nativa para o índice TTL remover a sessão vencida
+            "expires_at": expires_at,
+            "created_at": datetime.now(timezone.utc).isoformat()
+        }
+        await db.user_sessions.insert_one(session_doc)
+    # As sessões anteriores foram apagadas e nome/foto podem ter mudado
+    session_cache.invalidate_user(user_id)
     response.set_cookie(
         key="session_token",
         value=session_token,
@@ -110,8 +112,13 @@ async def create_session_route(request: Request, response: Response):
 @router.post("/logout")
 async def logout_route(request: Request, response: Response):
     db = request.app.state.db
-    session = await db.user_sessions.find_one({"session_token": request.cookies.get("session_token")})
-    if session:
-        await db.user_sessions.delete_one({"session_token": session["session_token"]})
+    session_token = get_session_token(request)
+    if session_token and is_signed_token(session_token):
+        payload = decode_token(session_token)
+        if payload:
+            await revoke_token(db, payload)
+    elif session_token:
+        await db.user_sessions.delete_one({"session_token": session_token})
+        session_cache.invalidate(session_token)
     response.delete_cookie(key="session_token", path="/")
     return {"message": "Logout realizado com sucesso"}
@@ -4,6 +4,7 @@ from backend.services.blocked_time_service import (
     list_blocked_times, create_blocked_time, delete_blocked_time, update_blocked_time
 )
 from backend.utils.auth import require_admin, get_tenant_from_host
+from backend.utils.scheduling import ScheduleConflictError
 from typing import List
 
 router = APIRouter(prefix="/blocked-times")
@@ -12,7 +13,12 @@ router = APIRouter(prefix="/blocked-times")
 async def update_blocked_time_route(request: Request, blocked_id: str, data: BlockedTimeCreate):
     db = request.app.state.db
     user = await require_admin(request, db)
-    return await update_blocked_time(db, user.tenant_id, blocked_id, data)
+    try:
+        return await update_blocked_time(db, user.tenant_id, blocked_id, data)
+    except ScheduleConflictError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 @router.get("/", response_model=List[BlockedTime])
 async def list_blocked_times_route(request: Request):
@@ -24,7 +30,12 @@ async def list_blocked_times_route(request: Request):
 async def create_blocked_time_route(request: Request, data: BlockedTimeCreate):
     db = request.app.state.db
     user = await require_admin(request, db)
-    return await create_blocked_time(db, user.tenant_id, data)
+    try:
+        return await create_blocked_time(db, user.tenant_id, data)
+    except ScheduleConflictError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 @router.delete("/{blocked_id}")
 async def delete_blocked_time_route(request: Request, blocked_id: str):
@@ -0,0 +1,42 @@
+from fastapi import APIRouter, Request
+from backend.db import pool_stats
+from backend.utils.auth import require_operator
+from backend.utils.cache import availability_cache, session_cache, tenant_cache
+
+# Os contadores são do processo inteiro (todos os tenants): acesso só de operadores
+router = APIRouter(prefix="/metrics")
+
+# GET /metrics/availability-cache - contadores do cache de horários disponíveis
+@router.get("/availability-cache")
+async def availability_cache_metrics_route(request: Request):
+    db = request.app.state.db
+    await require_operator(request, db)
+    return availability_cache.stats()
+
+# GET /metrics/session-cache - contadores do cache de sessões
+@router.get("/session-cache")
+async def session_cache_metrics_route(request: Request):
+    db = request.app.state.db
+    await require_operator(request, db)
+    return session_cache.stats()
+
+# GET /metrics/auth-provider - latência e estado do circuito da troca OAuth
+@router.get("/auth-provider")
+async def auth_provider_metrics_route(request: Request):
+    db = request.app.state.db
+    await require_operator(request, db)
+    return request.app.state.auth_client.metrics()
+
+# GET /metrics/tenant-cache - contadores do cache de tenants por host
+@router.get("/tenant-cache")
+async def tenant_cache_metrics_route(request: Request):
+    db = request.app.state.db
+    await require_operator(request, db)
+    return tenant_cache.stats()
+
+# GET /metrics/mongo - pool de conexões (espera no checkout) e latência por comando
+@router.get("/mongo")
+async def mongo_metrics_route(request: Request):
+    db = request.app.state.db
+    await require_operator(request, db)
+    return pool_stats()
@@ -0,0 +1,28 @@
+from fastapi import APIRouter, Request, HTTPException
+from backend.models.propagation import PropagationJob, PROPAGATION_STATUSES
+from backend.services.propagation_service import list_propagation_jobs, get_propagation_job
+from backend.utils.auth import require_admin
+from typing import List, Optional
+
+router = APIRouter(prefix="/propagation-jobs")
+
+# GET /propagation-jobs - jobs recentes de propagação de nomes/preços (admin)
+@router.get("/", response_model=List[PropagationJob])
+async def list_propagation_jobs_route(request: Request, status: Optional[str] = None, limit: int = 50):
+    db = request.app.state.db
+    user = await require_admin(request, db)
+    if status and status not in PROPAGATION_STATUSES:
+        raise HTTPException(status_code=400, detail="Status inválido")
+    if not 1 <= limit <= 200:
+        raise HTTPException(status_code=400, detail="limit deve estar entre 1 e 200")
+    return await list_propagation_jobs(db, user.tenant_id, status, limit)
+
+# GET /propagation-jobs/{job_id} - progresso de um job
+@router.get("/{job_id}", response_model=PropagationJob)
+async def get_propagation_job_route(request: Request, job_id: str):
+    db = request.app.state.db
+    user = await require_admin(request, db)
+    job = await get_propagation_job(db, user.tenant_id, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job não encontrado")
+    return job
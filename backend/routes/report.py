@@ -1,11 +1,39 @@
 from fastapi import APIRouter, Request, HTTPException
-from backend.services.report_service import get_revenue_report
+from backend.services.report_service import get_revenue_report, export_revenue_cursor, REVENUE_EXPORT_COLUMNS
 from backend.utils.auth import require_admin
+from backend.utils.export import export_response
+from typing import Optional
+from datetime import date as date_type
 
 router = APIRouter(prefix="/reports")
 
+
+def _check_dates(*values: Optional[str]):
+    try:
+        for value in values:
+            if value:
+                date_type.fromisoformat(value)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Datas inválidas, use YYYY-MM-DD")
+
+# GET /reports/revenue - faturamento por dia (date_from/date_to opcionais; períodos arquivados entram no cálculo)
 @router.get("/revenue")
-async def revenue_report_route(request: Request):
+async def revenue_report_route(request: Request, date_from: Optional[str] = None, date_to: Optional[str] = None):
+    _check_dates(date_from, date_to)
+    db = request.app.state.db
+    user = await require_admin(request, db)
+    return await get_revenue_report(db, user.tenant_id, date_from, date_to)
+
+# GET /reports/revenue/export - faturamento por dia em streaming (format=ndjson|csv, gzip opcional)
+@router.get("/revenue/export")
+async def export_revenue_route(
+    request: Request, format: str = "csv", gzip: bool = False, date_from: Optional[str] = None, date_to: Optional[str] = None
+):
+    _check_dates(date_from, date_to)
     db = request.app.state.db
     user = await require_admin(request, db)
-    return await get_revenue_report(db, user.tenant_id)
+    cursor = await export_revenue_cursor(db, user.tenant_id, date_from, date_to)
+    try:
+        return export_response(cursor, format, "faturamento", REVENUE_EXPORT_COLUMNS, gzip)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
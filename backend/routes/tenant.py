@@ -1,16 +1,14 @@
 from fastapi import APIRouter, Request, HTTPException
 from backend.models.tenant import TenantBase
-from backend.services.tenant_service import get_tenant_info, update_tenant_info
-from backend.utils.auth import require_admin, get_tenant_from_host
+from backend.services.tenant_service import update_tenant_info
+from backend.utils.auth import require_admin
+from backend.utils.tenant import get_request_tenant
 
 router = APIRouter(prefix="/tenant")
 
 @router.get("/")
 async def get_tenant_route(request: Request):
-    db = request.app.state.db
-    tenant_slug = get_tenant_from_host(request)
-    tenant = await get_tenant_info(db, tenant_slug)
-    return tenant
+    return await get_request_tenant(request)
 
 @router.put("/")
 async def update_tenant_route(request: Request, data: TenantBase):
@@ -0,0 +1,101 @@
+from fastapi import APIRouter, Request, HTTPException
+from backend.models.appointment import Appointment
+from backend.models.waitlist import WaitlistEntry, WaitlistEntryCreate, WAITLIST_STATUSES
+from backend.services.appointment_service import create_appointment
+from backend.services.reservation_service import SlotUnavailableError
+from backend.services.waitlist_service import (
+    create_waitlist_entry, list_waitlist_entries, cancel_waitlist_entry,
+    claim_waitlist_offer, complete_waitlist_offer, release_waitlist_offer, can_accept_offer
+)
+from backend.utils.auth import require_admin, get_current_user
+from backend.utils.tenant import get_request_tenant
+from backend.utils.loader import get_loaders
+from typing import List, Optional
+import asyncio
+
+router = APIRouter(prefix="/waitlist")
+
+# POST /waitlist - cliente entra na lista de espera
+@router.post("/", response_model=WaitlistEntry)
+async def create_waitlist_entry_route(request: Request, data: WaitlistEntryCreate):
+    db = request.app.state.db
+    tenant = await get_request_tenant(request)
+    loaders = get_loaders(db)
+    # As duas buscas saem juntas: os loads são despachados no mesmo ciclo do loop
+    service = loaders.services.load(data.service_id, tenant["tenant_id"])
+    employee = loaders.employees.load(data.employee_id, tenant["tenant_id"]) if data.employee_id else None
+    if not await service:
+        raise HTTPException(status_code=404, detail="Serviço não encontrado")
+    if employee is not None:
+        if not await employee:
+            raise HTTPException(status_code=404, detail="Funcionário não encontrado")
+    user = await get_current_user(request, db)
+    return await create_waitlist_entry(db, tenant["tenant_id"], data, user.user_id if user else None)
+
+# GET /waitlist - entradas do tenant (admin)
+@router.get("/", response_model=List[WaitlistEntry])
+async def list_waitlist_entries_route(request: Request, status: Optional[str] = None):
+    db = request.app.state.db
+    user = await require_admin(request, db)
+    if status and status not in WAITLIST_STATUSES:
+        raise HTTPException(status_code=400, detail="Status inválido")
+    return await list_waitlist_entries(db, user.tenant_id, status)
+
+# DELETE /waitlist/{entry_id} - remove da lista de espera (admin)
+@router.delete("/{entry_id}")
+async def cancel_waitlist_entry_route(request: Request, entry_id: str):
+    db = request.app.state.db
+    user = await require_admin(request, db)
+    result = await cancel_waitlist_entry(db, user.tenant_id, entry_id)
+    if not result:
+        raise HTTPException(status_code=404, detail="Entrada da lista de espera não encontrada")
+    return result
+
+# POST /waitlist/{entry_id}/accept - cliente aceita o horário oferecido (sessão do dono ou código do e-mail)
+@router.post("/{entry_id}/accept", response_model=Appointment)
+async def accept_waitlist_offer_route(request: Request, entry_id: str, token: Optional[str] = None):
+    db = request.app.state.db
+    tenant = await get_request_tenant(request)
+    try:
+        entry = await claim_waitlist_offer(db, tenant["tenant_id"], entry_id)
+    except ValueError as e:
+        raise HTTPException(status_code=410, detail=str(e))
+    if not entry:
+        raise HTTPException(status_code=404, detail="Oferta não encontrada")
+    user = await get_current_user(request, db)
+    if not can_accept_offer(entry, token, user.user_id if user else None):
+        raise HTTPException(status_code=403, detail="Acesso negado")
+    offer = entry["offer"]
+    loaders = get_loaders(db)
+    service, employee = await asyncio.gather(
+        loaders.services.load(entry["service_id"], tenant["tenant_id"]),
+        loaders.employees.load(offer["employee_id"], tenant["tenant_id"])
+    )
+    if not service or not employee:
+        await release_waitlist_offer(db, entry_id)
+        raise HTTPException(status_code=404, detail="Serviço ou funcionário não encontrado")
+    try:
+        appointment = await create_appointment(db, {
+            "tenant_id": tenant["tenant_id"],
+            "service_id": entry["service_id"],
+            "service_name": service["name"],
+            "service_price": service["price"],
+            "service_duration": service["duration"],
+            "employee_id": offer["employee_id"],
+            "employee_name": employee["name"],
+            "date": offer["date"],
+            "time": offer["time"],
+            "client_user_id": entry.get("client_user_id"),
+            "client_name": entry["client_name"],
+            "client_email": entry["client_email"],
+            "client_phone": entry.get("client_phone"),
+            "notes": None
+        })
+    except SlotUnavailableError as e:
+        await release_waitlist_offer(db, entry_id)
+        raise HTTPException(status_code=409, detail=str(e))
+    except ValueError as e:
+        await release_waitlist_offer(db, entry_id)
+        raise HTTPException(status_code=400, detail=str(e))
+    await complete_waitlist_offer(db, entry_id, appointment["appointment_id"])
+    return Appointment(**{k: v for k, v in appointment.items() if k != "_id"})
@@ -0,0 +1,42 @@
+from fastapi import APIRouter, Request, HTTPException
+from backend.models.working_hours import WorkingHours, WorkingHoursUpdate
+from backend.services.working_hours_service import get_working_hours, set_working_hours, delete_working_hours
+from backend.utils.auth import require_admin
+from backend.utils.loader import get_loaders
+
+router = APIRouter(prefix="/working-hours")
+
+# Expediente padrão do tenant
+@router.get("/")
+async def get_tenant_working_hours_route(request: Request):
+    db = request.app.state.db
+    user = await require_admin(request, db)
+    return await get_working_hours(db, user.tenant_id)
+
+@router.put("/", response_model=WorkingHours)
+async def set_tenant_working_hours_route(request: Request, data: WorkingHoursUpdate):
+    db = request.app.state.db
+    user = await require_admin(request, db)
+    return await set_working_hours(db, user.tenant_id, None, data)
+
+# Expediente específico de um funcionário (sobrepõe o do tenant)
+@router.get("/{employee_id}")
+async def get_employee_working_hours_route(request: Request, employee_id: str):
+    db = request.app.state.db
+    user = await require_admin(request, db)
+    return await get_working_hours(db, user.tenant_id, employee_id)
+
+@router.put("/{employee_id}", response_model=WorkingHours)
+async def set_employee_working_hours_route(request: Request, employee_id: str, data: WorkingHoursUpdate):
+    db = request.app.state.db
+    user = await require_admin(request, db)
+    employee = await get_loaders(db).employees.load(employee_id, user.tenant_id)
+    if not employee:
+        raise HTTPException(status_code=404, detail="Funcionário não encontrado")
+    return await set_working_hours(db, user.tenant_id, employee_id, data)
+
+@router.delete("/{employee_id}")
+async def delete_employee_working_hours_route(request: Request, employee_id: str):
+    db = request.app.state.db
+    user = await require_admin(request, db)
+    return await delete_working_hours(db, user.tenant_id, employee_id)
@@ -10,6 +10,13 @@ from fastapi import FastAPI, APIRouter
 from fastapi.middleware.cors import CORSMiddleware
 import logging
 from backend.db import connect_to_mongo, close_mongo_connection
+from backend.indexes import ensure_indexes
+from backend.migrations import pending_migrations
+from backend.utils.http_client import AuthProviderClient
+from backend.utils.tenant import tenant_middleware
+from backend.utils.loader import loader_middleware
+from backend.utils.signed_tokens import check_auth_config
+from backend.services.propagation_service import start_propagation_worker
 
 from backend.routes.tenant import router as tenant_router
 from backend.routes.service import router as service_router
@@ -18,6 +25,10 @@ from backend.routes.appointment import router as appointment_router
 from backend.routes.auth import router as auth_router
 from backend.routes.blocked_time import router as blocked_time_router
 from backend.routes.report import router as report_router
+from backend.routes.working_hours import router as working_hours_router
+from backend.routes.metrics import router as metrics_router
+from backend.routes.waitlist import router as waitlist_router
+from backend.routes.propagation import router as propagation_router
 
 
 app = FastAPI()
@@ -42,6 +53,10 @@ api_router.include_router(appointment_router)
 api_router.include_router(auth_router)
 api_router.include_router(blocked_time_router)
 api_router.include_router(report_router)
+api_router.include_router(working_hours_router)
+api_router.include_router(metrics_router)
+api_router.include_router(waitlist_router)
+api_router.include_router(propagation_router)
 
 
 # Inclui o api_router no app principal com prefixo '/api'
@@ -50,14 +65,23 @@ app.include_router(api_router, prefix="/api")
 # Eventos de inicialização e finalização do app para conectar/desconectar do MongoDB
 @app.on_event("startup")
 async def startup_event():
+    check_auth_config()
     logger.info("Conectando ao MongoDB...")
     await connect_to_mongo(app)
+    app.state.auth_client = AuthProviderClient()
+    await ensure_indexes(app.state.db)
+    pending = await pending_migrations(app.state.db)
+    if pending:
+        logger.warning(f"Migrações pendentes: {[m.version for m in pending]}; rode python -m backend.migrate")
+    app.state.propagation_worker = start_propagation_worker(app.state.db)
     logger.info("MongoDB conectado!")
 
 @app.on_event("shutdown")
 async def shutdown_event():
     logger.info("Desconectando do MongoDB...")
+    app.state.propagation_worker.cancel()
     await close_mongo_connection(app)
+    await app.state.auth_client.aclose()
     logger.info("MongoDB desconectado!")
 
 
@@ -67,8 +91,15 @@ app.add_middleware(
     allow_origins=["*"],
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
+# Resolve o tenant do host uma vez por requisição (request.state.tenant)
+app.middleware("http")(tenant_middleware)
+
+# Carregadores em lote (funcionários, serviços, tenants, usuários) por requisição
+app.middleware("http")(loader_middleware)
+
 # Middleware de depuração para logar requisições e respostas
 @app.middleware("http")
 async def log_requests(request, call_next):
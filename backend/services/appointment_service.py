@@ -1,6 +1,23 @@
 from backend.models.appointment import Appointment
 from backend.utils.email import send_email_async, get_client_reminder_email, get_employee_reminder_email
+from backend.services.availability_service import on_schedule_change, assert_slot_free, check_slots, ACTIVE_STATUSES
+from backend.services.reservation_service import (
+    reserve_slot, reserve_slots, move_reservation, move_reservations, release_reservation, release_reservations,
+    SlotUnavailableError
+)
+from backend.services.waitlist_service import schedule_waitlist_match
+from backend.utils.scheduling import (
+    time_to_minutes, recurrence_dates, appointment_schedule_fields, is_aligned, DEFAULT_DURATION, RESERVATION_UNIT
+)
+from backend.models.appointment import RECURRENCE_FREQUENCIES, MAX_SERIES_OCCURRENCES
+from backend.utils.pagination import after_key_filter, decode_cursor, page_cursor
+from backend.utils.export import EXPORT_BATCH_SIZE
+from backend.utils.loader import get_loaders
+from backend.services.archive_service import archive_sources, union_pipeline
+from pymongo import ASCENDING, UpdateMany, UpdateOne
+from collections import defaultdict
 from datetime import datetime, timezone
+import uuid
 
 
 def log_appointment_security(appt, tenant_id):
@@ -16,42 +33,463 @@ async def create_appointment(db, data):
     """Cria um novo agendamento e retorna o objeto criado."""
     if "tenant_id" not in data or not data["tenant_id"]:
         raise Exception("tenant_id obrigatório para criar agendamento")
-    appointment_id = f"appt_{datetime.now(timezone.utc).strftime('%Y%m%d%H%M%S%f')}"
+    appointment_id = f"appt_{uuid.uuid4().hex[:12]}"
     appointment = {
         **data,
         "appointment_id": appointment_id,
+        **appointment_schedule_fields(data["date"], data["time"], data.get("service_duration")),
         "created_at": datetime.now(timezone.utc).isoformat(),
         "status": "pending"
     }
-    await db.appointments.insert_one(appointment)
+    # Leitura para bloqueios/expediente + reserva atômica contra agendamentos concorrentes
+    start = time_to_minutes(appointment["time"])
+    duration = appointment.get("service_duration") or DEFAULT_DURATION
+    await assert_slot_free(db, appointment["tenant_id"], appointment["employee_id"], appointment["date"], start, duration)
+    await reserve_slot(db, appointment["tenant_id"], appointment["employee_id"], appointment["date"], start, duration, appointment_id)
+    try:
+        await db.appointments.insert_one(appointment)
+    except Exception:
+        await release_reservation(db, appointment_id)
+        raise
+    await on_schedule_change(db, appointment["tenant_id"], appointment.get("employee_id"), [appointment.get("date")])
     return appointment
 
-# Função utilitária para garantir campos obrigatórios em agendamentos
-def ensure_appointment_fields(appt):
-    if "created_at" not in appt:
-        appt["created_at"] = datetime.now(timezone.utc).isoformat()
-    if "status" not in appt:
-        appt["status"] = "pending"
-    if "client_name" not in appt:
-        appt["client_name"] = ""
-    if "client_email" not in appt:
-        appt["client_email"] = ""
-    if "service_id" not in appt:
-        appt["service_id"] = ""
-    if "employee_id" not in appt:
-        appt["employee_id"] = ""
-    return appt
-
-async def send_reminder_emails(db, appointment_id, tenant_name, send_to_client=True, send_to_employee=True):
-    """Envia e-mails de lembrete para cliente e/ou profissional."""
-    appointment = await db.appointments.find_one({"appointment_id": appointment_id}, {"_id": 0})
+VALID_STATUSES = ["pending", "confirmed", "completed", "cancelled"]
+
+# Campos necessários para saber qual agenda (funcionário/dia) uma escrita afeta
+SCHEDULE_FIELDS = {"_id": 0, "appointment_id": 1, "tenant_id": 1, "employee_id": 1, "date": 1, "time": 1, "service_duration": 1, "status": 1}
+
+def offer_freed_slot(db, appointment):
+    """Oferece à lista de espera o horário que o agendamento deixou livre (em segundo plano)."""
+    if appointment.get("status") not in ACTIVE_STATUSES or not appointment.get("time"):
+        return
+    start = time_to_minutes(appointment["time"])
+    schedule_waitlist_match(
+        db, appointment["tenant_id"], appointment["employee_id"], appointment["date"],
+        start, start + (appointment.get("service_duration") or DEFAULT_DURATION)
+    )
+
+async def update_appointment_status(db, appointment_id, status):
+    """Altera o status, reservando ou liberando o horário quando o agendamento (des)ativa."""
+    appointment = await db.appointments.find_one({"appointment_id": appointment_id}, SCHEDULE_FIELDS)
+    if not appointment:
+        return None
+    was_active = appointment.get("status") in ACTIVE_STATUSES
+    is_active = status in ACTIVE_STATUSES
+    if is_active and not was_active:
+        start = time_to_minutes(appointment["time"])
+        duration = appointment.get("service_duration") or DEFAULT_DURATION
+        await assert_slot_free(db, appointment["tenant_id"], appointment["employee_id"], appointment["date"], start, duration, appointment_id)
+        await reserve_slot(db, appointment["tenant_id"], appointment["employee_id"], appointment["date"], start, duration, appointment_id)
+    await db.appointments.update_one({"appointment_id": appointment_id}, {"$set": {"status": status}})
+    if was_active and not is_active:
+        await release_reservation(db, appointment_id)
+    await on_schedule_change(db, appointment["tenant_id"], appointment["employee_id"], [appointment["date"]])
+    if status == "cancelled":
+        offer_freed_slot(db, appointment)
+    return {**appointment, "status": status}
+
+async def bulk_update_appointment_status(db, tenant_id, changes):
+    """
+    Altera o status de vários agendamentos do tenant com um único bulk_write.
+
+    ``changes`` é uma lista de pares (appointment_id, status). Cada item é
+    aceito ou recusado sozinho e o resultado volta na ordem de entrada.
+    Agendamentos reativados são conferidos e reservados em lote por
+    funcionário. A disponibilidade é recalculada uma vez por funcionário, com
+    os dias afetados deduplicados, e não uma vez por item.
+    """
+    results = [{"appointment_id": appointment_id, "ok": False} for appointment_id, _ in changes]
+    targets = {}
+    for index, (appointment_id, status) in enumerate(changes):
+        if status not in VALID_STATUSES:
+            results[index]["detail"] = "Status inválido"
+        elif appointment_id in targets:
+            results[index]["detail"] = "Agendamento repetido no lote"
+        else:
+            targets[appointment_id] = (index, status)
+    docs = await db.appointments.find(
+        {"tenant_id": tenant_id, "appointment_id": {"$in": list(targets)}}, SCHEDULE_FIELDS
+    ).to_list(None) if targets else []
+    found = {doc["appointment_id"]: doc for doc in docs}
+
+    rejected = {appointment_id: "Agendamento não encontrado" for appointment_id in targets if appointment_id not in found}
+    activating = defaultdict(list)
+    for appointment_id, appointment in found.items():
+        if targets[appointment_id][1] in ACTIVE_STATUSES and appointment.get("status") not in ACTIVE_STATUSES:
+            activating[appointment["employee_id"]].append(appointment)
+    reserved = []
+    for employee_id, appointments in activating.items():
+        items = [
+            (appt["appointment_id"], appt["date"], time_to_minutes(appt["time"]), appt.get("service_duration") or DEFAULT_DURATION)
+            for appt in appointments
+        ]
+        reasons = await check_slots(db, tenant_id, employee_id, [(day, start, duration) for _, day, start, duration in items])
+        free = []
+        for item, reason in zip(items, reasons):
+            if not reason and not is_aligned(item[2], item[3]):
+                reason = f"Horário fora da grade de {RESERVATION_UNIT} minutos"
+            if reason:
+                rejected[item[0]] = reason
+            else:
+                free.append(item)
+        failed = await reserve_slots(db, tenant_id, employee_id, free)
+        for appointment_id, _, _, _ in free:
+            if appointment_id in failed:
+                rejected[appointment_id] = "Horário já reservado"
+            else:
+                reserved.append(appointment_id)
+
+    changed = [
+        (found[appointment_id], status) for appointment_id, (_, status) in targets.items()
+        if appointment_id not in rejected and found[appointment_id].get("status") != status
+    ]
+    if changed:
+        try:
+            await db.appointments.bulk_write([
+                UpdateOne({"appointment_id": appt["appointment_id"], "tenant_id": tenant_id}, {"$set": {"status": status}})
+                for appt, status in changed
+            ], ordered=False)
+        except Exception:
+            await release_reservations(db, reserved)
+            raise
+    await release_reservations(db, [
+        appt["appointment_id"] for appt, status in changed
+        if appt.get("status") in ACTIVE_STATUSES and status not in ACTIVE_STATUSES
+    ])
+
+    days = defaultdict(set)
+    for appt, status in changed:
+        days[appt["employee_id"]].add(appt["date"])
+    for employee_id, dates in days.items():
+        await on_schedule_change(db, tenant_id, employee_id, dates)
+    for appt, status in changed:
+        if status == "cancelled":
+            offer_freed_slot(db, appt)
+
+    for appointment_id, (index, status) in targets.items():
+        if appointment_id in rejected:
+            results[index]["detail"] = rejected[appointment_id]
+        else:
+            results[index].update(ok=True, status=status)
+    updated = sum(1 for result in results if result["ok"])
+    return {"updated": updated, "failed": len(results) - updated, "results": results}
+
+async def reschedule_appointment(db, appointment_id, new_date, new_time):
+    """Move o agendamento, garantindo a reserva do novo horário antes de liberar o antigo."""
+    appointment = await db.appointments.find_one({"appointment_id": appointment_id}, SCHEDULE_FIELDS)
     if not appointment:
-        return False
+        return None
+    start = time_to_minutes(new_time)
+    if appointment.get("status") in ACTIVE_STATUSES:
+        duration = appointment.get("service_duration") or DEFAULT_DURATION
+        await assert_slot_free(db, appointment["tenant_id"], appointment["employee_id"], new_date, start, duration, appointment_id)
+        await move_reservation(db, appointment["tenant_id"], appointment["employee_id"], new_date, start, duration, appointment_id)
+    await db.appointments.update_one(
+        {"appointment_id": appointment_id},
+        {"$set": {
+            "date": new_date,
+            "time": new_time,
+            **appointment_schedule_fields(new_date, new_time, appointment.get("service_duration"))
+        }}
+    )
+    await on_schedule_change(db, appointment["tenant_id"], appointment["employee_id"], [appointment["date"], new_date])
+    offer_freed_slot(db, appointment)
+    return {**appointment, "date": new_date, "time": new_time}
+
+async def delete_appointment(db, appointment_id):
+    """Remove o agendamento e libera sua reserva."""
+    appointment = await db.appointments.find_one_and_delete({"appointment_id": appointment_id}, projection=SCHEDULE_FIELDS)
+    if not appointment:
+        return None
+    await release_reservation(db, appointment_id)
+    await on_schedule_change(db, appointment["tenant_id"], appointment["employee_id"], [appointment["date"]])
+    offer_freed_slot(db, appointment)
+    return appointment
+
+# ============== SÉRIES RECORRENTES ==============
+
+class SeriesConflictError(SlotUnavailableError):
+    """Alguma ocorrência da série não pode ser movida; ``conflicts`` lista cada uma."""
+
+    def __init__(self, conflicts):
+        super().__init__("Conflito em ocorrências da série")
+        self.conflicts = conflicts
+
+
+async def create_appointment_series(db, data, recurrence):
+    """
+    Cria todas as ocorrências de uma série em lote.
+
+    A validação de expediente, bloqueios e agendamentos é feita de uma vez para
+    todas as datas; as aceitas são reservadas com um único insert_many e gravadas
+    com outro. Ocorrências em conflito são devolvidas com o motivo e não impedem
+    as demais.
+    """
+    if "tenant_id" not in data or not data["tenant_id"]:
+        raise Exception("tenant_id obrigatório para criar agendamento")
+    tenant_id, employee_id = data["tenant_id"], data["employee_id"]
+    dates = recurrence_dates(
+        data["date"], RECURRENCE_FREQUENCIES[recurrence.frequency], recurrence.count, recurrence.until,
+        MAX_SERIES_OCCURRENCES
+    )
+    start = time_to_minutes(data["time"])
+    duration = data.get("service_duration") or DEFAULT_DURATION
+    reasons = await check_slots(db, tenant_id, employee_id, [(day, start, duration) for day in dates])
+
+    series_id = f"series_{uuid.uuid4().hex[:12]}"
+    created_at = datetime.now(timezone.utc).isoformat()
+    conflicts = []
+    candidates = []
+    for day, reason in zip(dates, reasons):
+        if reason:
+            conflicts.append({"date": day, "time": data["time"], "detail": reason})
+            continue
+        candidates.append({
+            **data,
+            "date": day,
+            **appointment_schedule_fields(day, data["time"], duration),
+            "appointment_id": f"appt_{uuid.uuid4().hex[:12]}",
+            "series_id": series_id,
+            "created_at": created_at,
+            "status": "pending"
+        })
+    failed = await reserve_slots(
+        db, tenant_id, employee_id, [(appt["appointment_id"], appt["date"], start, duration) for appt in candidates]
+    )
+    accepted = []
+    for appt in candidates:
+        if appt["appointment_id"] in failed:
+            conflicts.append({"date": appt["date"], "time": appt["time"], "detail": "Horário já reservado"})
+        else:
+            accepted.append(appt)
+    conflicts.sort(key=lambda c: c["date"])
+    if not accepted:
+        return {"series_id": None, "created": [], "conflicts": conflicts}
+
+    await db.appointment_series.insert_one({
+        "series_id": series_id,
+        "tenant_id": tenant_id,
+        "employee_id": employee_id,
+        "service_id": data.get("service_id"),
+        "time": data["time"],
+        "frequency": recurrence.frequency,
+        "count": recurrence.count,
+        "until": recurrence.until,
+        "created_at": created_at
+    })
+    try:
+        await db.appointments.insert_many(accepted, ordered=False)
+    except Exception:
+        await release_reservations(db, [appt["appointment_id"] for appt in accepted])
+        await db.appointment_series.delete_one({"series_id": series_id})
+        raise
+    await on_schedule_change(db, tenant_id, employee_id, [appt["date"] for appt in accepted])
+    return {"series_id": series_id, "created": accepted, "conflicts": conflicts}
+
+
+async def _series_occurrences(db, tenant_id, series_id, from_date):
+    return await db.appointments.find(
+        {"tenant_id": tenant_id, "series_id": series_id, "date": {"$gte": from_date}, "status": {"$in": ACTIVE_STATUSES}},
+        SCHEDULE_FIELDS
+    ).to_list(None)
+
+
+async def update_appointment_series(db, tenant_id, series_id, from_date, new_time=None, notes=None):
+    """
+    Altera "esta e as seguintes" ocorrências ativas da série com um único update_many.
+
+    Se o horário mudar, todas as ocorrências são validadas e reservadas em lote;
+    qualquer conflito cancela a alteração inteira (SeriesConflictError).
+    Devolve a quantidade de ocorrências alteradas, ou None se a série não existir.
+    """
+    occurrences = await _series_occurrences(db, tenant_id, series_id, from_date)
+    if not occurrences:
+        return None
+    changes = {}
+    if notes is not None:
+        changes["notes"] = notes
+    if new_time is not None:
+        start = time_to_minutes(new_time)
+        employee_id = occurrences[0]["employee_id"]
+        items = [
+            (appt["appointment_id"], appt["date"], start, appt.get("service_duration") or DEFAULT_DURATION)
+            for appt in occurrences
+        ]
+        reasons = await check_slots(
+            db, tenant_id, employee_id, [(day, start, duration) for _, day, _, duration in items],
+            [appt["appointment_id"] for appt in occurrences]
+        )
+        conflicts = [
+            {"date": day, "time": new_time, "detail": reason}
+            for (_, day, _, _), reason in zip(items, reasons) if reason
+        ]
+        if conflicts:
+            raise SeriesConflictError(conflicts)
+        await move_reservations(db, tenant_id, employee_id, items)
+        changes["time"] = new_time
+    if not changes:
+        return len(occurrences)
+    if "time" in changes:
+        # end_min depende da duração: um update_many por duração, num único bulk_write
+        by_duration = defaultdict(list)
+        for appt, (_, _, _, duration) in zip(occurrences, items):
+            by_duration[duration].append(appt["appointment_id"])
+        try:
+            await db.appointments.bulk_write([
+                UpdateMany(
+                    {"appointment_id": {"$in": ids}},
+                    {"$set": {**changes, "start_min": start, "end_min": start + duration}}
+                )
+                for duration, ids in by_duration.items()
+            ], ordered=False)
+        except Exception:
+            # Os agendamentos continuam no horário antigo: devolve os blocos para lá
+            await move_reservations(db, tenant_id, employee_id, [
+                (appointment_id, day, time_to_minutes(appt["time"]), duration)
+                for appt, (appointment_id, day, _, duration) in zip(occurrences, items)
+            ])
+            raise
+    else:
+        await db.appointments.update_many(
+            {"appointment_id": {"$in": [appt["appointment_id"] for appt in occurrences]}},
+            {"$set": changes}
+        )
+    if "time" in changes:
+        await on_schedule_change(db, tenant_id, occurrences[0]["employee_id"], [appt["date"] for appt in occurrences])
+        for appt in occurrences:
+            offer_freed_slot(db, appt)
+    return len(occurrences)
+
+
+async def cancel_appointment_series(db, tenant_id, series_id, from_date):
+    """Cancela "esta e as seguintes" ocorrências ativas da série com um único update_many."""
+    occurrences = await _series_occurrences(db, tenant_id, series_id, from_date)
+    if not occurrences:
+        return None
+    appointment_ids = [appt["appointment_id"] for appt in occurrences]
+    await db.appointments.update_many(
+        {"appointment_id": {"$in": appointment_ids}, "status": {"$in": ACTIVE_STATUSES}},
+        {"$set": {"status": "cancelled"}}
+    )
+    await release_reservations(db, appointment_ids)
+    await on_schedule_change(db, tenant_id, occurrences[0]["employee_id"], [appt["date"] for appt in occurrences])
+    for appt in occurrences:
+        offer_freed_slot(db, appt)
+    return len(occurrences)
+
+# Ordem da listagem; o índice (tenant_id, date, time, appointment_id) segue a mesma ordem
+LIST_SORT_FIELDS = ("date", "time", "appointment_id")
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+
+
+async def list_appointments_page(db, query: dict, limit: int = DEFAULT_PAGE_SIZE, cursor: str = None):
+    """
+    Uma página da listagem em ordem (date, time, appointment_id).
+
+    Devolve (agendamentos, cursor da próxima página ou None). Levanta
+    InvalidCursorError (ValueError) para cursor malformado.
+    """
+    if cursor:
+        query = {"$and": [query, after_key_filter(LIST_SORT_FIELDS, decode_cursor(cursor, len(LIST_SORT_FIELDS)))]}
+    docs = await db.appointments.find(query, {"_id": 0}).sort(
+        [(field, ASCENDING) for field in LIST_SORT_FIELDS]
+    ).limit(limit + 1).to_list(limit + 1)
+    return docs[:limit], page_cursor(docs, LIST_SORT_FIELDS, limit)
+
+
+# Colunas da exportação em CSV, na ordem do arquivo
+EXPORT_COLUMNS = [
+    "appointment_id", "date", "time", "status", "client_name", "client_email", "client_phone",
+    "service_id", "service_name", "service_price", "service_duration", "employee_id", "employee_name",
+    "series_id", "notes", "created_at"
+]
+
+
+async def export_appointments_cursor(db, query: dict):
+    """
+    Cursor da exportação, na ordem da listagem, lido em lotes de EXPORT_BATCH_SIZE.
+
+    Se o período cruza anos arquivados, as coleções de arquivo entram via $unionWith.
+    """
+    date_range = query.get("date") or {}
+    archives = await archive_sources(db, date_range.get("$gte"), date_range.get("$lte"))
+    if not archives:
+        return db.appointments.find(query, {"_id": 0}).sort(
+            [(field, ASCENDING) for field in LIST_SORT_FIELDS]
+        ).batch_size(EXPORT_BATCH_SIZE)
+    pipeline = union_pipeline(query, archives) + [
+        {"$project": {"_id": 0}},
+        {"$sort": {field: 1 for field in LIST_SORT_FIELDS}}
+    ]
+    return db.appointments.aggregate(pipeline, allowDiskUse=True, batchSize=EXPORT_BATCH_SIZE)
+
+async def send_reminder_emails(db, tenant_id, appointment_id, send_to_client=True, send_to_employee=True):
+    """Envia e-mails de lembrete para cliente e/ou profissional; None se o agendamento não existir."""
+    loaders = get_loaders(db)
+    tenant = loaders.tenants.load(tenant_id)
+    appointment = await db.appointments.find_one({"appointment_id": appointment_id, "tenant_id": tenant_id}, {"_id": 0})
+    if not appointment:
+        return None
+    employee = await loaders.employees.load(appointment.get("employee_id"), tenant_id)
+    tenant_name = ((await tenant) or {}).get("name", "Salão")
     results = {}
     if send_to_client and appointment.get("client_email"):
         html = get_client_reminder_email(appointment, tenant_name)
         results["client"] = await send_email_async(appointment["client_email"], "Lembrete de Agendamento", html)
-    if send_to_employee and appointment.get("employee_email"):
+    if send_to_employee and employee and employee.get("email"):
         html = get_employee_reminder_email(appointment, tenant_name)
-        results["employee"] = await send_email_async(appointment["employee_email"], "Lembrete de Atendimento", html)
+        results["employee"] = await send_email_async(employee["email"], "Lembrete de Atendimento", html)
     return results
+
+async def send_daily_reminders(db, tenant_id, date):
+    """
+    Lembretes para cliente e profissional de todos os agendamentos ativos do dia.
+
+    Os funcionários do dia são carregados com uma única consulta $in, não um
+    find_one por agendamento.
+    """
+    loaders = get_loaders(db)
+    tenant = loaders.tenants.load(tenant_id)
+    appointments = await db.appointments.find(
+        {"tenant_id": tenant_id, "date": date, "status": {"$in": ACTIVE_STATUSES}}, {"_id": 0}
+    ).sort("time", ASCENDING).to_list(None)
+    employee_ids = sorted({appt.get("employee_id") for appt in appointments if appt.get("employee_id")})
+    employees = dict(zip(employee_ids, await loaders.employees.load_many(employee_ids, tenant_id)))
+    # Cliente sem e-mail no agendamento, mas com conta: usa o e-mail da conta
+    user_ids = sorted({appt["client_user_id"] for appt in appointments if appt.get("client_user_id") and not appt.get("client_email")})
+    users = dict(zip(user_ids, await loaders.users.load_many(user_ids)))
+    tenant_name = ((await tenant) or {}).get("name", "Salão")
+    sent_count = 0
+    failed_count = 0
+    for appt in appointments:
+        user = users.get(appt.get("client_user_id"))
+        client_email = appt.get("client_email") or (user or {}).get("email")
+        if client_email:
+            result = await send_email_async(
+                client_email,
+                f"Lembrete: Agendamento amanhã em {tenant_name} - {appt.get('time')}",
+                get_client_reminder_email(appt, tenant_name)
+            )
+            if result:
+                sent_count += 1
+            else:
+                failed_count += 1
+        employee = employees.get(appt.get("employee_id"))
+        if employee and employee.get("email"):
+            result = await send_email_async(
+                employee["email"],
+                f"Lembrete: Atendimento amanhã - {appt.get('client_name')} às {appt.get('time')}",
+                get_employee_reminder_email(appt, tenant_name)
+            )
+            if result:
+                sent_count += 1
+            else:
+                failed_count += 1
+    return {
+        "message": f"Lembretes enviados para {date}",
+        "appointments_count": len(appointments),
+        "emails_sent": sent_count,
+        "emails_failed": failed_count
+    }
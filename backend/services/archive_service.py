@@ -0,0 +1,125 @@
+"""
+Arquivamento de agendamentos antigos em coleções por ano.
+
+Agendamentos com data anterior ao horizonte (ARCHIVE_HORIZON_DAYS) saem de
+`appointments` e vão para `appointments_archive_<ano>`, em lotes: cada lote é
+inserido no arquivo e só então apagado da coleção quente. O índice único de
+appointment_id no arquivo torna a operação repetível: se o processo cair entre
+a inserção e a remoção, a próxima execução ignora as duplicatas e termina a
+remoção. Reservas de horário e disponibilidade materializada dos dias
+arquivados também são removidas, então a coleção quente e os seus índices
+guardam só o período em uso.
+
+Relatórios que precisam de datas arquivadas usam union_pipeline, que junta a
+coleção quente com os anos de arquivo que cruzam o período pedido.
+"""
+
+from backend.services.reservation_service import release_reservations
+from datetime import date as date_type, timedelta
+from pymongo import ASCENDING
+from pymongo.errors import BulkWriteError
+from collections import defaultdict
+from typing import List, Optional, Tuple
+import asyncio
+import os
+
+ARCHIVE_PREFIX = "appointments_archive_"
+ARCHIVE_HORIZON_DAYS = int(os.getenv("ARCHIVE_HORIZON_DAYS", "365"))
+ARCHIVE_CHUNK_SIZE = int(os.getenv("ARCHIVE_CHUNK_SIZE", "1000"))
+# Pausa entre lotes, em milissegundos
+ARCHIVE_CHUNK_PAUSE_MS = int(os.getenv("ARCHIVE_CHUNK_PAUSE_MS", "50"))
+
+# Índices de cada coleção anual: (chaves, opções). O único em appointment_id
+# torna idempotente a reexecução de um lote interrompido
+ARCHIVE_INDEXES: List[Tuple[List[Tuple[str, int]], dict]] = [
+    ([("appointment_id", ASCENDING)], {"unique": True}),
+    ([("tenant_id", ASCENDING), ("date", ASCENDING)], {}),
+    ([("tenant_id", ASCENDING), ("status", ASCENDING), ("date", ASCENDING)], {}),
+]
+
+
+def archive_collection_name(year: int) -> str:
+    return f"{ARCHIVE_PREFIX}{year}"
+
+
+async def ensure_archive_indexes(db, collection: str):
+    for keys, options in ARCHIVE_INDEXES:
+        await db[collection].create_index(keys, **options)
+
+
+def archive_cutoff(horizon_days: int = ARCHIVE_HORIZON_DAYS) -> str:
+    """Primeira data que continua na coleção quente."""
+    return (date_type.today() - timedelta(days=horizon_days)).isoformat()
+
+
+async def archive_years(db) -> List[int]:
+    names = await db.list_collection_names(filter={"name": {"$regex": f"^{ARCHIVE_PREFIX}[0-9]{{4}}$"}})
+    return sorted(int(name[len(ARCHIVE_PREFIX):]) for name in names)
+
+
+async def archive_sources(db, date_from: Optional[str] = None, date_to: Optional[str] = None) -> List[str]:
+    """Coleções de arquivo cujo ano cruza [date_from, date_to] (sem limites: todas)."""
+    first = int(date_from[:4]) if date_from else None
+    last = int(date_to[:4]) if date_to else None
+    return [
+        archive_collection_name(year) for year in await archive_years(db)
+        if (first is None or year >= first) and (last is None or year <= last)
+    ]
+
+
+def union_pipeline(match: dict, archives: List[str]) -> List[dict]:
+    """Estágios iniciais que leem ``match`` da coleção quente e dos arquivos indicados."""
+    return [{"$match": match}] + [
+        {"$unionWith": {"coll": archive, "pipeline": [{"$match": match}]}} for archive in archives
+    ]
+
+
+async def _move_chunk(db, docs: List[dict], ensured: set) -> int:
+    by_year = defaultdict(list)
+    for doc in docs:
+        by_year[int(doc["date"][:4])].append(doc)
+    for year, year_docs in by_year.items():
+        collection = archive_collection_name(year)
+        if collection not in ensured:
+            await ensure_archive_indexes(db, collection)
+            ensured.add(collection)
+        try:
+            await db[collection].insert_many(year_docs, ordered=False)
+        except BulkWriteError as exc:
+            # Duplicatas de uma execução interrompida já estão no arquivo
+            if any(error.get("code") != 11000 for error in exc.details.get("writeErrors", [])):
+                raise
+    ids = [doc["_id"] for doc in docs]
+    result = await db.appointments.delete_many({"_id": {"$in": ids}})
+    await release_reservations(db, [doc["appointment_id"] for doc in docs if doc.get("appointment_id")])
+    return result.deleted_count
+
+
+async def archive_appointments(
+    db, horizon_days: int = ARCHIVE_HORIZON_DAYS, chunk_size: int = ARCHIVE_CHUNK_SIZE,
+    pause_ms: int = ARCHIVE_CHUNK_PAUSE_MS, dry_run: bool = False
+) -> dict:
+    """Move para o arquivo os agendamentos anteriores ao horizonte; devolve contadores por ano."""
+    cutoff = archive_cutoff(horizon_days)
+    query = {"date": {"$lt": cutoff}}
+    if dry_run:
+        counts = await db.appointments.aggregate([
+            {"$match": query}, {"$group": {"_id": {"$substrCP": ["$date", 0, 4]}, "count": {"$sum": 1}}}
+        ]).to_list(None)
+        return {"cutoff": cutoff, "moved": 0, "by_year": {doc["_id"]: doc["count"] for doc in counts}}
+    moved = 0
+    by_year = defaultdict(int)
+    ensured = set()
+    while True:
+        docs = await db.appointments.find(query).sort([("date", ASCENDING), ("_id", ASCENDING)]).limit(chunk_size).to_list(chunk_size)
+        if not docs:
+            break
+        moved += await _move_chunk(db, docs, ensured)
+        for doc in docs:
+            by_year[doc["date"][:4]] += 1
+        if len(docs) < chunk_size:
+            break
+        await asyncio.sleep(pause_ms / 1000)
+    # Disponibilidade materializada de dias que já passaram do horizonte
+    await db.availability.delete_many({"date": {"$lt": cutoff}})
+    return {"cutoff": cutoff, "moved": moved, "by_year": dict(by_year)}
@@ -0,0 +1,524 @@
+from backend.utils.availability import (
+    DayHours, DayOccupancy, available_starts, available_start_mask, interval_mask, mask_to_minutes, minutes_to_time
+)
+from backend.services.reservation_service import SlotUnavailableError
+from backend.utils.scheduling import DayIntervals, ScheduleConflictError, overlap_filter, time_to_minutes
+from backend.services.working_hours_service import get_schedule, get_schedules
+from backend.utils.cache import availability_cache
+from datetime import date as date_type, datetime, timezone, timedelta
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+from pymongo import ASCENDING, ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+
+# Limite de dias por consulta de calendário
+MAX_CALENDAR_DAYS = 62
+
+# Limites da busca do próximo horário livre
+MAX_NEXT_AVAILABLE = 50
+MAX_HORIZON_DAYS = 180
+STREAM_BATCH_SIZE = 200
+
+# Status que ocupam a agenda do funcionário
+ACTIVE_STATUSES = ["pending", "confirmed"]
+
+BLOCK_FIELDS = {"_id": 0, "employee_id": 1, "date": 1, "start_time": 1, "end_time": 1, "is_whole_day": 1, "start_min": 1, "end_min": 1}
+APPOINTMENT_FIELDS = {"_id": 0, "employee_id": 1, "date": 1, "time": 1, "service_duration": 1, "start_min": 1, "end_min": 1}
+
+# Campos extras lidos nas validações de escrita (para apontar o conflito)
+CHECK_BLOCK_FIELDS = {**BLOCK_FIELDS, "blocked_id": 1, "reason": 1}
+CHECK_APPOINTMENT_FIELDS = {**APPOINTMENT_FIELDS, "appointment_id": 1, "client_name": 1}
+
+# ============== DISPONIBILIDADE MATERIALIZADA ==============
+#
+# A coleção `availability` guarda, por tenant/funcionário/dia, a lista de
+# intervalos livres já calculada. Cada escrita que afeta o dia incrementa
+# `version` e recalcula; o documento só é considerado válido quando
+# `computed_version == version`. A gravação do resultado é condicionada a
+# `computed_version < versão lida`, então um cálculo antigo nunca sobrescreve
+# um mais novo quando duas escritas concorrem no mesmo dia.
+
+
+def _day_key(tenant_id: str, employee_id: str, date: str) -> dict:
+    return {"tenant_id": tenant_id, "employee_id": employee_id, "date": date}
+
+
+def _day_fields(occupancy: DayOccupancy, version: int) -> dict:
+    return {
+        "whole_day": occupancy.whole_day,
+        "free": occupancy.free_intervals(),
+        "computed_version": version,
+        "updated_at": datetime.now(timezone.utc).isoformat()
+    }
+
+
+def iter_dates(date_from: str, date_to: str) -> List[str]:
+    """Lista as datas 'YYYY-MM-DD' de date_from até date_to (inclusive)."""
+    start = date_type.fromisoformat(date_from)
+    end = date_type.fromisoformat(date_to)
+    return [(start + timedelta(days=i)).isoformat() for i in range((end - start).days + 1)]
+
+
+async def compute_days(
+    db, tenant_id: str, employee_ids: List[str], date_from: str, date_to: str,
+    exclude_appointment_id: Optional[str] = None
+) -> Dict[Tuple[str, str], DayOccupancy]:
+    """Calcula a ocupação a partir de blocked_times e appointments com duas consultas."""
+    query = {"tenant_id": tenant_id, "employee_id": {"$in": employee_ids}, "date": {"$gte": date_from, "$lte": date_to}}
+    blocked = await db.blocked_times.find(query, BLOCK_FIELDS).to_list(None)
+    appointment_query = {**query, "status": {"$in": ACTIVE_STATUSES}}
+    if exclude_appointment_id:
+        appointment_query["appointment_id"] = {"$ne": exclude_appointment_id}
+    existing = await db.appointments.find(appointment_query, APPOINTMENT_FIELDS).to_list(None)
+    blocked_by_day = defaultdict(list)
+    for block in blocked:
+        blocked_by_day[(block["employee_id"], block["date"])].append(block)
+    existing_by_day = defaultdict(list)
+    for appt in existing:
+        existing_by_day[(appt["employee_id"], appt["date"])].append(appt)
+    return {
+        (employee_id, day): DayOccupancy.build(
+            blocked_by_day.get((employee_id, day), ()), existing_by_day.get((employee_id, day), ())
+        )
+        for employee_id in employee_ids
+        for day in iter_dates(date_from, date_to)
+    }
+
+
+async def load_availability(
+    db, tenant_id: str, employee_ids: List[str], date_from: str, date_to: str
+) -> Dict[Tuple[str, str], DayOccupancy]:
+    """
+    Lê a disponibilidade materializada de vários funcionários/dias.
+
+    Dias ausentes ou desatualizados são recalculados em lote e gravados de volta.
+    """
+    docs = await db.availability.find(
+        {"tenant_id": tenant_id, "employee_id": {"$in": employee_ids}, "date": {"$gte": date_from, "$lte": date_to}},
+        {"_id": 0}
+    ).to_list(None)
+    by_key = {(doc["employee_id"], doc["date"]): doc for doc in docs}
+    result = {}
+    stale = []
+    for employee_id in employee_ids:
+        for day in iter_dates(date_from, date_to):
+            doc = by_key.get((employee_id, day))
+            if doc and doc.get("computed_version") == doc.get("version"):
+                result[(employee_id, day)] = DayOccupancy.from_free_intervals(doc.get("free", []), doc.get("whole_day", False))
+            else:
+                stale.append((employee_id, day))
+    if not stale:
+        return result
+    computed = await compute_days(
+        db, tenant_id,
+        sorted({employee_id for employee_id, _ in stale}),
+        min(day for _, day in stale),
+        max(day for _, day in stale)
+    )
+    operations = []
+    for key in stale:
+        occupancy = computed[key]
+        result[key] = occupancy
+        doc = by_key.get(key)
+        if doc is None:
+            operations.append(UpdateOne(
+                _day_key(tenant_id, *key),
+                {"$setOnInsert": {**_day_fields(occupancy, 0), "version": 0}},
+                upsert=True
+            ))
+        else:
+            version = doc.get("version", 0)
+            operations.append(UpdateOne(
+                {**_day_key(tenant_id, *key), "computed_version": {"$lt": version}},
+                {"$set": _day_fields(occupancy, version)}
+            ))
+    try:
+        await db.availability.bulk_write(operations, ordered=False)
+    except BulkWriteError:
+        # Upsert concorrente do mesmo dia: outro processo já gravou o documento
+        pass
+    return result
+
+
+async def refresh_employee_day(db, tenant_id: str, employee_id: str, date: str):
+    """Marca o dia como alterado e recalcula seu documento de disponibilidade."""
+    key = _day_key(tenant_id, employee_id, date)
+    update = {"$inc": {"version": 1}, "$setOnInsert": {"computed_version": 0}}
+    try:
+        doc = await db.availability.find_one_and_update(
+            key, update, projection={"_id": 0, "version": 1}, upsert=True, return_document=ReturnDocument.AFTER
+        )
+    except DuplicateKeyError:
+        # Outro processo criou o documento entre a busca e a inserção do upsert
+        doc = await db.availability.find_one_and_update(
+            key, update, projection={"_id": 0, "version": 1}, return_document=ReturnDocument.AFTER
+        )
+    occupancy = (await compute_days(db, tenant_id, [employee_id], date, date))[(employee_id, date)]
+    await db.availability.update_one(
+        {**key, "computed_version": {"$lt": doc["version"]}},
+        {"$set": _day_fields(occupancy, doc["version"])}
+    )
+
+
+async def on_schedule_change(db, tenant_id: str, employee_id: str, dates: Iterable[str]):
+    """
+    Chamado pelas rotas/serviços de escrita sempre que a agenda de um ou mais dias muda.
+
+    Vários dias (ex.: uma série recorrente) são marcados com um único bulk_write
+    e recalculados juntos por load_availability.
+    """
+    dates = sorted({d for d in dates if d})
+    if not dates:
+        return
+    if len(dates) == 1:
+        await refresh_employee_day(db, tenant_id, employee_id, dates[0])
+    else:
+        operations = [
+            UpdateOne(
+                _day_key(tenant_id, employee_id, date),
+                {"$inc": {"version": 1}, "$setOnInsert": {"computed_version": 0}},
+                upsert=True
+            )
+            for date in dates
+        ]
+        try:
+            await db.availability.bulk_write(operations, ordered=False)
+        except BulkWriteError:
+            # Upsert concorrente: repetir só incrementa de novo a versão, o que é inofensivo
+            await db.availability.bulk_write(operations, ordered=False)
+        await load_availability(db, tenant_id, [employee_id], dates[0], dates[-1])
+    # Invalida depois de recalcular: leituras que usaram o documento antigo são rejeitadas no put
+    for date in dates:
+        availability_cache.invalidate_day((tenant_id, employee_id, date))
+
+
+async def rebuild_availability(
+    db, tenant_id: str, date_from: str, date_to: str, employee_ids: Optional[List[str]] = None
+) -> int:
+    """Regera os documentos de disponibilidade de um tenant para um intervalo de datas."""
+    if employee_ids is None:
+        employees = await db.employees.find({"tenant_id": tenant_id}, {"_id": 0, "employee_id": 1}).to_list(None)
+        employee_ids = [emp["employee_id"] for emp in employees]
+    total = 0
+    for employee_id in employee_ids:
+        for day in iter_dates(date_from, date_to):
+            await refresh_employee_day(db, tenant_id, employee_id, day)
+            total += 1
+    return total
+
+
+async def load_days_intervals(
+    db, tenant_id: str, employee_id: str, dates: Iterable[str],
+    exclude_appointment_ids: Iterable[str] = (), exclude_blocked_id: Optional[str] = None,
+    include_blocks: bool = True, window: Optional[Tuple[int, int]] = None
+) -> Dict[str, DayIntervals]:
+    """
+    Lê da fonte (sem cache) os intervalos ocupados de um funcionário em vários dias, com duas consultas.
+
+    Com ``window`` = (início, fim) só vêm os documentos que cruzam esse trecho
+    do dia (predicado em start_min/end_min, coberto pelo índice).
+    """
+    dates = sorted(set(dates))
+    query = {"tenant_id": tenant_id, "employee_id": employee_id, "date": {"$in": dates}}
+    if window is not None:
+        query.update(overlap_filter(*window))
+    blocked_by_day = defaultdict(list)
+    if include_blocks:
+        block_query = dict(query)
+        if exclude_blocked_id:
+            block_query["blocked_id"] = {"$ne": exclude_blocked_id}
+        for block in await db.blocked_times.find(block_query, CHECK_BLOCK_FIELDS).to_list(None):
+            blocked_by_day[block["date"]].append(block)
+    appointment_query = {**query, "status": {"$in": ACTIVE_STATUSES}}
+    exclude_appointment_ids = list(exclude_appointment_ids)
+    if exclude_appointment_ids:
+        appointment_query["appointment_id"] = {"$nin": exclude_appointment_ids}
+    existing_by_day = defaultdict(list)
+    for appt in await db.appointments.find(appointment_query, CHECK_APPOINTMENT_FIELDS).to_list(None):
+        existing_by_day[appt["date"]].append(appt)
+    return {day: DayIntervals.from_documents(blocked_by_day.get(day, ()), existing_by_day.get(day, ())) for day in dates}
+
+
+async def load_day_intervals(
+    db, tenant_id: str, employee_id: str, date: str,
+    exclude_appointment_id: Optional[str] = None, exclude_blocked_id: Optional[str] = None,
+    include_blocks: bool = True, window: Optional[Tuple[int, int]] = None
+) -> DayIntervals:
+    """Lê da fonte (sem cache) os intervalos ocupados de um funcionário em um dia."""
+    excluded = [exclude_appointment_id] if exclude_appointment_id else []
+    days = await load_days_intervals(db, tenant_id, employee_id, [date], excluded, exclude_blocked_id, include_blocks, window)
+    return days[date]
+
+
+def slot_conflict(hours: DayHours, intervals: DayIntervals, start: int, duration: int) -> Optional[str]:
+    """Motivo pelo qual [start, start + duration) não pode ser agendado, ou None se estiver livre."""
+    wanted = interval_mask(start, start + duration)
+    if hours.closed or not hours.can_start(start) or hours.open & wanted != wanted:
+        return "Horário fora do expediente"
+    conflict = intervals.find_overlap(start, start + duration)
+    if conflict is None:
+        return None
+    if conflict.kind == "block":
+        return "Este dia está bloqueado" if conflict.doc.get("is_whole_day") else "Horário bloqueado"
+    return "Horário já reservado"
+
+
+async def assert_slot_free(
+    db, tenant_id: str, employee_id: str, date: str, start: int, duration: int,
+    exclude_appointment_id: Optional[str] = None
+):
+    """
+    Confere na fonte (sem cache) se o intervalo cabe no expediente e está livre.
+
+    A garantia contra concorrência vem da reserva em slot_reservations; esta
+    leitura cobre bloqueios, expediente e agendamentos gravados antes das reservas.
+    """
+    hours = (await get_schedule(db, tenant_id, employee_id)).day_hours(date)
+    if hours.closed:
+        raise SlotUnavailableError("Horário fora do expediente")
+    intervals = await load_day_intervals(
+        db, tenant_id, employee_id, date, exclude_appointment_id, window=(start, start + duration)
+    )
+    reason = slot_conflict(hours, intervals, start, duration)
+    if reason:
+        raise SlotUnavailableError(reason)
+
+
+async def check_slots(
+    db, tenant_id: str, employee_id: str, occurrences: List[Tuple[str, int, int]],
+    exclude_appointment_ids: Iterable[str] = ()
+) -> List[Optional[str]]:
+    """
+    Versão em lote de assert_slot_free para várias datas (séries recorrentes).
+
+    ``occurrences`` são tuplas (data, início, duração); devolve, na mesma ordem,
+    o motivo do conflito de cada uma ou None. Faz uma única leitura de
+    expediente, bloqueios e agendamentos para todas as datas.
+    """
+    schedule = await get_schedule(db, tenant_id, employee_id)
+    window = (
+        min(start for _, start, _ in occurrences),
+        max(start + duration for _, start, duration in occurrences)
+    ) if occurrences else None
+    days = await load_days_intervals(
+        db, tenant_id, employee_id, [day for day, _, _ in occurrences], exclude_appointment_ids, window=window
+    )
+    return [
+        slot_conflict(schedule.day_hours(day), days[day], start, duration)
+        for day, start, duration in occurrences
+    ]
+
+
+async def assert_block_allowed(
+    db, tenant_id: str, employee_id: str, date: str,
+    start_time: Optional[str] = None, end_time: Optional[str] = None
+):
+    """
+    Impede bloquear um período que tenha agendamentos ativos.
+
+    Todos os agendamentos do dia entram na verificação (não só o primeiro), com
+    a duração completa de cada serviço.
+    """
+    whole_day = not (start_time and end_time)
+    if whole_day:
+        intervals = await load_day_intervals(db, tenant_id, employee_id, date, include_blocks=False)
+        if len(intervals):
+            raise ScheduleConflictError("Existem agendamentos neste dia. Cancele os agendamentos primeiro.")
+        return
+    start, end = time_to_minutes(start_time), time_to_minutes(end_time)
+    if end <= start:
+        raise ValueError("Horário final deve ser depois do inicial")
+    intervals = await load_day_intervals(db, tenant_id, employee_id, date, include_blocks=False, window=(start, end))
+    conflict = intervals.find_overlap(start, end)
+    if conflict is not None:
+        raise ScheduleConflictError(
+            f"Existe agendamento às {minutes_to_time(conflict.start)} neste horário. Cancele o agendamento primeiro."
+        )
+
+
+# ============== CONSULTAS DE HORÁRIOS ==============
+
+async def load_employee_day(db, tenant_id: str, employee_id: str, date: str) -> DayOccupancy:
+    """Lê a ocupação de um funcionário em um dia (leitura pontual da coleção materializada)."""
+    return (await load_availability(db, tenant_id, [employee_id], date, date))[(employee_id, date)]
+
+
+async def get_available_slots(db, tenant_id: str, employee_id: str, date: str, duration: int):
+    """Retorna os horários livres de um funcionário em uma data para um serviço."""
+    day = (tenant_id, employee_id, date)
+    key = (*day, duration)
+    cached = availability_cache.get(key)
+    if cached is not None:
+        return cached
+    token = availability_cache.token(day)
+    hours = (await get_schedule(db, tenant_id, employee_id)).day_hours(date)
+    if hours.closed:
+        result = {"slots": [], "message": "Sem expediente neste dia"}
+    else:
+        occupancy = await load_employee_day(db, tenant_id, employee_id, date)
+        if occupancy.whole_day:
+            result = {"slots": [], "message": "Este dia está bloqueado"}
+        else:
+            result = {"slots": available_starts(occupancy, duration, hours)}
+    availability_cache.put(key, day, result, token)
+    return result
+
+
+async def load_employee_range(db, tenant_id: str, employee_id: str, date_from: str, date_to: str) -> Dict[str, DayOccupancy]:
+    """Lê o intervalo inteiro de uma vez e devolve um bitmap por dia."""
+    availability = await load_availability(db, tenant_id, [employee_id], date_from, date_to)
+    return {day: availability[(employee_id, day)] for day in iter_dates(date_from, date_to)}
+
+
+async def get_available_calendar(db, tenant_id: str, employee_id: str, date_from: str, date_to: str, duration: int):
+    """Retorna um mapa dia -> horários livres para todo o intervalo."""
+    schedule = await get_schedule(db, tenant_id, employee_id)
+    days = {}
+    blocked_days = []
+    for day, occupancy in (await load_employee_range(db, tenant_id, employee_id, date_from, date_to)).items():
+        if occupancy.whole_day:
+            blocked_days.append(day)
+        days[day] = available_starts(occupancy, duration, schedule.day_hours(day))
+    return {"days": days, "blocked_days": blocked_days}
+
+
+async def load_employees_day(db, tenant_id: str, employee_ids: List[str], date: str) -> Dict[str, DayOccupancy]:
+    """Carrega a agenda de vários funcionários no mesmo dia em lote."""
+    availability = await load_availability(db, tenant_id, employee_ids, date, date)
+    return {employee_id: availability[(employee_id, date)] for employee_id in employee_ids}
+
+
+async def get_any_employee_slots(db, tenant_id: str, service_id: str, date: str, duration: int):
+    """
+    Une os horários livres de todos os funcionários ativos que realizam o serviço.
+
+    Cada horário vem acompanhado dos funcionários livres nele.
+    """
+    employees = await db.employees.find(
+        {"tenant_id": tenant_id, "is_active": True, "service_ids": service_id},
+        {"_id": 0, "employee_id": 1, "name": 1}
+    ).to_list(None)
+    if not employees:
+        return {"slots": [], "employees": {}}
+    employee_ids = [emp["employee_id"] for emp in employees]
+    occupancies = await load_employees_day(db, tenant_id, employee_ids, date)
+    schedules = await get_schedules(db, tenant_id, employee_ids)
+    masks = {
+        employee_id: available_start_mask(occupancy, duration, schedules[employee_id].day_hours(date))
+        for employee_id, occupancy in occupancies.items()
+    }
+    union = 0
+    for mask in masks.values():
+        union |= mask
+    slots = []
+    for minute in mask_to_minutes(union):
+        bit = 1 << minute
+        slots.append({
+            "time": minutes_to_time(minute),
+            "employee_ids": [employee_id for employee_id in employee_ids if masks[employee_id] & bit]
+        })
+    return {"slots": slots, "employees": {emp["employee_id"]: emp.get("name") for emp in employees}}
+
+
+# ============== PRÓXIMO HORÁRIO LIVRE ==============
+
+class _DayStream:
+    """Percorre um cursor ordenado por data entregando os documentos de um dia por vez."""
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+        self._iterator = cursor.__aiter__()
+        self._pending = None
+        self._exhausted = False
+
+    async def take(self, day: str) -> List[dict]:
+        docs = []
+        while not self._exhausted:
+            if self._pending is None:
+                try:
+                    self._pending = await anext(self._iterator)
+                except StopAsyncIteration:
+                    self._exhausted = True
+                    break
+            if self._pending["date"] > day:
+                break
+            if self._pending["date"] == day:
+                docs.append(self._pending)
+            self._pending = None
+        return docs
+
+    async def close(self):
+        await self._cursor.close()
+
+
+async def find_next_available(
+    db,
+    tenant_id: str,
+    service_id: str,
+    duration: int,
+    employee_id: Optional[str] = None,
+    count: int = 5,
+    horizon_days: int = 30,
+    now: Optional[datetime] = None
+):
+    """
+    Retorna os primeiros ``count`` horários livres a partir de agora.
+
+    Os dias são percorridos em ordem com um único cursor sobre appointments e
+    outro sobre blocked_times, ambos ordenados por data; a busca para assim que
+    ``count`` horários são encontrados, sem ler o restante do horizonte.
+    """
+    now = now or datetime.now()
+    if employee_id:
+        employee_ids = [employee_id]
+    else:
+        employees = await db.employees.find(
+            {"tenant_id": tenant_id, "is_active": True, "service_ids": service_id},
+            {"_id": 0, "employee_id": 1}
+        ).to_list(None)
+        employee_ids = [emp["employee_id"] for emp in employees]
+    if not employee_ids:
+        return {"slots": []}
+    schedules = await get_schedules(db, tenant_id, employee_ids)
+    date_from = now.date().isoformat()
+    date_to = (now.date() + timedelta(days=horizon_days - 1)).isoformat()
+    query = {"tenant_id": tenant_id, "employee_id": {"$in": employee_ids}, "date": {"$gte": date_from, "$lte": date_to}}
+    blocked = _DayStream(
+        db.blocked_times.find(query, BLOCK_FIELDS).sort("date", ASCENDING).batch_size(STREAM_BATCH_SIZE)
+    )
+    existing = _DayStream(
+        db.appointments.find({**query, "status": {"$in": ACTIVE_STATUSES}}, APPOINTMENT_FIELDS)
+        .sort("date", ASCENDING).batch_size(STREAM_BATCH_SIZE)
+    )
+    slots = []
+    try:
+        for day in iter_dates(date_from, date_to):
+            blocked_by_employee = defaultdict(list)
+            for block in await blocked.take(day):
+                blocked_by_employee[block["employee_id"]].append(block)
+            existing_by_employee = defaultdict(list)
+            for appt in await existing.take(day):
+                existing_by_employee[appt["employee_id"]].append(appt)
+            masks = {}
+            for emp_id in employee_ids:
+                occupancy = DayOccupancy.build(blocked_by_employee.get(emp_id, ()), existing_by_employee.get(emp_id, ()))
+                masks[emp_id] = available_start_mask(occupancy, duration, schedules[emp_id].day_hours(day))
+            union = 0
+            for mask in masks.values():
+                union |= mask
+            if day == date_from:
+                # Hoje só valem horários que ainda não começaram
+                union &= ~((1 << (now.hour * 60 + now.minute + 1)) - 1)
+            for minute in mask_to_minutes(union):
+                bit = 1 << minute
+                slots.append({
+                    "date": day,
+                    "time": minutes_to_time(minute),
+                    "employee_ids": [emp_id for emp_id in employee_ids if masks[emp_id] & bit]
+                })
+                if len(slots) >= count:
+                    return {"slots": slots}
+    finally:
+        await blocked.close()
+        await existing.close()
+    return {"slots": slots}
@@ -1,4 +1,6 @@
 from backend.models.employee import Employee, EmployeeCreate
+from backend.utils.loader import get_loaders
+from backend.services.propagation_service import enqueue_propagation, denormalized_changes
 from datetime import datetime, timezone
 import uuid
 from typing import List
@@ -11,12 +13,6 @@ async def list_employees(db, tenant_slug: str):
         {"tenant_id": tenant["tenant_id"], "is_active": True},
         {"_id": 0}
     ).to_list(100)
-    # Garante que todos os campos obrigatórios existam
-    for emp in employees:
-        if "created_at" not in emp:
-            emp["created_at"] = datetime.now(timezone.utc).isoformat()
-        if "service_ids" not in emp:
-            emp["service_ids"] = []
     return employees
 
 async def list_all_employees(db, tenant_id: str):
@@ -24,15 +20,6 @@ async def list_all_employees(db, tenant_id: str):
         {"tenant_id": tenant_id},
         {"_id": 0}
     ).to_list(100)
-    for emp in employees:
-        if emp.get("tenant_id") != tenant_id:
-            print(f"[SECURITY] Tentativa de acesso cruzado de tenant em funcionário: {emp}")
-        if "created_at" not in emp:
-            emp["created_at"] = datetime.now(timezone.utc).isoformat()
-        if "service_ids" not in emp:
-            emp["service_ids"] = []
-        if "tenant_id" not in emp:
-            print(f"[SECURITY] Funcionário sem tenant_id detectado: {emp}")
     return employees
 
 async def create_employee(db, tenant_id: str, data: EmployeeCreate):
@@ -51,12 +38,16 @@ async def create_employee(db, tenant_id: str, data: EmployeeCreate):
 async def update_employee(db, tenant_id: str, employee_id: str, data: EmployeeCreate):
     if not tenant_id:
         raise Exception("tenant_id obrigatório para atualizar funcionário")
-    result = await db.employees.update_one(
+    previous = await db.employees.find_one_and_update(
         {"employee_id": employee_id, "tenant_id": tenant_id},
-        {"$set": data.model_dump()}
+        {"$set": data.model_dump()},
+        projection={"_id": 0}
     )
-    if result.matched_count == 0:
+    if previous is None:
         raise Exception("Funcionário não encontrado")
+    # Agendamentos futuros recebem os novos campos desnormalizados em segundo plano
+    await enqueue_propagation(db, tenant_id, "employee", employee_id, denormalized_changes("employee", previous, data.model_dump()))
+    get_loaders(db).employees.clear(employee_id)
     employee = await db.employees.find_one({"employee_id": employee_id}, {"_id": 0})
     return Employee(**employee)
 
@@ -66,4 +57,5 @@ async def delete_employee(db, tenant_id: str, employee_id: str):
     )
     if result.deleted_count == 0:
         raise Exception("Funcionário não encontrado")
+    get_loaders(db).employees.clear(employee_id)
     return {"message": "Funcionário removido com sucesso"}
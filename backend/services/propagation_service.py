@@ -0,0 +1,227 @@
+"""
+Propagação dos campos desnormalizados de serviço/funcionário para os agendamentos.
+
+Os agendamentos guardam service_name, service_price e employee_name para a
+listagem não precisar de joins. Quando um serviço ou funcionário muda, um job
+é gravado em `propagation_jobs` e um worker em segundo plano aplica os novos
+valores aos agendamentos futuros ainda ativos, em lotes de PROPAGATION_CHUNK_SIZE
+com uma pausa entre lotes, para um renome num salão grande não disputar o
+banco com as requisições. O progresso (total/updated) fica no próprio job.
+
+O filtro só pega agendamentos com algum campo diferente do novo valor, então
+reprocessar um job é seguro: um job interrompido (worker reiniciado) é
+retomado por qualquer worker depois de PROPAGATION_STALE_SECONDS sem
+heartbeat. O índice único parcial em (tenant_id, entity, entity_id) dos jobs
+em execução impede dois jobs da mesma entidade rodando ao mesmo tempo, e
+cada lote relê os valores atuais da entidade: um job antigo nunca grava por
+cima de um nome ou preço mais novo. service_duration não é propagado: a
+duração faz parte do horário já reservado.
+"""
+
+from backend.services.availability_service import ACTIVE_STATUSES
+from datetime import date as date_type, datetime, timezone, timedelta
+from pymongo import ASCENDING, ReturnDocument
+from pymongo.errors import DuplicateKeyError
+from typing import Optional
+import asyncio
+import logging
+import os
+import uuid
+
+logger = logging.getLogger(__name__)
+
+PROPAGATION_CHUNK_SIZE = int(os.getenv("PROPAGATION_CHUNK_SIZE", "500"))
+# Pausa entre lotes, em milissegundos
+PROPAGATION_CHUNK_PAUSE_MS = int(os.getenv("PROPAGATION_CHUNK_PAUSE_MS", "100"))
+PROPAGATION_POLL_SECONDS = float(os.getenv("PROPAGATION_POLL_SECONDS", "30"))
+PROPAGATION_STALE_SECONDS = int(os.getenv("PROPAGATION_STALE_SECONDS", "300"))
+
+# Campo da entidade -> campo desnormalizado no agendamento
+PROPAGATED_FIELDS = {
+    "service": {"name": "service_name", "price": "service_price"},
+    "employee": {"name": "employee_name"},
+}
+ENTITY_KEYS = {"service": "service_id", "employee": "employee_id"}
+ENTITY_COLLECTIONS = {"service": "services", "employee": "employees"}
+
+# Acorda o worker quando um job é enfileirado
+_wake = asyncio.Event()
+
+
+def denormalized_changes(entity: str, before: Optional[dict], after: dict) -> dict:
+    """Campos desnormalizados (já com o nome do agendamento) que mudaram entre ``before`` e ``after``."""
+    return {
+        target: after.get(source)
+        for source, target in PROPAGATED_FIELDS[entity].items()
+        if before is None or before.get(source) != after.get(source)
+    }
+
+
+async def enqueue_propagation(db, tenant_id: str, entity: str, entity_id: str, fields: dict):
+    """
+    Enfileira a propagação de ``fields`` para os agendamentos da entidade.
+
+    Se já houver um job na fila para a mesma entidade, os campos são
+    mesclados nele (vale o valor mais recente) em vez de criar outro.
+    """
+    if not fields:
+        return None
+    now = datetime.now(timezone.utc).isoformat()
+    job = await db.propagation_jobs.find_one_and_update(
+        {"tenant_id": tenant_id, "entity": entity, "entity_id": entity_id, "status": "queued"},
+        {
+            "$set": {f"fields.{field}": value for field, value in fields.items()},
+            "$setOnInsert": {
+                "job_id": f"prop_{uuid.uuid4().hex[:12]}",
+                "total": 0,
+                "updated": 0,
+                "created_at": now
+            }
+        },
+        upsert=True,
+        projection={"_id": 0},
+        return_document=ReturnDocument.AFTER
+    )
+    _wake.set()
+    return job
+
+
+async def list_propagation_jobs(db, tenant_id: str, status: Optional[str] = None, limit: int = 50):
+    query = {"tenant_id": tenant_id}
+    if status:
+        query["status"] = status
+    return await db.propagation_jobs.find(query, {"_id": 0}).sort("created_at", -1).to_list(limit)
+
+
+async def get_propagation_job(db, tenant_id: str, job_id: str):
+    return await db.propagation_jobs.find_one({"tenant_id": tenant_id, "job_id": job_id}, {"_id": 0})
+
+
+def _stale_filter(job: dict, fields: dict) -> dict:
+    """Agendamentos futuros e ativos da entidade com algum campo diferente de ``fields``."""
+    return {
+        "tenant_id": job["tenant_id"],
+        ENTITY_KEYS[job["entity"]]: job["entity_id"],
+        "date": {"$gte": date_type.today().isoformat()},
+        "status": {"$in": ACTIVE_STATUSES},
+        "$or": [{field: {"$ne": value}} for field, value in fields.items()]
+    }
+
+
+async def current_fields(db, job: dict) -> dict:
+    """Valores atuais da entidade para os campos do job (os do job, se ela foi removida)."""
+    entity = await db[ENTITY_COLLECTIONS[job["entity"]]].find_one(
+        {"tenant_id": job["tenant_id"], ENTITY_KEYS[job["entity"]]: job["entity_id"]}, {"_id": 0}
+    )
+    if entity is None:
+        return job["fields"]
+    return {
+        target: entity.get(source)
+        for source, target in PROPAGATED_FIELDS[job["entity"]].items()
+        if target in job["fields"]
+    }
+
+
+async def claim_next_job(db):
+    """
+    Pega atomicamente o job mais antigo na fila (ou um em execução sem heartbeat recente).
+
+    Entidades com um job em execução ficam de fora até ele terminar: marcar o
+    job como running esbarra no índice único parcial e ele fica para depois.
+    """
+    now = datetime.now(timezone.utc)
+    stale_before = (now - timedelta(seconds=PROPAGATION_STALE_SECONDS)).isoformat()
+    claimable = {"$or": [{"status": "queued"}, {"status": "running", "heartbeat_at": {"$lt": stale_before}}]}
+    busy = []
+    while True:
+        query = {**claimable, "$nor": busy} if busy else claimable
+        try:
+            job = await db.propagation_jobs.find_one_and_update(
+                query,
+                {"$set": {"status": "running", "started_at": now.isoformat(), "heartbeat_at": now.isoformat()}},
+                sort=[("created_at", ASCENDING)],
+                projection={"_id": 0}
+            )
+        except DuplicateKeyError:
+            # Outro worker executa um job desta entidade; tenta o próximo da fila
+            candidate = await db.propagation_jobs.find_one(
+                query, {"_id": 0, "tenant_id": 1, "entity": 1, "entity_id": 1}, sort=[("created_at", ASCENDING)]
+            )
+            if not candidate:
+                return None
+            busy.append(candidate)
+            continue
+        if job:
+            job["status"] = "running"
+        return job
+
+
+async def run_propagation_job(db, job: dict, chunk_size: int = PROPAGATION_CHUNK_SIZE, pause_ms: int = PROPAGATION_CHUNK_PAUSE_MS) -> int:
+    """Aplica o job em lotes; devolve o número de agendamentos atualizados."""
+    fields = await current_fields(db, job)
+    total = await db.appointments.count_documents(_stale_filter(job, fields))
+    await db.propagation_jobs.update_one({"job_id": job["job_id"]}, {"$set": {"total": total, "updated": 0}})
+    updated = 0
+    last_id = None
+    while True:
+        # Relido a cada lote: um renome feito durante o job vale a partir do próximo lote
+        fields = await current_fields(db, job)
+        stale = _stale_filter(job, fields)
+        query = stale if last_id is None else {**stale, "_id": {"$gt": last_id}}
+        ids = [doc["_id"] for doc in await db.appointments.find(query, {"_id": 1}).sort("_id", ASCENDING).limit(chunk_size).to_list(chunk_size)]
+        if not ids:
+            break
+        last_id = ids[-1]
+        # O filtro é repetido na escrita: um agendamento cancelado entre a leitura e a escrita fica de fora
+        result = await db.appointments.update_many({**stale, "_id": {"$in": ids}}, {"$set": fields})
+        updated += result.modified_count
+        await db.propagation_jobs.update_one(
+            {"job_id": job["job_id"]},
+            {"$set": {"updated": updated, "heartbeat_at": datetime.now(timezone.utc).isoformat()}}
+        )
+        if len(ids) < chunk_size:
+            break
+        await asyncio.sleep(pause_ms / 1000)
+    return updated
+
+
+async def process_next_job(db) -> bool:
+    """Processa um job da fila; devolve False se a fila estava vazia."""
+    job = await claim_next_job(db)
+    if not job:
+        return False
+    try:
+        await run_propagation_job(db, job)
+    except Exception as exc:
+        logger.error(f"Falha ao propagar {job['entity']} {job['entity_id']}: {exc!r}")
+        await db.propagation_jobs.update_one(
+            {"job_id": job["job_id"]},
+            {"$set": {"status": "failed", "error": str(exc), "finished_at": datetime.now(timezone.utc).isoformat()}}
+        )
+        return True
+    await db.propagation_jobs.update_one(
+        {"job_id": job["job_id"]},
+        {"$set": {"status": "done", "finished_at": datetime.now(timezone.utc).isoformat()}}
+    )
+    return True
+
+
+async def propagation_worker(db):
+    """Laço do worker: esvazia a fila e espera um novo job (ou o intervalo de varredura)."""
+    while True:
+        _wake.clear()
+        try:
+            while await process_next_job(db):
+                pass
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:
+            logger.error(f"Worker de propagação: {exc!r}")
+        try:
+            await asyncio.wait_for(_wake.wait(), PROPAGATION_POLL_SECONDS)
+        except asyncio.TimeoutError:
+            pass
+
+
+def start_propagation_worker(db) -> asyncio.Task:
+    return asyncio.create_task(propagation_worker(db))
@@ -1,8 +1,24 @@
 from datetime import datetime
+from typing import Optional
+from backend.services.archive_service import archive_sources, union_pipeline
+from backend.utils.export import EXPORT_BATCH_SIZE
 
-async def get_revenue_report(db, tenant_id: str):
-    pipeline = [
-        {"$match": {"tenant_id": tenant_id, "status": "completed"}},
+REVENUE_EXPORT_COLUMNS = ["date", "total", "count"]
+
+def _revenue_match(tenant_id: str, date_from: Optional[str], date_to: Optional[str]):
+    match = {"tenant_id": tenant_id, "status": "completed"}
+    if date_from or date_to:
+        match["date"] = {}
+        if date_from:
+            match["date"]["$gte"] = date_from
+        if date_to:
+            match["date"]["$lte"] = date_to
+    return match
+
+async def _revenue_pipeline(db, tenant_id: str, date_from: Optional[str] = None, date_to: Optional[str] = None):
+    """Faturamento por dia; inclui os anos arquivados que cruzam o período pedido."""
+    match = _revenue_match(tenant_id, date_from, date_to)
+    return union_pipeline(match, await archive_sources(db, date_from, date_to)) + [
         {"$group": {
             "_id": "$date",
             "total": {"$sum": "$service_price"},
@@ -10,5 +26,14 @@ async def get_revenue_report(db, tenant_id: str):
         }},
         {"$sort": {"_id": 1}}
     ]
+
+async def get_revenue_report(db, tenant_id: str, date_from: Optional[str] = None, date_to: Optional[str] = None):
+    pipeline = await _revenue_pipeline(db, tenant_id, date_from, date_to)
     result = await db.appointments.aggregate(pipeline).to_list(100)
     return result
+
+async def export_revenue_cursor(db, tenant_id: str, date_from: Optional[str] = None, date_to: Optional[str] = None):
+    """Faturamento por dia, sem o limite de 100 dias do relatório, lido em lotes."""
+    pipeline = await _revenue_pipeline(db, tenant_id, date_from, date_to)
+    pipeline.append({"$project": {"_id": 0, "date": "$_id", "total": 1, "count": 1}})
+    return db.appointments.aggregate(pipeline, allowDiskUse=True, batchSize=EXPORT_BATCH_SIZE)
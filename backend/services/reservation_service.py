@@ -0,0 +1,150 @@
+"""
+Reservas de horário garantidas pelo banco.
+
+Cada agendamento ativo ocupa documentos em `slot_reservations`, um por bloco
+de RESERVATION_UNIT minutos do intervalo [início, fim). O índice único em
+(tenant_id, employee_id, date, unit) faz o MongoDB rejeitar atomicamente a
+segunda reserva de qualquer bloco, então dois agendamentos sobrepostos nunca
+são gravados, mesmo com horários de início diferentes ou sob concorrência.
+
+Início e duração precisam ser múltiplos de RESERVATION_UNIT: um horário fora
+da grade ocuparia o bloco inteiro e recusaria um vizinho encostado nele
+(10:02-10:32 e 10:32-11:02 dividiriam o bloco 10:30).
+"""
+
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Iterable, List, Set, Tuple
+import uuid
+
+from backend.utils.scheduling import ScheduleConflictError, RESERVATION_UNIT, is_aligned
+
+
+class SlotUnavailableError(ScheduleConflictError):
+    """O intervalo pedido já está ocupado na agenda do funcionário."""
+
+
+class MisalignedSlotError(ValueError):
+    """Início ou duração fora da grade de RESERVATION_UNIT minutos."""
+
+
+def reservation_units(start: int, duration: int) -> List[int]:
+    """Blocos de RESERVATION_UNIT minutos de [start, start + duration); levanta MisalignedSlotError fora da grade."""
+    if not is_aligned(start, duration):
+        raise MisalignedSlotError(f"Horário e duração devem ser múltiplos de {RESERVATION_UNIT} minutos")
+    return list(range(start // RESERVATION_UNIT, (start + duration) // RESERVATION_UNIT))
+
+
+# (appointment_id, data, início, duração) de cada agendamento em uma operação em lote
+ReservationItem = Tuple[str, str, int, int]
+
+
+def _unit_docs(tenant_id: str, employee_id: str, date: str, units: Iterable[int], appointment_id: str, hold_id: str) -> List[dict]:
+    created_at = datetime.now(timezone.utc).isoformat()
+    return [
+        {
+            "tenant_id": tenant_id,
+            "employee_id": employee_id,
+            "date": date,
+            "unit": unit,
+            "appointment_id": appointment_id,
+            "hold_id": hold_id,
+            "created_at": created_at
+        }
+        for unit in units
+    ]
+
+
+async def _insert_docs(db, docs: List[dict], hold_id: str):
+    if not docs:
+        return
+    try:
+        await db.slot_reservations.insert_many(docs, ordered=True)
+    except (BulkWriteError, DuplicateKeyError):
+        # Desfaz os blocos desta tentativa que chegaram a ser gravados
+        await db.slot_reservations.delete_many({"hold_id": hold_id})
+        raise SlotUnavailableError("Horário já reservado")
+
+
+async def _insert_units(db, tenant_id: str, employee_id: str, date: str, units: Iterable[int], appointment_id: str):
+    hold_id = uuid.uuid4().hex
+    await _insert_docs(db, _unit_docs(tenant_id, employee_id, date, units, appointment_id, hold_id), hold_id)
+
+
+async def reserve_slot(db, tenant_id: str, employee_id: str, date: str, start: int, duration: int, appointment_id: str):
+    """Reserva [start, start + duration) para o agendamento ou levanta SlotUnavailableError."""
+    await _insert_units(db, tenant_id, employee_id, date, reservation_units(start, duration), appointment_id)
+
+
+async def reserve_slots(db, tenant_id: str, employee_id: str, items: List[ReservationItem]) -> Set[str]:
+    """
+    Reserva vários agendamentos com um único insert_many não ordenado.
+
+    Cada agendamento é aceito ou recusado por inteiro: os que tiveram algum
+    bloco recusado têm os demais blocos desfeitos. Devolve os ids recusados.
+    """
+    hold_id = uuid.uuid4().hex
+    docs = []
+    for appointment_id, date, start, duration in items:
+        docs.extend(_unit_docs(tenant_id, employee_id, date, reservation_units(start, duration), appointment_id, hold_id))
+    if not docs:
+        return set()
+    try:
+        await db.slot_reservations.insert_many(docs, ordered=False)
+    except BulkWriteError as e:
+        failed = {docs[error["index"]]["appointment_id"] for error in e.details.get("writeErrors", [])}
+        await db.slot_reservations.delete_many({"hold_id": hold_id, "appointment_id": {"$in": sorted(failed)}})
+        return failed
+    return set()
+
+
+async def move_reservation(db, tenant_id: str, employee_id: str, date: str, start: int, duration: int, appointment_id: str):
+    """
+    Troca a reserva de um agendamento pelo novo intervalo (reagendamento).
+
+    Os blocos que o agendamento já possui no mesmo dia são mantidos; apenas os
+    novos são inseridos, e os antigos só são liberados depois que os novos
+    forem garantidos.
+    """
+    await move_reservations(db, tenant_id, employee_id, [(appointment_id, date, start, duration)])
+
+
+async def move_reservations(db, tenant_id: str, employee_id: str, items: List[ReservationItem]):
+    """Versão em lote de move_reservation: tudo ou nada, com uma leitura, um insert e um delete."""
+    wanted = {
+        appointment_id: {(date, unit) for unit in reservation_units(start, duration)}
+        for appointment_id, date, start, duration in items
+    }
+    owned = await db.slot_reservations.find(
+        {"appointment_id": {"$in": list(wanted)}},
+        {"_id": 1, "appointment_id": 1, "employee_id": 1, "date": 1, "unit": 1}
+    ).to_list(None)
+    kept = defaultdict(set)
+    stale = []
+    for doc in owned:
+        key = (doc["date"], doc["unit"])
+        if doc["employee_id"] == employee_id and key in wanted[doc["appointment_id"]]:
+            kept[doc["appointment_id"]].add(key)
+        else:
+            stale.append(doc["_id"])
+    hold_id = uuid.uuid4().hex
+    docs = []
+    for appointment_id, keys in wanted.items():
+        for date, unit in sorted(keys - kept[appointment_id]):
+            docs.extend(_unit_docs(tenant_id, employee_id, date, [unit], appointment_id, hold_id))
+    await _insert_docs(db, docs, hold_id)
+    if stale:
+        await db.slot_reservations.delete_many({"_id": {"$in": stale}})
+
+
+async def release_reservation(db, appointment_id: str):
+    """Libera todos os blocos de um agendamento (cancelamento, conclusão ou exclusão)."""
+    await db.slot_reservations.delete_many({"appointment_id": appointment_id})
+
+
+async def release_reservations(db, appointment_ids: Iterable[str]):
+    """Libera os blocos de vários agendamentos com um único delete."""
+    appointment_ids = list(appointment_ids)
+    if appointment_ids:
+        await db.slot_reservations.delete_many({"appointment_id": {"$in": appointment_ids}})
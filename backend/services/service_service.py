@@ -1,4 +1,6 @@
 from backend.models.service import Service, ServiceCreate
+from backend.utils.loader import get_loaders
+from backend.services.propagation_service import enqueue_propagation, denormalized_changes
 from datetime import datetime, timezone
 import uuid
 from typing import List
@@ -11,9 +13,6 @@ async def list_services(db, tenant_slug: str):
         {"tenant_id": tenant["tenant_id"], "is_active": True},
         {"_id": 0}
     ).to_list(100)
-    for svc in services:
-        if "created_at" not in svc:
-            svc["created_at"] = datetime.now(timezone.utc).isoformat()
     return services
 
 async def list_all_services(db, tenant_id: str):
@@ -21,13 +20,6 @@ async def list_all_services(db, tenant_id: str):
         {"tenant_id": tenant_id},
         {"_id": 0}
     ).to_list(100)
-    for svc in services:
-        if svc.get("tenant_id") != tenant_id:
-            print(f"[SECURITY] Tentativa de acesso cruzado de tenant em serviço: {svc}")
-        if "created_at" not in svc:
-            svc["created_at"] = datetime.now(timezone.utc).isoformat()
-        if "tenant_id" not in svc:
-            print(f"[SECURITY] Serviço sem tenant_id detectado: {svc}")
     return services
 
 async def create_service(db, tenant_id: str, data: ServiceCreate):
@@ -46,12 +38,16 @@ async def create_service(db, tenant_id: str, data: ServiceCreate):
 async def update_service(db, tenant_id: str, service_id: str, data: ServiceCreate):
     if not tenant_id:
         raise Exception("tenant_id obrigatório para atualizar serviço")
-    result = await db.services.update_one(
+    previous = await db.services.find_one_and_update(
         {"service_id": service_id, "tenant_id": tenant_id},
-        {"$set": data.model_dump()}
+        {"$set": data.model_dump()},
+        projection={"_id": 0}
     )
-    if result.matched_count == 0:
+    if previous is None:
         raise Exception("Serviço não encontrado")
+    # Agendamentos futuros recebem os novos campos desnormalizados em segundo plano
+    await enqueue_propagation(db, tenant_id, "service", service_id, denormalized_changes("service", previous, data.model_dump()))
+    get_loaders(db).services.clear(service_id)
     service = await db.services.find_one({"service_id": service_id}, {"_id": 0})
     return Service(**service)
 
@@ -61,4 +57,5 @@ async def delete_service(db, tenant_id: str, service_id: str):
     )
     if result.deleted_count == 0:
         raise Exception("Serviço não encontrado")
+    get_loaders(db).services.clear(service_id)
     return {"message": "Serviço removido com sucesso"}
@@ -1,19 +1,24 @@
 from backend.models.tenant import TenantBase
+from backend.utils.cache import tenant_cache
+from backend.utils.loader import get_loaders
 from datetime import datetime, timezone
 import uuid
 
-async def get_tenant_info(db, tenant_slug: str):
-    tenant = await db.tenants.find_one({"slug": tenant_slug}, {"_id": 0})
-    if not tenant:
-        tenant_id = f"tenant_{uuid.uuid4().hex[:12]}"
-        tenant = {
-            "tenant_id": tenant_id,
-            "name": tenant_slug.replace("-", " ").title(),
-            "slug": tenant_slug,
-            "created_at": datetime.now(timezone.utc).isoformat(),
-            "is_active": True
-        }
-        await db.tenants.insert_one(tenant)
+async def get_or_create_tenant(db, tenant: dict, tenant_slug: str):
+    """Provisiona o tenant do slug no primeiro login; ``tenant`` é o já resolvido pelo middleware (ou None)."""
+    if tenant:
+        return tenant
+    tenant = {
+        "tenant_id": f"tenant_{uuid.uuid4().hex[:12]}",
+        "name": tenant_slug.replace("-", " ").title(),
+        "slug": tenant_slug,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "is_active": True
+    }
+    await db.tenants.insert_one(tenant)
+    # O host estava cacheado como inexistente
+    tenant_cache.invalidate_tenant(tenant["tenant_id"])
+    tenant.pop("_id", None)
     return tenant
 
 async def update_tenant_info(db, tenant_id: str, data: TenantBase):
@@ -21,5 +26,7 @@ async def update_tenant_info(db, tenant_id: str, data: TenantBase):
         {"tenant_id": tenant_id},
         {"$set": data.model_dump(exclude_none=True)}
     )
+    tenant_cache.invalidate_tenant(tenant_id)
+    get_loaders(db).tenants.clear(tenant_id)
     tenant = await db.tenants.find_one({"tenant_id": tenant_id}, {"_id": 0})
     return tenant
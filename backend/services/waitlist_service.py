@@ -0,0 +1,201 @@
+"""
+Lista de espera: oferece automaticamente horários liberados.
+
+Cada cancelamento, reagendamento ou exclusão agenda (sem bloquear a
+requisição) um casamento do intervalo liberado com as entradas em espera do
+funcionário naquele dia. O índice em (tenant, funcionário, serviço, status,
+janela de datas) reduz os candidatos a uma busca na árvore do índice; para
+cada candidato, o encaixe no intervalo é uma operação de máscara sobre o
+bitmap do dia. O candidato mais antigo que couber recebe a oferta por e-mail.
+"""
+
+from backend.models.waitlist import WaitlistEntry, WaitlistEntryCreate
+from backend.services.availability_service import load_employee_day
+from backend.services.working_hours_service import get_schedule
+from backend.utils.availability import available_start_mask, interval_mask
+from backend.utils.email import send_email_async, get_waitlist_offer_email
+from backend.utils.loader import get_loaders
+from backend.utils.scheduling import MINUTES_PER_DAY, minutes_to_time, time_to_minutes
+from datetime import date as date_type, datetime, timezone, timedelta
+from typing import Optional
+import asyncio
+import hmac
+import logging
+import os
+import secrets
+import uuid
+
+logger = logging.getLogger(__name__)
+
+# Validade de uma oferta antes de o horário voltar a ser oferecido
+OFFER_MINUTES = int(os.getenv("WAITLIST_OFFER_MINUTES", "60"))
+
+# Candidatos lidos por horário liberado
+MATCH_BATCH_SIZE = 100
+
+# Tarefas de casamento em andamento (referência forte até terminarem)
+_background_tasks = set()
+
+
+async def create_waitlist_entry(db, tenant_id: str, data: WaitlistEntryCreate, client_user_id: Optional[str] = None):
+    if not tenant_id:
+        raise Exception("tenant_id obrigatório para entrar na lista de espera")
+    entry = {
+        "entry_id": f"wait_{uuid.uuid4().hex[:12]}",
+        "tenant_id": tenant_id,
+        **data.model_dump(),
+        "client_user_id": client_user_id,
+        "status": "waiting",
+        "offer": None,
+        "appointment_id": None,
+        "created_at": datetime.now(timezone.utc).isoformat()
+    }
+    await db.waitlist.insert_one(entry)
+    return WaitlistEntry(**{k: v for k, v in entry.items() if k != "_id"})
+
+
+async def list_waitlist_entries(db, tenant_id: str, status: Optional[str] = None):
+    query = {"tenant_id": tenant_id}
+    if status:
+        query["status"] = status
+    return await db.waitlist.find(query, {"_id": 0}).sort("created_at", 1).to_list(500)
+
+
+async def cancel_waitlist_entry(db, tenant_id: str, entry_id: str):
+    entry = await db.waitlist.find_one_and_update(
+        {"entry_id": entry_id, "tenant_id": tenant_id, "status": {"$in": ["waiting", "offered"]}},
+        {"$set": {"status": "cancelled"}},
+        projection={"_id": 0}
+    )
+    if not entry:
+        return None
+    return {"message": "Entrada removida da lista de espera"}
+
+
+def _open_entries_query(now: str) -> dict:
+    """Entradas que podem receber oferta: em espera ou com oferta vencida."""
+    return {"$or": [{"status": "waiting"}, {"status": "offered", "offer.expires_at": {"$lt": now}}]}
+
+
+async def match_freed_slot(db, tenant_id: str, employee_id: str, date: str, start: int, end: int):
+    """
+    Oferece o intervalo [start, end) liberado ao melhor candidato da lista de espera.
+
+    Melhor candidato = a entrada mais antiga cujo serviço cabe em algum horário
+    da grade que cruze o intervalo liberado, dentro da faixa de horários aceita.
+    Devolve a entrada que recebeu a oferta, ou None.
+    """
+    if date < date_type.today().isoformat():
+        return None
+    loaders = get_loaders(db)
+    employee = await loaders.employees.load(employee_id, tenant_id)
+    if not employee or not employee.get("is_active", True):
+        return None
+    now = datetime.now(timezone.utc)
+    query = {
+        "tenant_id": tenant_id,
+        "employee_id": {"$in": [employee_id, None]},
+        "date_from": {"$lte": date},
+        "date_to": {"$gte": date},
+        **_open_entries_query(now.isoformat())
+    }
+    if employee.get("service_ids"):
+        query["service_id"] = {"$in": employee["service_ids"]}
+    candidates = await db.waitlist.find(query, {"_id": 0}).sort("created_at", 1).to_list(MATCH_BATCH_SIZE)
+    if not candidates:
+        return None
+
+    service_ids = sorted({c["service_id"] for c in candidates})
+    services = dict(zip(service_ids, await loaders.services.load_many(service_ids, tenant_id)))
+    occupancy = await load_employee_day(db, tenant_id, employee_id, date)
+    hours = (await get_schedule(db, tenant_id, employee_id)).day_hours(date)
+
+    for entry in candidates:
+        service = services.get(entry["service_id"])
+        if not service:
+            continue
+        duration = service.get("duration", 30)
+        # Inícios cujo atendimento cruza o intervalo liberado
+        mask = available_start_mask(occupancy, duration, hours) & interval_mask(max(start - duration + 1, 0), end)
+        earliest = time_to_minutes(entry["earliest_time"]) if entry.get("earliest_time") else 0
+        latest = time_to_minutes(entry["latest_time"]) if entry.get("latest_time") else MINUTES_PER_DAY - 1
+        mask &= interval_mask(earliest, latest + 1)
+        if not mask:
+            continue
+        offer = {
+            "employee_id": employee_id,
+            "date": date,
+            "time": minutes_to_time((mask & -mask).bit_length() - 1),
+            "expires_at": (now + timedelta(minutes=OFFER_MINUTES)).isoformat(),
+            # Código enviado só ao cliente por e-mail; quem o tiver pode aceitar sem sessão
+            "token": secrets.token_urlsafe(16)
+        }
+        claimed = await db.waitlist.find_one_and_update(
+            {"entry_id": entry["entry_id"], **_open_entries_query(now.isoformat())},
+            {"$set": {"status": "offered", "offer": offer}},
+            projection={"_id": 0}
+        )
+        if not claimed:
+            # Outra tarefa ofereceu um horário a esta entrada primeiro
+            continue
+        offered = {**claimed, "status": "offered", "offer": offer}
+        tenant_name = ((await loaders.tenants.load(tenant_id)) or {}).get("name", "")
+        html = get_waitlist_offer_email(
+            offered, {**offer, "service_name": service.get("name", ""), "employee_name": employee.get("name", "")},
+            tenant_name
+        )
+        await send_email_async(offered["client_email"], "Vaga disponível", html)
+        return offered
+    return None
+
+
+def _log_task_result(task: asyncio.Task):
+    _background_tasks.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        logger.error(f"Falha ao casar lista de espera: {task.exception()!r}")
+
+
+def schedule_waitlist_match(db, tenant_id: str, employee_id: str, date: str, start: int, end: int):
+    """Dispara o casamento em segundo plano; a requisição que liberou o horário não espera por ele."""
+    task = asyncio.create_task(match_freed_slot(db, tenant_id, employee_id, date, start, end))
+    _background_tasks.add(task)
+    task.add_done_callback(_log_task_result)
+
+
+async def claim_waitlist_offer(db, tenant_id: str, entry_id: str):
+    """
+    Lê a oferta vigente de uma entrada para ser convertida em agendamento.
+
+    Devolve None se a entrada não existir ou não tiver oferta, e levanta
+    ValueError (devolvendo a entrada à espera) se a oferta venceu.
+    """
+    entry = await db.waitlist.find_one({"entry_id": entry_id, "tenant_id": tenant_id, "status": "offered"}, {"_id": 0})
+    if not entry or not entry.get("offer"):
+        return None
+    if entry["offer"]["expires_at"] < datetime.now(timezone.utc).isoformat():
+        await release_waitlist_offer(db, entry_id)
+        raise ValueError("Oferta expirada")
+    return entry
+
+
+def can_accept_offer(entry: dict, token: Optional[str], user_id: Optional[str]) -> bool:
+    """Só o dono da entrada (pela sessão) ou quem recebeu o código da oferta pode aceitá-la."""
+    if user_id and user_id == entry.get("client_user_id"):
+        return True
+    expected = (entry.get("offer") or {}).get("token")
+    return bool(token and expected and hmac.compare_digest(token, expected))
+
+
+async def complete_waitlist_offer(db, entry_id: str, appointment_id: str):
+    await db.waitlist.update_one(
+        {"entry_id": entry_id},
+        {"$set": {"status": "booked", "appointment_id": appointment_id}}
+    )
+
+
+async def release_waitlist_offer(db, entry_id: str):
+    """Devolve a entrada à espera (oferta vencida ou horário tomado por outra pessoa)."""
+    await db.waitlist.update_one(
+        {"entry_id": entry_id, "status": "offered"},
+        {"$set": {"status": "waiting", "offer": None}}
+    )
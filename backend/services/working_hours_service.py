@@ -0,0 +1,79 @@
+from backend.models.working_hours import WorkingHours, WorkingHoursUpdate
+from backend.utils.working_hours import CompiledSchedule, compile_schedule
+from backend.utils.cache import availability_cache
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+import time
+
+# Expedientes compilados por (tenant_id, employee_id). As escritas deste
+# processo invalidam na hora; o TTL cobre alterações feitas por outros workers.
+SCHEDULE_CACHE_TTL = 300
+_schedule_cache: Dict[Tuple[str, str], Tuple[float, CompiledSchedule]] = {}
+
+
+def invalidate_schedules(tenant_id: str, employee_id: Optional[str] = None):
+    """Descarta expedientes compilados do tenant (ou de um funcionário) e os horários calculados com eles."""
+    for key in list(_schedule_cache):
+        if key[0] == tenant_id and (employee_id is None or key[1] == employee_id):
+            _schedule_cache.pop(key, None)
+    availability_cache.invalidate_where(tenant_id, employee_id)
+
+
+async def get_schedules(db, tenant_id: str, employee_ids: List[str]) -> Dict[str, CompiledSchedule]:
+    """Retorna o expediente compilado de cada funcionário, com uma consulta para os que faltam no cache."""
+    now = time.monotonic()
+    schedules = {}
+    missing = []
+    for employee_id in employee_ids:
+        cached = _schedule_cache.get((tenant_id, employee_id))
+        if cached and cached[0] > now:
+            schedules[employee_id] = cached[1]
+        else:
+            missing.append(employee_id)
+    if not missing:
+        return schedules
+    docs = await db.working_hours.find(
+        {"tenant_id": tenant_id, "employee_id": {"$in": [None, *missing]}},
+        {"_id": 0}
+    ).to_list(None)
+    tenant_doc = next((doc for doc in docs if doc.get("employee_id") is None), None)
+    employee_docs = {doc["employee_id"]: doc for doc in docs if doc.get("employee_id")}
+    for employee_id in missing:
+        schedule = compile_schedule(tenant_doc, employee_docs.get(employee_id))
+        _schedule_cache[(tenant_id, employee_id)] = (now + SCHEDULE_CACHE_TTL, schedule)
+        schedules[employee_id] = schedule
+    return schedules
+
+
+async def get_schedule(db, tenant_id: str, employee_id: str) -> CompiledSchedule:
+    return (await get_schedules(db, tenant_id, [employee_id]))[employee_id]
+
+
+async def get_working_hours(db, tenant_id: str, employee_id: Optional[str] = None):
+    return await db.working_hours.find_one({"tenant_id": tenant_id, "employee_id": employee_id}, {"_id": 0})
+
+
+async def set_working_hours(db, tenant_id: str, employee_id: Optional[str], data: WorkingHoursUpdate):
+    if not tenant_id:
+        raise Exception("tenant_id obrigatório para configurar expediente")
+    working_hours = {
+        "tenant_id": tenant_id,
+        "employee_id": employee_id,
+        **data.model_dump(),
+        "updated_at": datetime.now(timezone.utc).isoformat()
+    }
+    await db.working_hours.update_one(
+        {"tenant_id": tenant_id, "employee_id": employee_id},
+        {"$set": working_hours},
+        upsert=True
+    )
+    invalidate_schedules(tenant_id, employee_id)
+    return WorkingHours(**working_hours)
+
+
+async def delete_working_hours(db, tenant_id: str, employee_id: Optional[str]):
+    result = await db.working_hours.delete_one({"tenant_id": tenant_id, "employee_id": employee_id})
+    if result.deleted_count == 0:
+        raise Exception("Expediente não encontrado")
+    invalidate_schedules(tenant_id, employee_id)
+    return {"message": "Expediente removido com sucesso"}
@@ -0,0 +1,75 @@
+"""
+Teste de estresse de concorrência do agendamento.
+
+Dispara centenas de criações de agendamento em paralelo para o mesmo
+funcionário e dia: metade exatamente no mesmo horário e metade em horários
+sobrepostos com inícios diferentes. Com as reservas em slot_reservations
+exatamente uma deve ser aceita.
+
+Usa um banco separado (padrão: <DB_NAME>_stress), que é apagado ao final.
+Execute com: python -m backend.stress_booking [--attempts 300]
+"""
+
+import argparse
+import asyncio
+import uuid
+
+from backend.db import DB_NAME, create_client
+from backend.services.appointment_service import create_appointment
+from backend.indexes import ensure_indexes
+from backend.services.reservation_service import SlotUnavailableError
+from backend.utils.mongo_metrics import pool_metrics
+
+STRESS_DATE = "2030-01-07"
+
+
+async def run_stress(db, attempts: int) -> dict:
+    await ensure_indexes(db)
+    tenant_id = f"tenant_stress_{uuid.uuid4().hex[:8]}"
+    employee_id = f"emp_stress_{uuid.uuid4().hex[:8]}"
+    # 10:00 para metade das tentativas, 09:35..10:25 (todas sobrepostas a 10:00-11:00) para a outra metade
+    times = ["10:00" if i % 2 == 0 else f"{9 + (35 + 5 * (i % 11)) // 60:02d}:{(35 + 5 * (i % 11)) % 60:02d}" for i in range(attempts)]
+
+    async def book(time):
+        try:
+            await create_appointment(db, {
+                "tenant_id": tenant_id,
+                "service_id": "svc_stress",
+                "service_duration": 60,
+                "employee_id": employee_id,
+                "date": STRESS_DATE,
+                "time": time,
+                "client_name": "Stress",
+                "client_email": "stress@example.com"
+            })
+            return True
+        except SlotUnavailableError:
+            return False
+
+    results = await asyncio.gather(*(book(t) for t in times))
+    stored = await db.appointments.count_documents({"tenant_id": tenant_id, "status": {"$in": ["pending", "confirmed"]}})
+    return {"attempts": attempts, "accepted": sum(results), "stored": stored}
+
+
+async def main(args):
+    client = create_client(maxPoolSize=args.pool_size)
+    db_name = args.db or f"{DB_NAME}_stress"
+    db = client[db_name]
+    try:
+        result = await run_stress(db, args.attempts)
+    finally:
+        await client.drop_database(db_name)
+        client.close()
+    print(f"{result['attempts']} tentativas, {result['accepted']} aceitas, {result['stored']} gravadas")
+    wait = pool_metrics.snapshot()["checkout_wait"]
+    print(f"espera por conexão do pool: p50 {wait['p50_ms']:.2f} ms, p99 {wait['p99_ms']:.2f} ms, máx {wait['max_ms']:.2f} ms")
+    assert result["accepted"] == 1 and result["stored"] == 1, "mais de um agendamento aceito para o mesmo horário"
+    print("OK: exatamente um agendamento aceito")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Teste de estresse de agendamentos concorrentes")
+    parser.add_argument("--attempts", type=int, default=300)
+    parser.add_argument("--pool-size", type=int, default=100)
+    parser.add_argument("--db", help="banco usado no teste (é apagado ao final)")
+    asyncio.run(main(parser.parse_args()))
@@ -1,38 +1,87 @@
 from fastapi import Request, HTTPException
 from datetime import datetime, timezone
-from typing import Optional
+from typing import Optional, Tuple
+import os
 from backend.models.user import User
+from backend.utils.cache import session_cache
+from backend.utils.signed_tokens import USER_FIELDS, is_signed_token, verify_token
 
 # Helpers de autenticação e sessão
 
-async def get_session_from_cookie(request: Request, db) -> Optional[dict]:
+# E-mails (separados por vírgula) dos operadores da plataforma: só eles veem as
+# métricas do processo, que misturam todos os tenants. Vazio = ninguém
+OPERATOR_EMAILS = {email.strip().lower() for email in os.getenv("OPERATOR_EMAILS", "").split(",") if email.strip()}
+
+def get_session_token(request: Request) -> Optional[str]:
+    """Token da sessão, do cookie ou do cabeçalho Authorization: Bearer."""
     session_token = request.cookies.get("session_token")
     if not session_token:
         auth_header = request.headers.get("Authorization")
         if auth_header and auth_header.startswith("Bearer "):
             session_token = auth_header.split(" ")[1]
-    if not session_token:
-        return None
-    session = await db.user_sessions.find_one({"session_token": session_token}, {"_id": 0})
-    if not session:
-        return None
-    expires_at = session.get("expires_at")
+    return session_token or None
+
+def parse_expires_at(expires_at) -> datetime:
     if isinstance(expires_at, str):
         expires_at = datetime.fromisoformat(expires_at)
     if expires_at.tzinfo is None:
         expires_at = expires_at.replace(tzinfo=timezone.utc)
+    return expires_at
+
+async def resolve_session(db, session_token: str) -> Optional[Tuple[dict, Optional[User]]]:
+    """
+    Resolve token -> (sessão, usuário), usando o cache de sessões.
+
+    Na falta, sessão e usuário vêm de uma única agregação com $lookup; o
+    expires_at é convertido uma vez e limita o tempo de vida da entrada.
+    Tokens assinados são verificados sem consultar user_sessions.
+    """
+    if is_signed_token(session_token):
+        return await resolve_signed_session(db, session_token)
+    cached = session_cache.get(session_token)
+    if cached is not None:
+        return cached
+    docs = await db.user_sessions.aggregate([
+        {"$match": {"session_token": session_token}},
+        {"$limit": 1},
+        {"$lookup": {"from": "users", "localField": "user_id", "foreignField": "user_id", "as": "user"}},
+        {"$project": {"_id": 0, "user._id": 0}}
+    ]).to_list(1)
+    if not docs:
+        return None
+    session = docs[0]
+    users = session.pop("user", [])
+    expires_at = parse_expires_at(session.get("expires_at"))
     if expires_at < datetime.now(timezone.utc):
         return None
-    return session
+    resolved = (session, User(**users[0]) if users else None)
+    session_cache.put(session_token, session["user_id"], resolved, expires_at.timestamp())
+    return resolved
+
+async def resolve_signed_session(db, session_token: str) -> Optional[Tuple[dict, Optional[User]]]:
+    payload = await verify_token(db, session_token)
+    if payload is None:
+        return None
+    session = {
+        "user_id": payload["user_id"],
+        "session_token": session_token,
+        "expires_at": datetime.fromtimestamp(payload["exp"], timezone.utc).isoformat()
+    }
+    return session, User(**{field: payload[field] for field in USER_FIELDS})
+
+async def get_session_from_cookie(request: Request, db) -> Optional[dict]:
+    session_token = get_session_token(request)
+    if not session_token:
+        return None
+    resolved = await resolve_session(db, session_token)
+    return resolved[0] if resolved else None
 
 async def get_current_user(request: Request, db) -> Optional[User]:
-    session = await get_session_from_cookie(request, db)
-    if not session:
+    session_token = get_session_token(request)
+    if not session_token:
         return None
-    user = await db.users.find_one({"user_id": session["user_id"]}, {"_id": 0})
-    if user:
-        return User(**user)
-    return None
+    resolved = await resolve_session(db, session_token)
+    return resolved[1] if resolved else None
 
 async def require_auth(request: Request, db) -> User:
     user = await get_current_user(request, db)
@@ -46,6 +95,12 @@ async def require_admin(request: Request, db) -> User:
         raise HTTPException(status_code=403, detail="Acesso negado")
     return user
 
+async def require_operator(request: Request, db) -> User:
+    user = await require_admin(request, db)
+    if user.email.lower() not in OPERATOR_EMAILS:
+        raise HTTPException(status_code=403, detail="Acesso negado")
+    return user
+
 def get_tenant_from_host(request: Request) -> str:
     host = request.headers.get("host", "")
     host = host.split(":")[0]
@@ -0,0 +1,196 @@
+"""
+Motor de disponibilidade baseado em bitmaps de minutos.
+
+O dia de um funcionário é representado como um inteiro onde o bit ``i``
+indica que o minuto ``i`` (a partir de 00:00) está ocupado. Bloqueios e
+agendamentos são convertidos uma única vez em máscaras e combinados com OR;
+a pergunta "quais horários comportam um serviço de D minutos" é respondida
+com deslocamentos e ANDs sobre o bitmap, sem laços por slot.
+"""
+
+from typing import Iterable, List, Optional
+
+from backend.utils.scheduling import (
+    MINUTES_PER_DAY, appointment_interval, block_interval, minutes_to_time, time_to_minutes
+)
+
+# Janela padrão de atendimento (08:00 às 20:00, slots de 30 minutos)
+DAY_START = 8 * 60
+DAY_END = 20 * 60
+SLOT_STEP = 30
+
+
+def interval_mask(start: int, end: int) -> int:
+    """Máscara com os bits [start, end) ligados."""
+    start = max(start, 0)
+    if end <= start:
+        return 0
+    return ((1 << (end - start)) - 1) << start
+
+
+class DayOccupancy:
+    """Ocupação de um funcionário em um dia, construída uma única vez."""
+
+    __slots__ = ("busy", "whole_day")
+
+    def __init__(self, busy: int = 0, whole_day: bool = False):
+        self.busy = busy
+        self.whole_day = whole_day
+
+    @classmethod
+    def build(cls, blocked: Iterable[dict], appointments: Iterable[dict]) -> "DayOccupancy":
+        """Monta o bitmap a partir dos documentos de blocked_times e appointments."""
+        busy = 0
+        for block in blocked:
+            if block.get("is_whole_day"):
+                return cls(busy=interval_mask(0, MINUTES_PER_DAY), whole_day=True)
+            if block.get("start_time") and block.get("end_time"):
+                interval = block_interval(block)
+                busy |= interval_mask(interval.start, interval.end)
+        for appt in appointments:
+            if appt.get("time"):
+                interval = appointment_interval(appt)
+                busy |= interval_mask(interval.start, interval.end)
+        return cls(busy=busy)
+
+    @classmethod
+    def from_free_intervals(cls, free: Iterable[Iterable[int]], whole_day: bool = False) -> "DayOccupancy":
+        """Reconstrói a ocupação a partir da lista de intervalos livres do dia."""
+        if whole_day:
+            return cls(busy=interval_mask(0, MINUTES_PER_DAY), whole_day=True)
+        return cls(busy=interval_mask(0, MINUTES_PER_DAY) & ~intervals_to_mask(free))
+
+    def free_mask(self, horizon: int) -> int:
+        """Minutos livres em [0, horizon)."""
+        return ~self.busy & interval_mask(0, horizon)
+
+    def free_intervals(self) -> List[List[int]]:
+        """Intervalos [início, fim) livres dentro do dia."""
+        if self.whole_day:
+            return []
+        return mask_to_intervals(self.free_mask(MINUTES_PER_DAY))
+
+
+def fit_mask(free: int, duration: int) -> int:
+    """
+    Retorna a máscara dos minutos ``i`` tais que [i, i + duration) está livre.
+
+    Usa duplicação: após cada passo o bit i indica uma janela livre de
+    ``span`` minutos, então são necessários apenas O(log duration) ANDs.
+    """
+    if duration <= 0:
+        return free
+    fit = free
+    span = 1
+    while span < duration:
+        shift = min(span, duration - span)
+        fit &= fit >> shift
+        span += shift
+    return fit
+
+
+def grid_mask(day_start: int = DAY_START, day_end: int = DAY_END, step: int = SLOT_STEP) -> int:
+    """Máscara com os inícios candidatos (grade de slots) ligados."""
+    mask = 0
+    for minute in range(day_start, day_end, step):
+        mask |= 1 << minute
+    return mask
+
+
+class DayHours:
+    """
+    Expediente de um dia já compilado em máscaras.
+
+    ``open`` são os minutos em que o serviço pode acontecer (início e fim
+    precisam caber nele), ``starts`` os minutos em que ele pode começar e
+    ``grid`` são os inícios oferecidos aos clientes.
+    """
+
+    __slots__ = ("open", "starts", "grid")
+
+    def __init__(self, open: int, grid: int, starts: Optional[int] = None):
+        self.open = open
+        self.grid = grid
+        self.starts = open if starts is None else starts
+
+    @classmethod
+    def from_intervals(cls, intervals: Iterable[Iterable[int]], step: int = SLOT_STEP) -> "DayHours":
+        """Expediente com janelas [início, fim); a grade recomeça no início de cada janela."""
+        open_mask = 0
+        grid = 0
+        for start, end in intervals:
+            open_mask |= interval_mask(start, end)
+            grid |= grid_mask(start, end, step)
+        return cls(open=open_mask, grid=grid)
+
+    @classmethod
+    def window(cls, day_start: int = DAY_START, day_end: int = DAY_END, step: int = SLOT_STEP) -> "DayHours":
+        """Grade fixa cujo serviço pode terminar após o fim da janela (comportamento original)."""
+        return cls(
+            open=interval_mask(0, 2 * MINUTES_PER_DAY), grid=grid_mask(day_start, day_end, step),
+            starts=interval_mask(day_start, day_end)
+        )
+
+    @property
+    def closed(self) -> bool:
+        return self.grid == 0
+
+    def can_start(self, minute: int) -> bool:
+        """Indica se um serviço pode começar em ``minute`` dentro do expediente."""
+        return minute >= 0 and bool(self.starts >> minute & 1)
+
+
+# Expediente usado quando o tenant não configurou horários: 08:00-20:00 de 30 em 30 minutos
+DEFAULT_HOURS = DayHours.window()
+
+
+def mask_to_minutes(mask: int) -> List[int]:
+    """Lista, em ordem crescente, os minutos cujos bits estão ligados."""
+    minutes = []
+    while mask:
+        low = mask & -mask
+        minutes.append(low.bit_length() - 1)
+        mask ^= low
+    return minutes
+
+
+def mask_to_intervals(mask: int) -> List[List[int]]:
+    """Converte uma máscara em intervalos [início, fim) de bits consecutivos ligados."""
+    intervals = []
+    while mask:
+        start = (mask & -mask).bit_length() - 1
+        run = mask >> start
+        length = (~run & (run + 1)).bit_length() - 1
+        intervals.append([start, start + length])
+        mask &= ~interval_mask(start, start + length)
+    return intervals
+
+
+def intervals_to_mask(intervals: Iterable[Iterable[int]]) -> int:
+    """Converte intervalos [início, fim) em máscara."""
+    mask = 0
+    for start, end in intervals:
+        mask |= interval_mask(start, end)
+    return mask
+
+
+def available_start_mask(occupancy: DayOccupancy, duration: int, hours: Optional[DayHours] = None) -> int:
+    """Máscara dos inícios da grade que comportam um serviço de ``duration`` minutos."""
+    hours = hours or DEFAULT_HOURS
+    if occupancy.whole_day or hours.closed:
+        return 0
+    free = ~occupancy.busy & hours.open
+    return fit_mask(free, duration) & hours.grid
+
+
+def available_starts(occupancy: DayOccupancy, duration: int, hours: Optional[DayHours] = None) -> List[str]:
+    """Horários ('HH:MM') da grade que comportam um serviço de ``duration`` minutos."""
+    mask = available_start_mask(occupancy, duration, hours)
+    return [minutes_to_time(m) for m in mask_to_minutes(mask)]
+
+
+def is_free(occupancy: DayOccupancy, start: int, duration: int) -> bool:
+    """Indica se [start, start + duration) está livre."""
+    if occupancy.whole_day:
+        return False
+    return occupancy.busy & interval_mask(start, start + duration) == 0
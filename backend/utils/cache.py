@@ -0,0 +1,305 @@
+"""
+Cache LRU em memória para resultados de disponibilidade.
+
+As entradas são agrupadas por dia de agenda (tenant, funcionário, data) para
+que uma escrita invalide exatamente os resultados daquele dia. Cada dia tem
+uma geração: o leitor pega um token antes de calcular e o ``put`` é ignorado se
+o dia foi invalidado no meio do caminho, então um cálculo concorrente com uma
+escrita nunca deixa um resultado antigo no cache.
+"""
+
+import os
+import sys
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Set, Tuple
+
+DayKey = Tuple[str, str, str]
+
+# Limite de gerações guardadas antes de reiniciar a contagem (com nova época)
+MAX_TRACKED_DAYS = 100_000
+
+
+def estimate_size(value: Any) -> int:
+    """Estimativa grosseira, em bytes, do tamanho de um resultado (dicts/listas/strings)."""
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(estimate_size(k) + estimate_size(v) for k, v in value.items())
+    elif isinstance(value, (list, tuple)):
+        size += sum(estimate_size(v) for v in value)
+    return size
+
+
+class AvailabilityCache:
+    def __init__(self, max_entries: int = 10_000, max_bytes: int = 32 * 1024 * 1024, ttl: float = 60.0):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries: "OrderedDict[Hashable, Tuple[DayKey, float, int, Any]]" = OrderedDict()
+        self._by_day: Dict[DayKey, Set[Hashable]] = {}
+        self._generations: Dict[DayKey, int] = {}
+        self._epoch = 0
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def token(self, day: DayKey) -> Tuple[int, int]:
+        """Marca o início de um cálculo para ``day``; deve ser passado ao ``put``."""
+        return self._epoch, self._generations.get(day, 0)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None or entry[1] < time.monotonic():
+            if entry is not None:
+                self._remove(key)
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[3]
+
+    def put(self, key: Hashable, day: DayKey, value: Any, token: Tuple[int, int]):
+        if token != self.token(day):
+            return
+        size = estimate_size(value)
+        if size > self.max_bytes:
+            return
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = (day, time.monotonic() + self.ttl, size, value)
+        self._by_day.setdefault(day, set()).add(key)
+        self.bytes += size
+        while len(self._entries) > self.max_entries or self.bytes > self.max_bytes:
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+
+    def invalidate_day(self, day: DayKey):
+        """Remove os resultados de um dia de agenda e rejeita cálculos em andamento."""
+        self.invalidations += 1
+        if len(self._generations) >= MAX_TRACKED_DAYS:
+            self._generations.clear()
+            self._epoch += 1
+        self._generations[day] = self._generations.get(day, 0) + 1
+        for key in self._by_day.pop(day, ()):
+            self._drop(key)
+
+    def invalidate_where(self, tenant_id: str, employee_id: Optional[str] = None):
+        """Remove todos os dias de um tenant (ou de um funcionário), ex.: mudança de expediente."""
+        for day in list(self._by_day):
+            if day[0] == tenant_id and (employee_id is None or day[1] == employee_id):
+                self.invalidate_day(day)
+        # Cálculos em andamento de dias ainda não cacheados também precisam ser rejeitados
+        self._epoch += 1
+
+    def clear(self):
+        self._entries.clear()
+        self._by_day.clear()
+        self._generations.clear()
+        self._epoch += 1
+        self.bytes = 0
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self.bytes,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
+
+    def _drop(self, key: Hashable):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.bytes -= entry[2]
+
+    def _remove(self, key: Hashable):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        self.bytes -= entry[2]
+        keys = self._by_day.get(entry[0])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._by_day[entry[0]]
+
+
+# Instância do processo usada por /appointments/available-slots. Com vários
+# workers cada um tem o seu cache e só é invalidado pelas escritas que ele
+# próprio atende; o TTL limita a janela entre workers.
+availability_cache = AvailabilityCache(
+    max_entries=int(os.getenv("AVAILABILITY_CACHE_MAX_ENTRIES", "10000")),
+    max_bytes=int(os.getenv("AVAILABILITY_CACHE_MAX_BYTES", str(32 * 1024 * 1024))),
+    ttl=float(os.getenv("AVAILABILITY_CACHE_TTL", "60")),
+)
+
+
+class SessionCache:
+    """
+    Cache LRU de sessões resolvidas (token -> sessão + usuário).
+
+    Cada entrada vive no máximo ``ttl`` segundos e nunca além do ``expires_at``
+    da própria sessão, que é convertido uma única vez na hora de cachear.
+    """
+
+    def __init__(self, max_entries: int = 10_000, ttl: float = 60.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[float, str, Any]]" = OrderedDict()
+        self._by_user: Dict[str, Set[str]] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, token: str) -> Optional[Any]:
+        entry = self._entries.get(token)
+        if entry is None or entry[0] < time.monotonic():
+            if entry is not None:
+                self._remove(token)
+            self.misses += 1
+            return None
+        self._entries.move_to_end(token)
+        self.hits += 1
+        return entry[2]
+
+    def put(self, token: str, user_id: str, value: Any, expires_at: float):
+        """Guarda ``value``; ``expires_at`` é o fim da sessão em segundos desde a época (time.time())."""
+        lifetime = min(self.ttl, expires_at - time.time())
+        if lifetime <= 0:
+            return
+        if token in self._entries:
+            self._remove(token)
+        self._entries[token] = (time.monotonic() + lifetime, user_id, value)
+        self._by_user.setdefault(user_id, set()).add(token)
+        while len(self._entries) > self.max_entries:
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+
+    def invalidate(self, token: str):
+        """Remove uma sessão (logout)."""
+        self.invalidations += 1
+        self._remove(token)
+
+    def invalidate_user(self, user_id: str):
+        """Remove todas as sessões de um usuário (nova sessão ou dados do usuário alterados)."""
+        self.invalidations += 1
+        for token in list(self._by_user.get(user_id, ())):
+            self._remove(token)
+
+    def clear(self):
+        self._entries.clear()
+        self._by_user.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
+
+    def _remove(self, token: str):
+        entry = self._entries.pop(token, None)
+        if entry is None:
+            return
+        tokens = self._by_user.get(entry[1])
+        if tokens is not None:
+            tokens.discard(token)
+            if not tokens:
+                del self._by_user[entry[1]]
+
+
+# Instância do processo usada por utils/auth. Logout e troca de sessão só
+# invalidam o worker que as atende; o TTL limita por quanto tempo outro worker
+# ainda aceita uma sessão encerrada.
+session_cache = SessionCache(
+    max_entries=int(os.getenv("SESSION_CACHE_MAX_ENTRIES", "10000")),
+    ttl=float(os.getenv("SESSION_CACHE_TTL", "60")),
+)
+
+
+class TenantCache:
+    """
+    Cache LRU de host -> tenant, incluindo respostas negativas.
+
+    Hosts desconhecidos ficam cacheados como None por ``negative_ttl``, então
+    uma enxurrada de hosts inválidos não vira uma consulta por requisição.
+    """
+
+    def __init__(self, max_entries: int = 10_000, ttl: float = 300.0, negative_ttl: float = 30.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self._entries: "OrderedDict[str, Tuple[float, Optional[dict]]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.negative_hits = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, host: str) -> Tuple[bool, Optional[dict]]:
+        """(encontrado, tenant); tenant None com encontrado=True é um host sabidamente inválido."""
+        entry = self._entries.get(host)
+        if entry is None or entry[0] < time.monotonic():
+            if entry is not None:
+                del self._entries[host]
+            self.misses += 1
+            return False, None
+        self._entries.move_to_end(host)
+        self.hits += 1
+        if entry[1] is None:
+            self.negative_hits += 1
+        return True, entry[1]
+
+    def put(self, host: str, tenant: Optional[dict]):
+        ttl = self.ttl if tenant is not None else self.negative_ttl
+        self._entries[host] = (time.monotonic() + ttl, tenant)
+        self._entries.move_to_end(host)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate_tenant(self, tenant_id: str):
+        """Remove os hosts do tenant e todas as respostas negativas (slug/domínio podem ter mudado)."""
+        self.invalidations += 1
+        for host, (_, tenant) in list(self._entries.items()):
+            if tenant is None or tenant.get("tenant_id") == tenant_id:
+                del self._entries[host]
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "negative_hits": self.negative_hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
+
+
+# Instância do processo usada pelo middleware de tenant. Alterações de tenant só
+# invalidam o worker que as atende; o TTL limita a janela nos demais.
+tenant_cache = TenantCache(
+    max_entries=int(os.getenv("TENANT_CACHE_MAX_ENTRIES", "10000")),
+    ttl=float(os.getenv("TENANT_CACHE_TTL", "300")),
+    negative_ttl=float(os.getenv("TENANT_CACHE_NEGATIVE_TTL", "30")),
+)
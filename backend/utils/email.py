@@ -126,3 +126,50 @@ def get_employee_reminder_email(appointment: dict, tenant_name: str) -> str:
         </div>
     </div>
     """
+
+def get_waitlist_offer_email(entry: dict, offer: dict, tenant_name: str) -> str:
+    """Generate HTML email offering a freed slot to a waitlisted client"""
+    return f"""
+    <div style=\"font-family: 'Segoe UI', Arial, sans-serif; max-width: 600px; margin: 0 auto; padding: 20px;\">
+        <div style=\"background: linear-gradient(135deg, #2C4A3B 0%, #3d6350 100%); padding: 30px; border-radius: 12px 12px 0 0;\">
+            <h1 style=\"color: white; margin: 0; font-size: 24px;\">🎉 Vaga Disponível</h1>
+        </div>
+        <div style=\"background: #ffffff; padding: 30px; border: 1px solid #e5e5e5; border-top: none; border-radius: 0 0 12px 12px;\">
+            <p style=\"color: #333; font-size: 16px; margin-bottom: 20px;\">
+                Olá <strong>{entry.get('client_name', 'Cliente')}</strong>!
+            </p>
+            <p style=\"color: #666; font-size: 15px;\">
+                Abriu um horário em <strong>{tenant_name}</strong> que combina com a sua lista de espera:
+            </p>
+            <div style=\"background: #f8f7f5; padding: 20px; border-radius: 8px; margin: 20px 0;\">
+                <table style=\"width: 100%; border-collapse: collapse;\">
+                    <tr>
+                        <td style=\"padding: 8px 0; color: #888;\">📅 Data:</td>
+                        <td style=\"padding: 8px 0; color: #333; font-weight: 600;\">{offer.get('date', '')}</td>
+                    </tr>
+                    <tr>
+                        <td style=\"padding: 8px 0; color: #888;\">⏰ Horário:</td>
+                        <td style=\"padding: 8px 0; color: #333; font-weight: 600;\">{offer.get('time', '')}</td>
+                    </tr>
+                    <tr>
+                        <td style=\"padding: 8px 0; color: #888;\">💇 Serviço:</td>
+                        <td style=\"padding: 8px 0; color: #333; font-weight: 600;\">{offer.get('service_name', '')}</td>
+                    </tr>
+                    <tr>
+                        <td style=\"padding: 8px 0; color: #888;\">👤 Profissional:</td>
+                        <td style=\"padding: 8px 0; color: #333; font-weight: 600;\">{offer.get('employee_name', '')}</td>
+                    </tr>
+                </table>
+            </div>
+            <p style=\"color: #666; font-size: 14px;\">
+                A oferta é válida até {offer.get('expires_at', '')}. Confirme pelo nosso sistema online antes que outra pessoa reserve.
+            </p>
+            <p style=\"color: #666; font-size: 14px;\">
+                Código da oferta: <strong>{offer.get('token', '')}</strong>
+            </p>
+            <p style=\"color: #888; font-size: 13px; margin-top: 30px; padding-top: 20px; border-top: 1px solid #eee;\">
+                {tenant_name} - Sistema de Agendamentos
+            </p>
+        </div>
+    </div>
+    """
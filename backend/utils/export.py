@@ -0,0 +1,89 @@
+"""
+Exportação em streaming (NDJSON ou CSV, opcionalmente com gzip).
+
+As linhas são lidas de um cursor do Motor em lotes de EXPORT_BATCH_SIZE e
+serializadas uma a uma; o texto é agrupado em blocos de até
+EXPORT_CHUNK_BYTES antes de ir para a resposta. Só um lote do cursor e um
+bloco de saída ficam em memória, então o consumo não cresce com o tamanho
+da exportação.
+"""
+
+import csv
+import io
+import json
+import zlib
+from datetime import datetime
+from typing import AsyncIterator, Optional, Sequence
+
+from fastapi.responses import StreamingResponse
+
+EXPORT_FORMATS = {"ndjson": "application/x-ndjson", "csv": "text/csv; charset=utf-8"}
+EXPORT_BATCH_SIZE = 500
+EXPORT_CHUNK_BYTES = 64 * 1024
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+async def ndjson_lines(cursor) -> AsyncIterator[str]:
+    async for doc in cursor:
+        doc.pop("_id", None)
+        yield json.dumps(doc, ensure_ascii=False, default=_json_default) + "\n"
+
+
+async def csv_lines(cursor, columns: Sequence[str]) -> AsyncIterator[str]:
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=columns, extrasaction="ignore")
+    writer.writeheader()
+    async for doc in cursor:
+        writer.writerow({key: _json_default(value) if isinstance(value, datetime) else value for key, value in doc.items()})
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    # Só o cabeçalho quando o cursor está vazio
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+async def chunked(lines: AsyncIterator[str], chunk_bytes: int = EXPORT_CHUNK_BYTES) -> AsyncIterator[bytes]:
+    parts, size = [], 0
+    async for line in lines:
+        data = line.encode("utf-8")
+        parts.append(data)
+        size += len(data)
+        if size >= chunk_bytes:
+            yield b"".join(parts)
+            parts, size = [], 0
+    if parts:
+        yield b"".join(parts)
+
+
+async def gzipped(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31: formato gzip
+    async for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def export_response(
+    cursor, export_format: str, filename: str, columns: Optional[Sequence[str]] = None, gzip: bool = False
+) -> StreamingResponse:
+    """Resposta em streaming para ``cursor``; ``columns`` define as colunas (e a ordem) do CSV."""
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f"Formato inválido, use {' ou '.join(EXPORT_FORMATS)}")
+    lines = csv_lines(cursor, columns) if export_format == "csv" else ndjson_lines(cursor)
+    body = chunked(lines)
+    filename = f"{filename}.{export_format}"
+    media_type = EXPORT_FORMATS[export_format]
+    if gzip:
+        body = gzipped(body)
+        filename += ".gz"
+        media_type = "application/gzip"
+    return StreamingResponse(
+        body, media_type=media_type, headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
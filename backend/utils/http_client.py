@@ -0,0 +1,159 @@
+"""
+Cliente HTTP compartilhado para o provedor de autenticação (troca OAuth).
+
+Um único httpx.AsyncClient por processo, criado no startup, mantém as conexões
+abertas entre logins. Toda chamada tem timeouts explícitos, passa por um
+limite de concorrência e por um circuit breaker: depois de algumas falhas
+seguidas (timeout, erro de rede ou 5xx) o provedor é considerado degradado e
+as chamadas falham na hora até o período de espera acabar, quando uma única
+chamada de teste decide se o circuito fecha de novo.
+"""
+
+import asyncio
+import os
+import time
+from typing import Optional
+
+import httpx
+
+from backend.utils.metrics import LatencyStats
+
+AUTH_PROVIDER_URL = os.getenv(
+    "AUTH_PROVIDER_URL", "https://demobackend.emergentagent.com/auth/v1/env/oauth/session-data"
+)
+AUTH_PROVIDER_TIMEOUT = float(os.getenv("AUTH_PROVIDER_TIMEOUT", "5"))
+AUTH_PROVIDER_CONNECT_TIMEOUT = float(os.getenv("AUTH_PROVIDER_CONNECT_TIMEOUT", "2"))
+AUTH_PROVIDER_MAX_CONCURRENCY = int(os.getenv("AUTH_PROVIDER_MAX_CONCURRENCY", "20"))
+AUTH_PROVIDER_QUEUE_TIMEOUT = float(os.getenv("AUTH_PROVIDER_QUEUE_TIMEOUT", "1"))
+CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("AUTH_PROVIDER_FAILURE_THRESHOLD", "5"))
+CIRCUIT_RESET_SECONDS = float(os.getenv("AUTH_PROVIDER_RESET_SECONDS", "30"))
+
+
+class ProviderUnavailableError(Exception):
+    """Provedor degradado (circuito aberto), lento ou fora do ar."""
+
+
+class InvalidSessionError(Exception):
+    """O provedor respondeu, mas recusou o session_id."""
+
+
+class CircuitBreaker:
+    """Circuito com os estados 'closed', 'open' e 'half_open'."""
+
+    def __init__(self, failure_threshold: int = CIRCUIT_FAILURE_THRESHOLD, reset_seconds: float = CIRCUIT_RESET_SECONDS):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.trial_running = False
+        self.times_opened = 0
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_seconds:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half_open" and not self.trial_running:
+            self.trial_running = True
+            return True
+        return False
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self.trial_running = False
+
+    def record_failure(self):
+        self.failures += 1
+        if self.trial_running or self.failures >= self.failure_threshold:
+            if self.state != "open":
+                self.times_opened += 1
+            self.opened_at = time.monotonic()
+        self.trial_running = False
+
+
+class AuthProviderClient:
+    """Troca um session_id do provedor OAuth pelos dados da sessão."""
+
+    def __init__(
+        self, url: str = AUTH_PROVIDER_URL, timeout: float = AUTH_PROVIDER_TIMEOUT,
+        connect_timeout: float = AUTH_PROVIDER_CONNECT_TIMEOUT, max_concurrency: int = AUTH_PROVIDER_MAX_CONCURRENCY,
+        queue_timeout: float = AUTH_PROVIDER_QUEUE_TIMEOUT, breaker: Optional[CircuitBreaker] = None,
+        transport: Optional[httpx.AsyncBaseTransport] = None
+    ):
+        self.url = url
+        self.queue_timeout = queue_timeout
+        self.breaker = breaker or CircuitBreaker()
+        self.stats = LatencyStats()
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._client = httpx.AsyncClient(
+            timeout=httpx.Timeout(timeout, connect=connect_timeout),
+            limits=httpx.Limits(max_connections=max_concurrency, max_keepalive_connections=max_concurrency),
+            transport=transport
+        )
+
+    async def fetch_session_data(self, session_id: str) -> dict:
+        if not self.breaker.allow():
+            self.stats.rejected += 1
+            raise ProviderUnavailableError("Provedor de autenticação indisponível")
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), self.queue_timeout)
+        except asyncio.TimeoutError:
+            self.stats.rejected += 1
+            # Não conta como falha do provedor, mas libera a vaga de teste do half-open
+            self.breaker.trial_running = False
+            raise ProviderUnavailableError("Muitas autenticações simultâneas")
+        except asyncio.CancelledError:
+            self.breaker.trial_running = False
+            raise
+        started = time.perf_counter()
+        try:
+            response = await self._client.get(self.url, headers={"X-Session-ID": session_id})
+        except httpx.HTTPError:
+            self.stats.record(time.perf_counter() - started, ok=False)
+            self.breaker.record_failure()
+            raise ProviderUnavailableError("Provedor de autenticação indisponível")
+        except asyncio.CancelledError:
+            # Chamada cancelada (ex.: cliente desconectou): não diz nada sobre o provedor,
+            # mas a vaga de teste do half-open precisa ser liberada
+            self.breaker.trial_running = False
+            raise
+        except Exception:
+            self.stats.record(time.perf_counter() - started, ok=False)
+            self.breaker.record_failure()
+            raise
+        finally:
+            self._semaphore.release()
+        elapsed = time.perf_counter() - started
+        if response.status_code >= 500:
+            self.stats.record(elapsed, ok=False)
+            self.breaker.record_failure()
+            raise ProviderUnavailableError("Provedor de autenticação indisponível")
+        # 4xx é resposta legítima (sessão inválida): o provedor está saudável
+        self.stats.record(elapsed, ok=True)
+        self.breaker.record_success()
+        if response.status_code != 200:
+            raise InvalidSessionError("Sessão inválida")
+        try:
+            return response.json()
+        except ValueError:
+            raise InvalidSessionError("Sessão inválida")
+
+    def metrics(self) -> dict:
+        return {
+            "url": self.url,
+            "circuit": self.breaker.state,
+            "consecutive_failures": self.breaker.failures,
+            "times_opened": self.breaker.times_opened,
+            **self.stats.snapshot(),
+        }
+
+    async def aclose(self):
+        await self._client.aclose()
@@ -0,0 +1,121 @@
+"""
+Carregadores em lote (estilo DataLoader) por requisição.
+
+``load(key)`` não consulta o banco na hora: as chaves pedidas no mesmo ciclo
+do event loop são juntadas e buscadas com uma única consulta ``$in`` (uma por
+tenant), e o resultado fica memorizado até o fim da requisição. Assim, um laço
+que resolve o funcionário de cada agendamento faz uma consulta, não N.
+
+O middleware cria um conjunto novo de carregadores por requisição (contextvar);
+fora de uma requisição (scripts, tarefas) get_loaders devolve um conjunto
+avulso, que só memoriza enquanto o chamador o mantiver.
+"""
+
+import asyncio
+from collections import defaultdict
+from contextvars import ContextVar
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from fastapi import Request
+
+
+class EntityLoader:
+    """Carrega documentos de uma coleção pelo id público, em lote e com memo."""
+
+    def __init__(self, collection, key_field: str):
+        self.collection = collection
+        self.key_field = key_field
+        self._futures: Dict[Tuple[Optional[str], str], asyncio.Future] = {}
+        self._pending: Dict[Tuple[Optional[str], str], asyncio.Future] = {}
+        self._tasks = set()
+        self.queries = 0
+
+    def load(self, key: str, tenant_id: Optional[str] = None) -> "asyncio.Future":
+        """
+        Documento cujo ``key_field`` é ``key`` (None se não existir).
+
+        Com ``tenant_id`` a busca é restrita ao tenant: um id de outro tenant
+        devolve None.
+        """
+        cache_key = (tenant_id, key)
+        future = self._futures.get(cache_key)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = loop.create_future()
+            self._futures[cache_key] = future
+            if not self._pending:
+                loop.call_soon(self._dispatch)
+            self._pending[cache_key] = future
+        return future
+
+    async def load_many(self, keys: Iterable[str], tenant_id: Optional[str] = None) -> List[Optional[dict]]:
+        return list(await asyncio.gather(*(self.load(key, tenant_id) for key in keys)))
+
+    def prime(self, doc: dict, tenant_id: Optional[str] = None):
+        """Registra um documento já lido para não buscá-lo de novo."""
+        cache_key = (tenant_id, doc[self.key_field])
+        if cache_key not in self._futures:
+            future = asyncio.get_running_loop().create_future()
+            future.set_result(doc)
+            self._futures[cache_key] = future
+
+    def clear(self, key: str):
+        """Esquece ``key`` (depois de uma escrita no documento)."""
+        for cache_key in [cache_key for cache_key in self._futures if cache_key[1] == key]:
+            if cache_key not in self._pending:
+                del self._futures[cache_key]
+
+    def _dispatch(self):
+        pending, self._pending = self._pending, {}
+        task = asyncio.ensure_future(self._fetch(pending))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _fetch(self, pending: Dict[Tuple[Optional[str], str], asyncio.Future]):
+        keys_by_tenant = defaultdict(list)
+        for tenant_id, key in pending:
+            keys_by_tenant[tenant_id].append(key)
+        try:
+            for tenant_id, keys in keys_by_tenant.items():
+                query = {self.key_field: {"$in": keys}}
+                if tenant_id is not None:
+                    query["tenant_id"] = tenant_id
+                self.queries += 1
+                docs = await self.collection.find(query, {"_id": 0}).to_list(None)
+                found = {doc[self.key_field]: doc for doc in docs}
+                for key in keys:
+                    pending[(tenant_id, key)].set_result(found.get(key))
+        except Exception as exc:
+            for cache_key, future in pending.items():
+                if not future.done():
+                    future.set_exception(exc)
+                    self._futures.pop(cache_key, None)
+
+
+class Loaders:
+    def __init__(self, db):
+        self.db = db
+        self.employees = EntityLoader(db.employees, "employee_id")
+        self.services = EntityLoader(db.services, "service_id")
+        self.tenants = EntityLoader(db.tenants, "tenant_id")
+        self.users = EntityLoader(db.users, "user_id")
+
+
+_current_loaders: ContextVar[Optional[Loaders]] = ContextVar("loaders", default=None)
+
+
+def get_loaders(db) -> Loaders:
+    """Carregadores da requisição atual (ou um conjunto avulso fora de requisição)."""
+    loaders = _current_loaders.get()
+    if loaders is None or loaders.db is not db:
+        return Loaders(db)
+    return loaders
+
+
+async def loader_middleware(request: Request, call_next):
+    """Um conjunto de carregadores por requisição; nada é compartilhado entre requisições."""
+    token = _current_loaders.set(Loaders(request.app.state.db))
+    try:
+        return await call_next(request)
+    finally:
+        _current_loaders.reset(token)
@@ -0,0 +1,39 @@
+"""
+Estatísticas de latência em memória, usadas pela telemetria do provedor de
+autenticação e do MongoDB.
+"""
+
+from collections import deque
+
+# Amostras de latência guardadas para os percentis
+LATENCY_WINDOW = 1000
+
+
+class LatencyStats:
+    def __init__(self, window: int = LATENCY_WINDOW):
+        self.samples = deque(maxlen=window)
+        self.requests = 0
+        self.errors = 0
+        self.rejected = 0
+
+    def record(self, seconds: float, ok: bool):
+        self.requests += 1
+        if not ok:
+            self.errors += 1
+        self.samples.append(seconds)
+
+    def snapshot(self) -> dict:
+        ordered = sorted(self.samples)
+
+        def percentile(p: float) -> float:
+            return ordered[min(int(len(ordered) * p), len(ordered) - 1)] * 1000 if ordered else 0.0
+
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "rejected": self.rejected,
+            "p50_ms": percentile(0.50),
+            "p95_ms": percentile(0.95),
+            "p99_ms": percentile(0.99),
+            "max_ms": ordered[-1] * 1000 if ordered else 0.0,
+        }
@@ -0,0 +1,140 @@
+"""
+Telemetria do driver do MongoDB (pool de conexões e comandos).
+
+Os listeners do pymongo são chamados nas threads do driver, então cada
+contador é protegido por um lock. O tempo de espera no checkout é medido
+entre ConnectionCheckOutStarted e ConnectionCheckedOut/CheckOutFailed da
+mesma thread: espera alta com o pool cheio indica falta de conexões, não
+lentidão do servidor, que aparece na latência dos comandos.
+"""
+
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, Tuple
+
+from pymongo import monitoring
+
+from backend.utils.metrics import LatencyStats
+
+# Comandos com estatística própria; os demais entram em "outros"
+TRACKED_COMMANDS = {
+    "find", "getMore", "aggregate", "insert", "update", "delete", "findAndModify", "count", "explain", "createIndexes"
+}
+
+
+def _address(address) -> str:
+    return f"{address[0]}:{address[1]}" if isinstance(address, tuple) else str(address)
+
+
+class PoolMetrics(monitoring.ConnectionPoolListener):
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._checkout_started: Dict[Tuple[int, str], float] = {}
+        self.open = defaultdict(int)
+        self.checked_out = defaultdict(int)
+        self.waiting = defaultdict(int)
+        self.created = defaultdict(int)
+        self.cleared = defaultdict(int)
+        self.checkout_failures: Dict[str, int] = defaultdict(int)
+        self.checkout_wait = LatencyStats()
+
+    def _finish_checkout(self, event, ok: bool):
+        address = _address(event.address)
+        with self._lock:
+            self.waiting[address] -= 1
+            started = self._checkout_started.pop((threading.get_ident(), address), None)
+            if started is not None:
+                self.checkout_wait.record(time.perf_counter() - started, ok)
+            if ok:
+                self.checked_out[address] += 1
+            else:
+                self.checkout_failures[event.reason] += 1
+
+    def connection_check_out_started(self, event):
+        address = _address(event.address)
+        with self._lock:
+            self.waiting[address] += 1
+            self._checkout_started[(threading.get_ident(), address)] = time.perf_counter()
+
+    def connection_checked_out(self, event):
+        self._finish_checkout(event, ok=True)
+
+    def connection_check_out_failed(self, event):
+        self._finish_checkout(event, ok=False)
+
+    def connection_checked_in(self, event):
+        with self._lock:
+            self.checked_out[_address(event.address)] -= 1
+
+    def connection_created(self, event):
+        address = _address(event.address)
+        with self._lock:
+            self.open[address] += 1
+            self.created[address] += 1
+
+    def connection_closed(self, event):
+        with self._lock:
+            self.open[_address(event.address)] -= 1
+
+    def pool_cleared(self, event):
+        with self._lock:
+            self.cleared[_address(event.address)] += 1
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_ready(self, event):
+        pass
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            servers = {
+                address: {
+                    "open": self.open[address],
+                    "checked_out": self.checked_out[address],
+                    "waiting": self.waiting[address],
+                    "created": self.created[address],
+                    "cleared": self.cleared[address],
+                }
+                for address in sorted(set(self.open) | set(self.waiting))
+            }
+            return {
+                "servers": servers,
+                "checkout_wait": self.checkout_wait.snapshot(),
+                "checkout_failures": dict(self.checkout_failures),
+            }
+
+
+class CommandMetrics(monitoring.CommandListener):
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.commands: Dict[str, LatencyStats] = defaultdict(LatencyStats)
+
+    def _record(self, event, ok: bool):
+        name = event.command_name if event.command_name in TRACKED_COMMANDS else "outros"
+        with self._lock:
+            self.commands[name].record(event.duration_micros / 1e6, ok)
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        self._record(event, ok=True)
+
+    def failed(self, event):
+        self._record(event, ok=False)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {name: stats.snapshot() for name, stats in sorted(self.commands.items())}
+
+
+pool_metrics = PoolMetrics()
+command_metrics = CommandMetrics()
@@ -0,0 +1,54 @@
+"""
+Paginação por chave (keyset) com cursores opacos.
+
+O cursor guarda os valores da chave de ordenação do último item da página
+(ex.: date, time, appointment_id) em base64url. A página seguinte é lida com
+um filtro "depois desta chave" sobre um índice na mesma ordem, então qualquer
+página custa o mesmo que a primeira, independente da profundidade.
+"""
+
+import base64
+import json
+from typing import List, Optional, Sequence
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+class InvalidCursorError(ValueError):
+    pass
+
+
+def encode_cursor(values: Sequence) -> str:
+    return base64.urlsafe_b64encode(json.dumps(list(values), separators=(",", ":")).encode()).rstrip(b"=").decode()
+
+
+def decode_cursor(cursor: str, size: int) -> list:
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except ValueError:
+        raise InvalidCursorError("Cursor inválido")
+    if not isinstance(values, list) or len(values) != size:
+        raise InvalidCursorError("Cursor inválido")
+    return values
+
+
+def after_key_filter(fields: Sequence[str], values: Sequence) -> dict:
+    """
+    Filtro dos documentos estritamente depois de ``values`` na ordem crescente de ``fields``.
+
+    Para (a, b, c): a > va, ou a = va e b > vb, ou a = va, b = vb e c > vc.
+    """
+    clauses = []
+    for i, field in enumerate(fields):
+        clause = {prev: values[j] for j, prev in enumerate(fields[:i])}
+        clause[field] = {"$gt": values[i]}
+        clauses.append(clause)
+    return {"$or": clauses}
+
+
+def page_cursor(docs: List[dict], fields: Sequence[str], limit: int) -> Optional[str]:
+    """Cursor da próxima página, ou None se ``docs`` (lidos com limit + 1) já é a última."""
+    if len(docs) <= limit:
+        return None
+    last = docs[limit - 1]
+    return encode_cursor([last.get(field) for field in fields])
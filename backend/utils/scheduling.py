@@ -0,0 +1,192 @@
+"""
+Núcleo de agendamento: conversão de horários e detecção de sobreposição.
+
+Os horários 'HH:MM' são convertidos uma única vez em minutos inteiros e os
+intervalos do dia ficam ordenados por início, com o maior fim acumulado de
+cada prefixo. Assim "algum intervalo cruza [início, fim)?" é respondido com
+uma busca binária, O(log n), em vez de percorrer todos os documentos.
+"""
+
+from bisect import bisect_left
+from datetime import date as date_type, datetime, timedelta, timezone
+from functools import lru_cache
+from typing import Iterable, List, NamedTuple, Optional
+
+MINUTES_PER_DAY = 24 * 60
+
+# Duração assumida para agendamentos antigos sem service_duration
+DEFAULT_DURATION = 30
+
+# Granularidade das reservas de horário, em minutos: inícios e durações
+# precisam cair nessa grade
+RESERVATION_UNIT = 5
+
+
+class ScheduleConflictError(Exception):
+    """O intervalo pedido conflita com a agenda do funcionário."""
+
+
+@lru_cache(maxsize=4096)
+def time_to_minutes(value: str) -> int:
+    """Converte 'HH:MM' em minutos desde 00:00 (memoizado: há poucos valores distintos)."""
+    hour, minute = value.split(":")
+    return int(hour) * 60 + int(minute)
+
+
+def is_aligned(start: int, duration: int) -> bool:
+    return start % RESERVATION_UNIT == 0 and duration > 0 and duration % RESERVATION_UNIT == 0
+
+
+def minutes_to_time(minutes: int) -> str:
+    """Converte minutos desde 00:00 em 'HH:MM'."""
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+class Interval(NamedTuple):
+    start: int
+    end: int
+    kind: str  # 'appointment' ou 'block'
+    doc: dict
+
+
+def appointment_interval(appt: dict) -> Interval:
+    if appt.get("start_min") is not None:
+        return Interval(appt["start_min"], appt["end_min"], "appointment", appt)
+    start = time_to_minutes(appt["time"])
+    return Interval(start, start + (appt.get("service_duration") or DEFAULT_DURATION), "appointment", appt)
+
+
+def block_interval(block: dict) -> Interval:
+    if block.get("start_min") is not None:
+        return Interval(block["start_min"], block["end_min"], "block", block)
+    if block.get("is_whole_day") or not (block.get("start_time") and block.get("end_time")):
+        return Interval(0, MINUTES_PER_DAY, "block", block)
+    return Interval(time_to_minutes(block["start_time"]), time_to_minutes(block["end_time"]), "block", block)
+
+
+# ============== CAMPOS TIPADOS ==============
+#
+# Além de date ('YYYY-MM-DD') e time/start_time/end_time ('HH:MM'), agendamentos
+# e bloqueios gravam day (data nativa, meia-noite UTC) e start_min/end_min
+# (minutos inteiros, fim exclusivo). Com eles a sobreposição vira um predicado
+# de intervalo indexável: start_min < fim AND end_min > início.
+
+
+def native_day(value: str) -> datetime:
+    """'YYYY-MM-DD' como datetime à meia-noite UTC (o BSON não tem tipo só de data)."""
+    return datetime.combine(date_type.fromisoformat(value), datetime.min.time(), timezone.utc)
+
+
+def appointment_schedule_fields(date: str, time: str, duration: Optional[int] = None) -> dict:
+    start = time_to_minutes(time)
+    return {"day": native_day(date), "start_min": start, "end_min": start + (duration or DEFAULT_DURATION)}
+
+
+def block_schedule_fields(date: str, start_time: Optional[str] = None, end_time: Optional[str] = None) -> dict:
+    if start_time and end_time:
+        start, end = time_to_minutes(start_time), time_to_minutes(end_time)
+    else:
+        start, end = 0, MINUTES_PER_DAY
+    return {"day": native_day(date), "start_min": start, "end_min": end}
+
+
+def overlap_filter(start: int, end: int) -> dict:
+    """
+    Documentos que cruzam [start, end).
+
+    Documentos ainda sem start_min (gravados antes da migração 4) também são
+    devolvidos; quem consulta confere a sobreposição pelos campos em texto.
+    """
+    return {"$or": [{"start_min": {"$lt": end}, "end_min": {"$gt": start}}, {"start_min": None}]}
+
+
+def schedule_strings(values: dict, time_field: Optional[str] = "time") -> dict:
+    """
+    Completa date/time a partir de day/start_min quando só os campos tipados existem.
+
+    Usado pelos modelos Pydantic para aceitar documentos nos dois formatos.
+    """
+    if not isinstance(values, dict):
+        return values
+    values = dict(values)
+    day = values.get("day")
+    if not values.get("date") and isinstance(day, datetime):
+        values["date"] = day.date().isoformat()
+    if time_field and not values.get(time_field) and values.get("start_min") is not None:
+        values[time_field] = minutes_to_time(values["start_min"])
+    return values
+
+
+class DayIntervals:
+    """Intervalos ocupados de um dia com consulta de sobreposição em O(log n)."""
+
+    def __init__(self, intervals: Iterable[Interval] = ()):
+        self._intervals: List[Interval] = sorted(
+            (i for i in intervals if i.end > i.start), key=lambda i: (i.start, i.end)
+        )
+        self._starts: List[int] = []
+        self._max_end: List[int] = []
+        self._argmax: List[int] = []
+        self._rebuild(0)
+
+    @classmethod
+    def from_documents(cls, blocked: Iterable[dict] = (), appointments: Iterable[dict] = ()) -> "DayIntervals":
+        return cls(
+            [block_interval(b) for b in blocked]
+            + [appointment_interval(a) for a in appointments if a.get("time")]
+        )
+
+    def __len__(self) -> int:
+        return len(self._intervals)
+
+    def _rebuild(self, index: int):
+        """Recalcula inícios e máximos de fim a partir de ``index``."""
+        del self._starts[index:]
+        del self._max_end[index:]
+        del self._argmax[index:]
+        for i in range(index, len(self._intervals)):
+            interval = self._intervals[i]
+            self._starts.append(interval.start)
+            if i and self._max_end[i - 1] >= interval.end:
+                self._max_end.append(self._max_end[i - 1])
+                self._argmax.append(self._argmax[i - 1])
+            else:
+                self._max_end.append(interval.end)
+                self._argmax.append(i)
+
+    def add(self, interval: Interval):
+        if interval.end <= interval.start:
+            return
+        index = bisect_left(self._starts, interval.start)
+        self._intervals.insert(index, interval)
+        self._rebuild(index)
+
+    def find_overlap(self, start: int, end: int) -> Optional[Interval]:
+        """Algum intervalo que cruza [start, end), ou None."""
+        if end <= start:
+            return None
+        # Candidatos: intervalos que começam antes de ``end``; basta o de maior fim
+        index = bisect_left(self._starts, end)
+        if index == 0 or self._max_end[index - 1] <= start:
+            return None
+        return self._intervals[self._argmax[index - 1]]
+
+    def overlaps(self, start: int, end: int) -> bool:
+        return self.find_overlap(start, end) is not None
+
+
+def recurrence_dates(
+    first_date: str, interval_weeks: int, count: Optional[int] = None,
+    until: Optional[str] = None, limit: int = 52
+) -> List[str]:
+    """Datas 'YYYY-MM-DD' de uma série semanal, limitadas por count, until e limit."""
+    start = date_type.fromisoformat(first_date)
+    last = date_type.fromisoformat(until) if until else None
+    total = min(count or limit, limit)
+    dates = []
+    for i in range(total):
+        day = start + timedelta(weeks=i * interval_weeks)
+        if last is not None and day > last:
+            break
+        dates.append(day.isoformat())
+    return dates
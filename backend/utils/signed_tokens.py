@@ -0,0 +1,196 @@
+"""
+Tokens de sessão assinados (HMAC-SHA256), verificados sem acesso ao banco.
+
+Formato: ``v1.<payload>.<assinatura>``, ambos em base64url. O payload leva os
+dados do usuário necessários para montar o ``User`` e a expiração, então a
+verificação é só CPU. Para o logout continuar valendo existe uma pequena lista
+de revogação (por token ou por usuário), mantida em memória e recarregada
+apenas quando o contador de versão no banco muda; o contador é consultado no
+máximo a cada REVOCATION_CHECK_SECONDS.
+
+Cada token leva a geração do usuário (``gen``, em users.token_generation). Um
+novo login incrementa a geração e, só se o token anterior ainda não venceu,
+grava uma revogação "gerações abaixo de N"; logins de quem não tem token
+válido não mexem na lista.
+"""
+
+import base64
+import hashlib
+import hmac
+import json
+import os
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Dict, Optional, Set
+
+from pymongo import ReturnDocument
+
+TOKEN_PREFIX = "v1."
+
+# 'session' (tokens opacos em user_sessions) ou 'signed' (tokens assinados)
+AUTH_MODE = os.getenv("AUTH_MODE", "session")
+AUTH_TOKEN_SECRET = os.getenv("AUTH_TOKEN_SECRET", "")
+
+# Intervalo máximo entre consultas ao contador de revogações
+REVOCATION_CHECK_SECONDS = float(os.getenv("AUTH_REVOCATION_CHECK_SECONDS", "5"))
+
+USER_FIELDS = ("user_id", "tenant_id", "role", "email", "name", "picture", "created_at")
+
+
+def signed_mode() -> bool:
+    return AUTH_MODE == "signed"
+
+
+def is_signed_token(token: str) -> bool:
+    return token.startswith(TOKEN_PREFIX)
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+
+def _b64decode(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+
+def check_auth_config():
+    """Falha no startup se o modo assinado estiver ativo sem segredo configurado."""
+    if signed_mode() and not AUTH_TOKEN_SECRET:
+        raise RuntimeError("AUTH_MODE=signed exige AUTH_TOKEN_SECRET")
+
+
+def _secret() -> bytes:
+    if not AUTH_TOKEN_SECRET:
+        raise RuntimeError("AUTH_TOKEN_SECRET não configurado")
+    return AUTH_TOKEN_SECRET.encode()
+
+
+def _signature(body: str) -> str:
+    return _b64encode(hmac.new(_secret(), body.encode(), hashlib.sha256).digest())
+
+
+def issue_token(user: dict, expires_at: datetime, generation: int = 0) -> str:
+    """Emite um token assinado para ``user`` (documento de users) válido até ``expires_at``."""
+    payload = {field: user.get(field) for field in USER_FIELDS}
+    if isinstance(payload["created_at"], datetime):
+        payload["created_at"] = payload["created_at"].isoformat()
+    payload.update({
+        "jti": uuid.uuid4().hex, "gen": generation, "iat": int(time.time()), "exp": int(expires_at.timestamp())
+    })
+    body = TOKEN_PREFIX + _b64encode(json.dumps(payload, separators=(",", ":")).encode())
+    return f"{body}.{_signature(body)}"
+
+
+def decode_token(token: str) -> Optional[dict]:
+    """Payload de um token com assinatura válida e não expirado, ou None (não consulta revogações)."""
+    if not AUTH_TOKEN_SECRET or not is_signed_token(token):
+        return None
+    body, _, signature = token.rpartition(".")
+    if not body or not hmac.compare_digest(signature, _signature(body)):
+        return None
+    try:
+        payload = json.loads(_b64decode(body[len(TOKEN_PREFIX):]))
+    except ValueError:
+        return None
+    if payload.get("exp", 0) < time.time():
+        return None
+    return payload
+
+
+class RevocationList:
+    """Cópia em memória de `revoked_tokens`, recarregada quando `auth_state.version` muda."""
+
+    def __init__(self, check_seconds: float = REVOCATION_CHECK_SECONDS):
+        self.check_seconds = check_seconds
+        self.version = None
+        self.tokens: Set[str] = set()
+        self.users: Dict[str, int] = {}  # user_id -> tokens de geração menor que esta são inválidos
+        self._checked_at = 0.0
+
+    async def refresh(self, db, force: bool = False):
+        if not force and time.monotonic() - self._checked_at < self.check_seconds:
+            return
+        self._checked_at = time.monotonic()
+        state = await db.auth_state.find_one({"_id": "revocations"}, {"version": 1})
+        version = state["version"] if state else 0
+        if version == self.version:
+            return
+        docs = await db.revoked_tokens.find(
+            {"expires_at": {"$gt": datetime.now(timezone.utc)}}, {"_id": 0, "jti": 1, "user_id": 1, "generation": 1}
+        ).to_list(None)
+        self.tokens = {doc["jti"] for doc in docs if doc.get("jti")}
+        self.users = {}
+        for doc in docs:
+            if doc.get("generation") is not None:
+                self.users[doc["user_id"]] = max(self.users.get(doc["user_id"], 0), doc["generation"])
+        self.version = version
+
+    def is_revoked(self, payload: dict) -> bool:
+        return payload["jti"] in self.tokens or payload.get("gen", 0) < self.users.get(payload["user_id"], 0)
+
+
+revocation_list = RevocationList()
+
+
+async def _bump_version(db):
+    state = await db.auth_state.find_one_and_update(
+        {"_id": "revocations"}, {"$inc": {"version": 1}}, upsert=True, return_document=ReturnDocument.AFTER
+    )
+    return state["version"]
+
+
+async def revoke_token(db, payload: dict):
+    """Revoga um token (logout) até a sua expiração."""
+    await db.revoked_tokens.insert_one({
+        "jti": payload["jti"],
+        "user_id": payload["user_id"],
+        "expires_at": datetime.fromtimestamp(payload["exp"], timezone.utc),
+        "revoked_at": datetime.now(timezone.utc)
+    })
+    await _bump_version(db)
+    revocation_list.tokens.add(payload["jti"])
+
+
+async def revoke_user_tokens(db, user_id: str, generation: int, expires_at: datetime):
+    """Revoga os tokens do usuário de geração menor que ``generation`` até ``expires_at``."""
+    await db.revoked_tokens.insert_one({
+        "user_id": user_id,
+        "generation": generation,
+        "expires_at": expires_at,
+        "revoked_at": datetime.now(timezone.utc)
+    })
+    await _bump_version(db)
+    revocation_list.users[user_id] = max(revocation_list.users.get(user_id, 0), generation)
+
+
+async def next_token_generation(db, user_id: str, expires_at: datetime) -> int:
+    """
+    Avança a geração de tokens do usuário (novo login substitui os anteriores).
+
+    A revogação só é gravada se o último token emitido ainda não venceu.
+    """
+    previous = await db.users.find_one_and_update(
+        {"user_id": user_id},
+        {"$inc": {"token_generation": 1}, "$set": {"token_expires_at": expires_at}},
+        projection={"token_generation": 1, "token_expires_at": 1}
+    ) or {}
+    generation = previous.get("token_generation", 0) + 1
+    previous_expires_at = previous.get("token_expires_at")
+    if previous_expires_at is not None:
+        if previous_expires_at.tzinfo is None:
+            previous_expires_at = previous_expires_at.replace(tzinfo=timezone.utc)
+        if previous_expires_at > datetime.now(timezone.utc):
+            await revoke_user_tokens(db, user_id, generation, previous_expires_at)
+    return generation
+
+
+async def verify_token(db, token: str) -> Optional[dict]:
+    """Payload de um token válido e não revogado, ou None."""
+    payload = decode_token(token)
+    if payload is None:
+        return None
+    await revocation_list.refresh(db)
+    if revocation_list.is_revoked(payload):
+        return None
+    return payload
@@ -0,0 +1,50 @@
+"""
+Resolução do tenant da requisição.
+
+O middleware resolve o tenant uma única vez por requisição a partir do host
+(domínio próprio cadastrado em ``domain`` ou subdomínio = ``slug``), usando o
+cache de tenants, e o deixa em ``request.state.tenant`` para as rotas.
+"""
+
+from fastapi import HTTPException, Request
+from typing import Optional
+
+from backend.utils.auth import get_tenant_from_host
+from backend.utils.cache import tenant_cache
+
+
+def request_host(request: Request) -> str:
+    return request.headers.get("host", "").split(":")[0].lower()
+
+
+async def resolve_tenant(db, host: str, slug: str) -> Optional[dict]:
+    """Tenant do host (domínio próprio tem prioridade sobre o slug), com cache positivo e negativo."""
+    found, tenant = tenant_cache.get(host)
+    if found:
+        return tenant
+    candidates = await db.tenants.find({"$or": [{"domain": host}, {"slug": slug}]}, {"_id": 0}).to_list(2)
+    tenant = next((t for t in candidates if t.get("domain") == host), None) or next(
+        (t for t in candidates if t.get("slug") == slug), None
+    )
+    tenant_cache.put(host, tenant)
+    return tenant
+
+
+async def get_request_tenant(request: Request) -> dict:
+    """Tenant resolvido pelo middleware; levanta 404 se o host não corresponder a nenhum tenant."""
+    if not hasattr(request.state, "tenant"):
+        request.state.tenant = await resolve_tenant(
+            request.app.state.db, request_host(request), get_tenant_from_host(request)
+        )
+    if not request.state.tenant:
+        raise HTTPException(status_code=404, detail="Tenant não encontrado")
+    return request.state.tenant
+
+
+async def tenant_middleware(request: Request, call_next):
+    """Anexa o tenant do host em request.state.tenant (None se desconhecido)."""
+    if request.url.path.startswith("/api"):
+        request.state.tenant = await resolve_tenant(
+            request.app.state.db, request_host(request), get_tenant_from_host(request)
+        )
+    return await call_next(request)
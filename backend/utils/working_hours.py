@@ -0,0 +1,67 @@
+"""
+Compilação de modelos de expediente (semanal + exceções por data) em máscaras
+de minutos, para serem cruzadas com o bitmap de ocupação do dia.
+"""
+
+from datetime import date as date_type
+from typing import Dict, Iterable, List, Optional
+
+from backend.models.working_hours import WEEKDAYS
+from backend.utils.availability import DEFAULT_HOURS, SLOT_STEP, DayHours, time_to_minutes
+
+
+def _to_minutes(intervals: Iterable[dict]) -> List[List[int]]:
+    return [[time_to_minutes(i["start"]), time_to_minutes(i["end"])] for i in intervals]
+
+
+class CompiledSchedule:
+    """Expediente de um funcionário com as máscaras de cada dia da semana e exceções."""
+
+    __slots__ = ("weekly", "exceptions", "step")
+
+    def __init__(self, weekly: List[DayHours], exceptions: Dict[str, DayHours], step: int):
+        self.weekly = weekly
+        self.exceptions = exceptions
+        self.step = step
+
+    def day_hours(self, date: str) -> DayHours:
+        hours = self.exceptions.get(date)
+        if hours is not None:
+            return hours
+        return self.weekly[date_type.fromisoformat(date).weekday()]
+
+
+# Sem nenhuma configuração vale a janela original 08:00-20:00 todos os dias
+DEFAULT_SCHEDULE = CompiledSchedule([DEFAULT_HOURS] * 7, {}, SLOT_STEP)
+
+
+def compile_schedule(tenant_doc: Optional[dict], employee_doc: Optional[dict]) -> CompiledSchedule:
+    """
+    Combina o expediente do tenant com o do funcionário.
+
+    Cada dia da semana / data de exceção definido pelo funcionário substitui o
+    do tenant. Se o tenant tem expediente configurado, dias da semana que ele
+    não lista ficam fechados; sem expediente do tenant a base é 08:00-20:00.
+    """
+    if not tenant_doc and not employee_doc:
+        return DEFAULT_SCHEDULE
+    tenant_doc = tenant_doc or {}
+    employee_doc = employee_doc or {}
+    step = employee_doc.get("slot_step") or tenant_doc.get("slot_step") or SLOT_STEP
+    tenant_weekly = tenant_doc.get("weekly", {})
+    employee_weekly = employee_doc.get("weekly", {})
+    weekly = []
+    for day in WEEKDAYS:
+        if day in employee_weekly:
+            weekly.append(DayHours.from_intervals(_to_minutes(employee_weekly[day]), step))
+        elif day in tenant_weekly:
+            weekly.append(DayHours.from_intervals(_to_minutes(tenant_weekly[day]), step))
+        elif tenant_doc:
+            weekly.append(DayHours.from_intervals([], step))
+        else:
+            weekly.append(DayHours.window(step=step))
+    exceptions = {
+        date: DayHours.from_intervals(_to_minutes(intervals), step)
+        for date, intervals in {**tenant_doc.get("exceptions", {}), **employee_doc.get("exceptions", {})}.items()
+    }
+    return CompiledSchedule(weekly, exceptions, step)
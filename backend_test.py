@@ -174,6 +174,104 @@ class SalonAPITester:
             self.log_test("Available slots endpoint structure", False, f"Response: {data}")
             return False
 
+    def test_any_employee_slots_endpoint(self):
+        """Test "any professional" available slots endpoint"""
+        params = "service_id=test&date=2024-01-01"
+        success, data = self.make_request('GET', f'/appointments/available-slots/any?{params}', expected_status=404)
+        if success or (not success and "não encontrado" in str(data).lower()):
+            self.log_test("Any professional slots endpoint structure", True)
+            return True
+        else:
+            self.log_test("Any professional slots endpoint structure", False, f"Response: {data}")
+            return False
+
+    def test_next_available_endpoint(self):
+        """Test next available slot search endpoint"""
+        success, data = self.make_request('GET', '/appointments/next-available?service_id=test&count=3', expected_status=404)
+        if success or (not success and "não encontrado" in str(data).lower()):
+            self.log_test("Next available endpoint structure", True)
+            return True
+        else:
+            self.log_test("Next available endpoint structure", False, f"Response: {data}")
+            return False
+
+    def test_available_calendar_endpoint(self):
+        """Test available calendar (multi-day slots) endpoint"""
+        params = "employee_id=test&service_id=test&date_from=2024-01-01&date_to=2024-01-31"
+        success, data = self.make_request('GET', f'/appointments/available-calendar?{params}', expected_status=404)
+        if success or (not success and "não encontrado" in str(data).lower()):
+            self.log_test("Available calendar endpoint structure", True)
+            return True
+        else:
+            self.log_test("Available calendar endpoint structure", False, f"Response: {data}")
+            return False
+
+    def test_appointment_series_endpoint(self):
+        """Test recurring appointment series endpoint"""
+        data = {
+            "service_id": "test", "employee_id": "test", "date": "2024-01-01", "time": "10:00",
+            "client_name": "Test", "client_email": "test@example.com",
+            "recurrence": {"frequency": "weekly", "count": 4}
+        }
+        success, response = self.make_request('POST', '/appointments/series', data, expected_status=404)
+        if success or (not success and "não encontrado" in str(response).lower()):
+            self.log_test("Appointment series endpoint structure", True)
+            return True
+        else:
+            self.log_test("Appointment series endpoint structure", False, f"Response: {response}")
+            return False
+
+    def test_waitlist_without_auth(self):
+        """Test waitlist listing endpoint without auth"""
+        success, data = self.make_request('GET', '/waitlist', expected_status=401)
+        if success:
+            self.log_test("Waitlist without auth (401 expected)", True)
+            return True
+        else:
+            self.log_test("Waitlist without auth (401 expected)", False, f"Response: {data}")
+            return False
+
+    def test_export_without_auth(self):
+        """Test appointment export endpoint without auth"""
+        success, data = self.make_request('GET', '/appointments/export?format=csv', expected_status=401)
+        if success:
+            self.log_test("Appointments export without auth (401 expected)", True)
+            return True
+        else:
+            self.log_test("Appointments export without auth (401 expected)", False, f"Response: {data}")
+            return False
+
+    def test_daily_reminders_without_auth(self):
+        """Test daily reminders endpoint without auth"""
+        success, data = self.make_request('POST', '/appointments/send-daily-reminders', expected_status=401)
+        if success:
+            self.log_test("Daily reminders without auth (401 expected)", True)
+            return True
+        else:
+            self.log_test("Daily reminders without auth (401 expected)", False, f"Response: {data}")
+            return False
+
+    def test_propagation_jobs_without_auth(self):
+        """Test propagation jobs endpoint without auth"""
+        success, data = self.make_request('GET', '/propagation-jobs', expected_status=401)
+        if success:
+            self.log_test("Propagation jobs without auth (401 expected)", True)
+            return True
+        else:
+            self.log_test("Propagation jobs without auth (401 expected)", False, f"Response: {data}")
+            return False
+
+    def test_bulk_status_without_auth(self):
+        """Test bulk status endpoint without auth"""
+        payload = {"items": [{"appointment_id": "appt_test", "status": "completed"}]}
+        success, data = self.make_request('POST', '/appointments/bulk-status', payload, expected_status=401)
+        if success:
+            self.log_test("Bulk status without auth (401 expected)", True)
+            return True
+        else:
+            self.log_test("Bulk status without auth (401 expected)", False, f"Response: {data}")
+            return False
+
     def test_blocked_times_without_auth(self):
         """Test blocked times endpoint without auth"""
         success, data = self.make_request('GET', '/blocked-times', expected_status=401)
@@ -227,6 +325,15 @@ class SalonAPITester:
         
         # Edge case tests
         self.test_available_slots_endpoint()
+        self.test_available_calendar_endpoint()
+        self.test_any_employee_slots_endpoint()
+        self.test_next_available_endpoint()
+        self.test_appointment_series_endpoint()
+        self.test_waitlist_without_auth()
+        self.test_export_without_auth()
+        self.test_daily_reminders_without_auth()
+        self.test_propagation_jobs_without_auth()
+        self.test_bulk_status_without_auth()
         self.test_invalid_endpoints()
 
         # Print summary
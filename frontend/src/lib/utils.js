@@ -4,3 +4,9 @@ import { twMerge } from "tailwind-merge"
 export function cn(...inputs) {
   return twMerge(clsx(inputs));
 }
+
+// Busca uma página de uma listagem paginada; nextCursor vem do cabeçalho X-Next-Cursor (null na última)
+export async function fetchPage(axios, url, config = {}, cursor = null) {
+  const response = await axios.get(url, { ...config, params: { ...config.params, cursor: cursor || undefined } });
+  return { items: response.data, nextCursor: response.headers["x-next-cursor"] || null };
+}
@@ -21,6 +21,7 @@ import {
 import { Input } from "../../components/ui/input";
 import { Label } from "../../components/ui/label";
 import axios from "axios";
+import { fetchPage } from "../../lib/utils";
 import { API } from "../../App";
 import { toast } from "sonner";
 import { format, parseISO } from "date-fns";
@@ -43,6 +44,8 @@ import {
 
 export default function AdminAgenda() {
   const [appointments, setAppointments] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [employees, setEmployees] = useState([]);
   const [selectedDate, setSelectedDate] = useState(new Date());
   const [selectedEmployee, setSelectedEmployee] = useState("all");
@@ -56,15 +59,22 @@ export default function AdminAgenda() {
 
   useEffect(() => {
     fetchData();
-  }, []);
+  }, [selectedDate]);
+
+  // Só o dia selecionado vem do servidor; as demais páginas entram pelo "Carregar mais"
+  const appointmentsConfig = () => {
+    const day = format(selectedDate, "yyyy-MM-dd");
+    return { withCredentials: true, params: { date_from: day, date_to: day } };
+  };
 
   const fetchData = async () => {
     try {
-      const [appointmentsRes, employeesRes] = await Promise.all([
-        axios.get(`${API}/appointments`, { withCredentials: true }),
+      const [page, employeesRes] = await Promise.all([
+        fetchPage(axios, `${API}/appointments`, appointmentsConfig()),
         axios.get(`${API}/employees/all`, { withCredentials: true })
       ]);
-      setAppointments(appointmentsRes.data);
+      setAppointments(page.items);
+      setNextCursor(page.nextCursor);
       setEmployees(employeesRes.data);
     } catch (error) {
       console.error("Error fetching data:", error);
@@ -74,6 +84,19 @@ export default function AdminAgenda() {
     }
   };
 
+  const loadMore = async () => {
+    setLoadingMore(true);
+    try {
+      const page = await fetchPage(axios, `${API}/appointments`, appointmentsConfig(), nextCursor);
+      setAppointments((current) => [...current, ...page.items]);
+      setNextCursor(page.nextCursor);
+    } catch (error) {
+      toast.error("Erro ao carregar agendamentos");
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   const filteredAppointments = appointments.filter((appt) => {
     const dateMatch = format(selectedDate, "yyyy-MM-dd") === appt.date;
     const employeeMatch = selectedEmployee === "all" || appt.employee_id === selectedEmployee;
@@ -342,6 +365,18 @@ export default function AdminAgenda() {
                 </CardContent>
               </Card>
             )}
+            {!loading && nextCursor && (
+              <div className="mt-4 text-center">
+                <Button
+                  variant="outline"
+                  onClick={loadMore}
+                  disabled={loadingMore}
+                  data-testid="load-more-btn"
+                >
+                  {loadingMore ? "Carregando..." : "Carregar mais"}
+                </Button>
+              </div>
+            )}
           </div>
         </div>
       </div>
@@ -14,9 +14,10 @@ import {
   DialogFooter,
 } from "../../components/ui/dialog";
 import axios from "axios";
+import { fetchPage } from "../../lib/utils";
 import { API } from "../../App";
 import { toast } from "sonner";
-import { format, parseISO, isAfter, isBefore, startOfDay } from "date-fns";
+import { format, parseISO, isAfter, isBefore, startOfDay, subDays } from "date-fns";
 import { ptBR } from "date-fns/locale";
 import {
   Calendar,
@@ -28,8 +29,13 @@ import {
   CalendarDays
 } from "lucide-react";
 
+// Quantos dias de histórico a aba "Anteriores" alcança
+const HISTORY_DAYS = 90;
+
 export default function ClienteMeusAgendamentos() {
   const [appointments, setAppointments] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [loading, setLoading] = useState(true);
   const [activeTab, setActiveTab] = useState("upcoming");
   const [selectedAppointment, setSelectedAppointment] = useState(null);
@@ -41,10 +47,16 @@ export default function ClienteMeusAgendamentos() {
     fetchAppointments();
   }, []);
 
+  const appointmentsConfig = () => ({
+    withCredentials: true,
+    params: { date_from: format(subDays(new Date(), HISTORY_DAYS), "yyyy-MM-dd") },
+  });
+
   const fetchAppointments = async () => {
     try {
-      const response = await axios.get(`${API}/appointments`, { withCredentials: true });
-      setAppointments(response.data);
+      const page = await fetchPage(axios, `${API}/appointments`, appointmentsConfig());
+      setAppointments(page.items);
+      setNextCursor(page.nextCursor);
     } catch (error) {
       toast.error("Erro ao carregar agendamentos");
     } finally {
@@ -52,6 +64,19 @@ export default function ClienteMeusAgendamentos() {
     }
   };
 
+  const loadMore = async () => {
+    setLoadingMore(true);
+    try {
+      const page = await fetchPage(axios, `${API}/appointments`, appointmentsConfig(), nextCursor);
+      setAppointments((current) => [...current, ...page.items]);
+      setNextCursor(page.nextCursor);
+    } catch (error) {
+      toast.error("Erro ao carregar agendamentos");
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   const today = startOfDay(new Date());
   
   const upcomingAppointments = appointments.filter((appt) => {
@@ -245,6 +270,19 @@ export default function ClienteMeusAgendamentos() {
             )}
           </TabsContent>
         </Tabs>
+
+        {!loading && nextCursor && (
+          <div className="mt-4 text-center">
+            <Button
+              variant="outline"
+              onClick={loadMore}
+              disabled={loadingMore}
+              data-testid="load-more-btn"
+            >
+              {loadingMore ? "Carregando..." : "Carregar mais"}
+            </Button>
+          </div>
+        )}
       </div>
 
       {/* Appointment Detail Dialog */}